@@ -0,0 +1,105 @@
+"""
+Compare `FormSchemaViewSetMixin` adapted by Django's ASGI handler against the
+native `AsyncFormSchemaViewSetMixin`, serving concurrent `list`, `retrieve` and
+`create_form` requests through `AsyncClient` with cold and warm schema caches.
+`--latency` simulates the `formData` query of `list` and `retrieve`.
+
+    python -m benchmarks.bench_async [--concurrency N] [--rounds N] [--latency MS]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'example.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import AsyncClient  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from rest_framework import routers  # noqa: E402
+
+from benchmarks.synthetic import Profile, build_viewset  # noqa: E402
+from drf_react_template.async_mixins import AsyncFormSchemaViewSetMixin  # noqa: E402
+from drf_react_template.cache import schema_cache  # noqa: E402
+
+PROFILE = Profile('bench', fields=100, depth=1, enum_size=50, rows=10)
+
+
+def build_urlconf(latency: float):
+    viewset_class = build_viewset(PROFILE)
+
+    class SyncViewSet(viewset_class):
+        def get_queryset(self):
+            time.sleep(latency)
+            return super().get_queryset()
+
+        def get_object(self):
+            time.sleep(latency)
+            return super().get_object()
+
+    class AsyncViewSet(SyncViewSet, AsyncFormSchemaViewSetMixin):
+        pass
+
+    router = routers.SimpleRouter()
+    router.register('sync', SyncViewSet, basename='sync')
+    router.register('async', AsyncViewSet, basename='async')
+
+    class URLConf:
+        urlpatterns = router.urls
+
+    return URLConf
+
+
+async def run_round(client: AsyncClient, url: str, concurrency: int) -> float:
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(client.get(url) for _i in range(concurrency)))
+    assert all(response.status_code == 200 for response in responses)
+    return time.perf_counter() - start
+
+
+async def measure(url: str, concurrency: int, rounds: int, cold: bool) -> float:
+    client = AsyncClient()
+    await run_round(client, url, concurrency)
+    best = float('inf')
+    for _i in range(rounds):
+        if cold:
+            schema_cache.clear()
+        best = min(best, await run_round(client, url, concurrency))
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=2.0)
+    args = parser.parse_args()
+
+    urlconf = build_urlconf(args.latency / 1000)
+    print(f"{'action':>11} {'cache':>5} {'sync ms':>8} {'async ms':>9} {'speedup':>8}")
+    with override_settings(ROOT_URLCONF=urlconf, ALLOWED_HOSTS=['*']):
+        for action, path in (
+            ('list', ''),
+            ('retrieve', '0/'),
+            ('create_form', 'create/'),
+        ):
+            for cold in (True, False):
+                results = {
+                    mode: asyncio.run(
+                        measure(f'/{mode}/{path}', args.concurrency, args.rounds, cold)
+                    )
+                    for mode in ('sync', 'async')
+                }
+                print(
+                    f"{action:>11} {'cold' if cold else 'warm':>5} "
+                    f"{results['sync']:>8.2f} {results['async']:>9.2f} "
+                    f"{results['sync'] / results['async']:>7.2f}x"
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Measure how `SchemaProcessor` dependency resolution scales with the number of
+fields and of `schema:dependencies:dynamic` branches.
+
+    python -m benchmarks.bench_dependencies [--number N]
+"""
+
+import argparse
+import os
+import timeit
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'example.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework import serializers  # noqa: E402
+
+from drf_react_template.schema_form_encoder import (  # noqa: E402
+    DEPENDENCY_CONDITIONAL_KEY,
+    DEPENDENCY_DYNAMIC_KEY,
+    SchemaProcessor,
+)
+
+
+def build_dependency_serializer(field_count: int, branch_count: int) -> type:
+    """
+    `field_count` fields, half of them conditionally dependent on the other
+        half, plus one choice field with `branch_count` dynamic branches that
+        each reveal one of the fields.
+    """
+    attrs = {}
+    half = field_count // 2
+    for i in range(half):
+        attrs[f'trigger_{i}'] = serializers.CharField(
+            style={DEPENDENCY_CONDITIONAL_KEY: [f'dependent_{i}']}
+        )
+    for i in range(half):
+        attrs[f'dependent_{i}'] = serializers.CharField()
+    attrs['selector'] = serializers.ChoiceField(
+        choices=[(f'option_{i}', f'Option {i}') for i in range(branch_count)],
+        style={
+            DEPENDENCY_DYNAMIC_KEY: {
+                f'option_{i}': [f'dependent_{i % half}'] for i in range(branch_count)
+            }
+        },
+    )
+    return type('DependencySerializer', (serializers.Serializer,), attrs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'fields':>6} {'branches':>8} {'ms':>9} {'us/field':>9}")
+    for field_count, branch_count in (
+        (100, 10),
+        (500, 50),
+        (1000, 100),
+        (2000, 200),
+        (4000, 400),
+    ):
+        serializer = build_dependency_serializer(field_count, branch_count)()
+        SchemaProcessor(serializer, {}).get_schema()
+        timer = timeit.Timer(lambda: SchemaProcessor(serializer, {}).get_schema())
+        ms = min(timer.repeat(repeat=3, number=args.number)) * 1000 / args.number
+        print(
+            f'{field_count:>6} {branch_count:>8} {ms:>9.2f} '
+            f'{ms * 1000 / field_count:>9.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
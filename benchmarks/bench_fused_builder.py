@@ -0,0 +1,62 @@
+"""
+Compare building `schema` and `uiSchema` with the separate processors against
+the single-pass `FormSchemaProcessor`, for serializer trees 3 to 6 levels deep.
+
+    python -m benchmarks.bench_fused_builder [--number N]
+"""
+
+import argparse
+import os
+import timeit
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'example.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from benchmarks.synthetic import build_serializer  # noqa: E402
+from drf_react_template.schema_form_encoder import (  # noqa: E402
+    FormSchemaProcessor,
+    SchemaProcessor,
+    UiSchemaProcessor,
+)
+
+
+def separate(serializer):
+    return (
+        SchemaProcessor(serializer, {}).get_schema(),
+        UiSchemaProcessor(serializer, {}).get_ui_schema(),
+    )
+
+
+def fused(serializer):
+    return FormSchemaProcessor(serializer, {}).get_schemas()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    print(
+        f"{'depth':>5} {'nodes':>6} {'separate ms':>12} {'fused ms':>9} {'speedup':>8}"
+    )
+    for depth in range(3, 7):
+        serializer = build_serializer(fields=4, depth=depth, enum_size=2)()
+        assert separate(serializer) == fused(serializer)
+        nodes = 2**depth - 1
+        results = {}
+        for name, func in (('separate', separate), ('fused', fused)):
+            timer = timeit.Timer(lambda: func(serializer))
+            results[name] = min(timer.repeat(repeat=5, number=args.number))
+            results[name] *= 1000 / args.number
+        print(
+            f"{depth:>5} {nodes:>6} {results['separate']:>12.2f} "
+            f"{results['fused']:>9.2f} "
+            f"{results['separate'] / results['fused']:>7.2f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Benchmark suite for schema generation, rendering and viewset requests.
+
+    python -m benchmarks.run [--output results.json] [--baseline baseline.json]
+                             [--filter schema] [--number N] [--repeat N]
+
+Every case is timed over synthetic serializer profiles (see
+`benchmarks.synthetic.PROFILES`). Rendering and request cases run both with
+the schema cache ("cached") and without it ("uncached").
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'example.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import rest_framework  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from benchmarks.synthetic import (  # noqa: E402
+    PROFILES,
+    Profile,
+    build_row,
+    build_urlconf,
+    build_viewset,
+)
+from drf_react_template.cache import schema_cache  # noqa: E402
+from drf_react_template.renderers import JSONSerializerRenderer  # noqa: E402
+from drf_react_template.schema_form_encoder import (  # noqa: E402
+    ColumnProcessor,
+    SchemaProcessor,
+    UiSchemaProcessor,
+)
+from drf_react_template.warmup import build_view  # noqa: E402
+
+Case = Tuple[str, Callable[[], Any], bool]
+
+
+def _iter_processor_cases(profile: Profile) -> Iterator[Case]:
+    serializer = build_viewset(profile).serializer_class()
+    yield 'schema', lambda: SchemaProcessor(serializer, {}).get_schema(), True
+    yield 'ui_schema', lambda: UiSchemaProcessor(serializer, {}).get_ui_schema(), True
+    yield 'columns', lambda: ColumnProcessor(serializer, {}).get_schema(), True
+
+
+def _iter_render_cases(profile: Profile) -> Iterator[Case]:
+    viewset_class = build_viewset(profile)
+    renderer = JSONSerializerRenderer()
+    for action, form_data in (
+        ('retrieve', build_row(profile)),
+        ('list', [build_row(profile) for _i in range(profile.rows)]),
+    ):
+        view = build_view(viewset_class, action)
+        renderer_context = view.get_renderer_context()
+        data = {'serializer': view.get_serializer(), 'formData': form_data}
+
+        def render(data=data, renderer_context=renderer_context):
+            return renderer.render(data, renderer.media_type, renderer_context)
+
+        yield f'render_{action}', render, False
+
+
+def _iter_request_cases(profile: Profile) -> Iterator[Case]:
+    client = APIClient()
+    for action, url in (
+        ('list', f'/{profile.name}/'),
+        ('retrieve', f'/{profile.name}/1/'),
+        ('create_form', f'/{profile.name}/create/'),
+    ):
+
+        def request(url=url):
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+            return response
+
+        yield f'request_{action}', request, False
+
+
+CASE_FACTORIES = (_iter_processor_cases, _iter_render_cases, _iter_request_cases)
+
+
+def time_case(func: Callable[[], Any], number: Optional[int], repeat: int) -> Dict:
+    func()
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _elapsed = timer.autorange()
+    timings = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        'min_us': round(min(timings), 3),
+        'median_us': round(statistics.median(timings), 3),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def run(
+    profiles=PROFILES,
+    name_filter: str = '',
+    number: Optional[int] = None,
+    repeat: int = 5,
+) -> Dict[str, Any]:
+    results: Dict[str, Dict] = {}
+    urlconf = build_urlconf(profiles)
+    with override_settings(ROOT_URLCONF=urlconf, ALLOWED_HOSTS=['*']):
+        for profile in profiles:
+            for factory in CASE_FACTORIES:
+                for case, func, uncached_only in factory(profile):
+                    variants = [('uncached', False)]
+                    if not uncached_only:
+                        variants.insert(0, ('cached', True))
+                    for variant, cache_enabled in variants:
+                        name = f'{profile.name}/{case}/{variant}'
+                        if name_filter not in name:
+                            continue
+                        schema_cache.clear()
+                        with override_settings(
+                            DRF_REACT_TEMPLATE_SCHEMA_CACHE=cache_enabled
+                        ):
+                            results[name] = time_case(func, number, repeat)
+    schema_cache.clear()
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'djangorestframework': rest_framework.VERSION,
+            'machine': platform.machine(),
+        },
+        'profiles': {profile.name: profile._asdict() for profile in profiles},
+        'results': results,
+    }
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float
+) -> List[str]:
+    """
+    Print the change of every case against the baseline, returning the names
+        of cases slower than `max_regression` (a fraction, 0.1 is 10%).
+    """
+    regressions = []
+    print(f"{'case':<45} {'baseline us':>12} {'current us':>12} {'change':>8}")
+    for name, result in results['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        change = result['min_us'] / previous['min_us'] - 1
+        flag = ''
+        if change > max_regression:
+            regressions.append(name)
+            flag = ' !'
+        print(
+            f"{name:<45} {previous['min_us']:>12.1f} {result['min_us']:>12.1f} "
+            f'{change:>+8.1%}{flag}'
+        )
+    return regressions
+
+
+def print_results(results: Dict[str, Any]):
+    print(f"{'case':<45} {'min us':>12} {'median us':>12}")
+    for name, result in results['results'].items():
+        print(f"{name:<45} {result['min_us']:>12.1f} {result['median_us']:>12.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', help='write the results as JSON to this path')
+    parser.add_argument('--baseline', help='compare against a saved results file')
+    parser.add_argument(
+        '--max-regression',
+        type=float,
+        default=0.1,
+        help='fail when a case is slower than the baseline by this fraction',
+    )
+    parser.add_argument('--filter', default='', help='only run matching cases')
+    parser.add_argument('--profile', action='append', help='only run these profiles')
+    parser.add_argument('--number', type=int, help='calls per timing (auto)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    profiles = PROFILES
+    if args.profile:
+        profiles = tuple(p for p in PROFILES if p.name in args.profile)
+    results = run(profiles, args.filter, args.number, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(f'{len(regressions)} case(s) regressed', file=sys.stderr)
+            return 1
+    else:
+        print_results(results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Synthetic serializers, rows and viewsets for the benchmark suite. Views serve
+in-memory dicts, so no database is needed.
+"""
+
+import datetime
+import itertools
+import types
+from typing import Any, Dict, List, NamedTuple
+
+from rest_framework import routers, serializers
+from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
+
+from drf_react_template.mixins import FormSchemaViewSetMixin
+from drf_react_template.schema_form_encoder import DEPENDENCY_CONDITIONAL_KEY
+
+
+class Profile(NamedTuple):
+    name: str
+    fields: int = 10
+    depth: int = 0
+    enum_size: int = 0
+    dependencies: int = 0
+    rows: int = 100
+
+
+PROFILES = (
+    Profile('small'),
+    Profile('wide', fields=200),
+    Profile('deep', fields=10, depth=4),
+    Profile('enum', fields=10, enum_size=1000),
+    Profile('dependencies', fields=100, dependencies=40),
+)
+
+_FIELD_FACTORIES = (
+    lambda: serializers.CharField(max_length=100, help_text='Some help'),
+    lambda: serializers.IntegerField(min_value=0, max_value=1000),
+    lambda: serializers.BooleanField(required=False),
+    lambda: serializers.DateField(style={'ui:widget': 'date'}),
+    lambda: serializers.EmailField(),
+    lambda: serializers.DecimalField(max_digits=8, decimal_places=2),
+)
+_FIELD_VALUES = (
+    'text',
+    1,
+    True,
+    datetime.date(2020, 1, 1),
+    'user@example.com',
+    '12.50',
+)
+
+
+def build_serializer(
+    fields: int = 10,
+    depth: int = 0,
+    enum_size: int = 0,
+    dependencies: int = 0,
+    name: str = 'Synthetic',
+) -> type:
+    """
+    A serializer class with `fields` scalar fields of mixed types, an optional
+        choice field with `enum_size` choices, `dependencies` conditional
+        dependencies between consecutive field pairs, and `depth` levels of
+        nested serializers (one single and one `many=True` child per level).
+    """
+    attrs: Dict[str, Any] = {}
+    for i, factory in zip(range(fields), itertools.cycle(_FIELD_FACTORIES)):
+        attrs[f'field_{i}'] = factory()
+    for i in range(min(dependencies, fields // 2)):
+        trigger = attrs[f'field_{2 * i}']
+        trigger.style = {
+            **trigger.style,
+            DEPENDENCY_CONDITIONAL_KEY: [f'field_{2 * i + 1}'],
+        }
+    if enum_size:
+        attrs['choice'] = serializers.ChoiceField(
+            choices=[(f'option_{i}', f'Option {i}') for i in range(enum_size)]
+        )
+    if depth:
+        child_class = build_serializer(
+            fields, depth - 1, enum_size, dependencies, f'{name}Level{depth - 1}'
+        )
+        attrs['child'] = child_class()
+        attrs['children'] = child_class(many=True, required=False)
+    attrs['Meta'] = type('Meta', (), {'fields': tuple(attrs)})
+    return type(f'{name}Serializer', (serializers.Serializer,), attrs)
+
+
+def build_row(profile: Profile, depth: int = None) -> Dict[str, Any]:
+    depth = profile.depth if depth is None else depth
+    row: Dict[str, Any] = {'id': 1}
+    for i, value in zip(range(profile.fields), itertools.cycle(_FIELD_VALUES)):
+        row[f'field_{i}'] = value
+    if profile.enum_size:
+        row['choice'] = 'option_0'
+    if depth:
+        child = build_row(profile, depth - 1)
+        row['child'] = child
+        row['children'] = [child]
+    return row
+
+
+def build_viewset(profile: Profile) -> type:
+    serializer_class = build_serializer(
+        profile.fields,
+        profile.depth,
+        profile.enum_size,
+        profile.dependencies,
+        profile.name.title(),
+    )
+    rows: List[Dict[str, Any]] = [build_row(profile) for _i in range(profile.rows)]
+
+    class SyntheticViewSet(ListModelMixin, RetrieveModelMixin, FormSchemaViewSetMixin):
+        def get_queryset(self):
+            return rows
+
+        def get_object(self):
+            return rows[0]
+
+    SyntheticViewSet.serializer_class = serializer_class
+    SyntheticViewSet.__name__ = f'{profile.name.title()}ViewSet'
+    return SyntheticViewSet
+
+
+def build_urlconf(profiles=PROFILES) -> types.ModuleType:
+    """
+    A URL configuration module serving one synthetic viewset per profile at
+        `/<profile name>/`.
+    """
+    router = routers.SimpleRouter()
+    for profile in profiles:
+        router.register(profile.name, build_viewset(profile), basename=profile.name)
+    urlconf = types.ModuleType('benchmarks_urls')
+    urlconf.urlpatterns = router.urls
+    return urlconf
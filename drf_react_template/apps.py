@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class DRFReactTemplateConfig(AppConfig):
+    name = 'drf_react_template'
+
+    def ready(self):
+        if getattr(settings, 'DRF_REACT_TEMPLATE_WARMUP', False):
+            from drf_react_template.warmup import warm_up_schemas
+
+            warm_up_schemas()
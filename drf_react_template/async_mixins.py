@@ -0,0 +1,176 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import update_wrapper
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import translation
+from django.utils.decorators import classonlymethod
+
+from drf_react_template.cache import (
+    CACHE_SETTINGS,
+    get_cache_key,
+    is_cache_enabled,
+    schema_cache,
+)
+from drf_react_template.mixins import FormSchemaViewSetMixin
+from drf_react_template.schema_form_encoder import FormSerializerType
+from drf_react_template.warmup import SKIPPED_ACTIONS, build_view, warm_up_view
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ASYNC_WORKERS = 2
+
+PrewarmKey = Tuple[type, str, Optional[str]]
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# The schema cache key of each viewset action and language, `None` when the
+# schema is not cached; filled in by the first prewarm.
+_schema_keys: Dict[PrewarmKey, Optional[Tuple[Hashable, ...]]] = {}
+_pending: Dict[PrewarmKey, Future] = {}
+_pending_lock = threading.Lock()
+
+
+def get_schema_executor() -> ThreadPoolExecutor:
+    """
+    The executor schema builds are offloaded to, bounded by
+        `DRF_REACT_TEMPLATE_ASYNC_WORKERS`.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(
+                        settings,
+                        'DRF_REACT_TEMPLATE_ASYNC_WORKERS',
+                        DEFAULT_ASYNC_WORKERS,
+                    ),
+                    thread_name_prefix='form-schema',
+                )
+    return _executor
+
+
+def _prewarm(
+    key: PrewarmKey, initkwargs: Dict[str, Any], language: Optional[str]
+) -> None:
+    viewset_class, action, _language = key
+    try:
+        with translation.override(language):
+            view = build_view(viewset_class, action, initkwargs)
+            serializer_class = view.get_serializer_class()
+            cache_key = None
+            if is_cache_enabled(serializer_class):
+                cache_key = get_cache_key(serializer_class, action)
+                if cache_key not in schema_cache:
+                    warm_up_view(viewset_class, action, initkwargs, language)
+        _schema_keys[key] = cache_key
+    except Exception:
+        logger.exception(
+            'Could not precompute the %s schema of %s', action, viewset_class.__name__
+        )
+
+
+def prewarm_schema(
+    viewset_class: type,
+    action: Optional[str],
+    initkwargs: Dict[str, Any],
+    language: Optional[str],
+) -> Optional[Future]:
+    """
+    Start building the schema of a viewset action in the schema executor
+        unless it is known to be cached, returning the pending build. Builds
+        of the same action and language are shared. The language is passed
+        explicitly as executor threads do not inherit the active one.
+    """
+    if (
+        action is None
+        or action in SKIPPED_ACTIONS
+        or action in viewset_class.schema_exempt_actions
+    ):
+        return None
+    key = (viewset_class, action, language)
+    if key in _schema_keys:
+        cache_key = _schema_keys[key]
+        if cache_key is None or cache_key in schema_cache:
+            return None
+    with _pending_lock:
+        future = _pending.get(key)
+        if future is None:
+            future = _pending[key] = get_schema_executor().submit(
+                _prewarm, key, initkwargs, language
+            )
+            future.add_done_callback(lambda _future: _pending.pop(key, None))
+    return future
+
+
+class AsyncFormSchemaViewSetMixin(FormSchemaViewSetMixin):
+    """
+    Serves a `FormSchemaViewSetMixin` as a native async view under ASGI. On a
+        schema cache miss the schema is built in a bounded executor while the
+        action runs (e.g. the `formData` queries); the action and rendering
+        then share a single hop to the sync thread.
+    """
+
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        dispatch = sync_to_async(cls._dispatch_and_render)
+        # The variant is only known once the request is authenticated.
+        prewarm = (
+            cls.get_schema_variant_key is FormSchemaViewSetMixin.get_schema_variant_key
+        )
+
+        async def async_view(request, *args, **kwargs):
+            future = None
+            if prewarm:
+                future = prewarm_schema(
+                    cls,
+                    view.actions.get(request.method.lower()),
+                    view.initkwargs,
+                    translation.get_language(),
+                )
+            return await dispatch(view, future, request, *args, **kwargs)
+
+        return update_wrapper(async_view, view)
+
+    def wait_for_schema(self):
+        """
+        Block until a pending `prewarm_schema` build of this action finishes,
+            rather than building the same schema concurrently.
+        """
+        future = _pending.get((type(self), self.action, translation.get_language()))
+        if future is not None:
+            wait((future,))
+
+    def get_schema_hash(self, serializer: Optional[FormSerializerType] = None) -> str:
+        self.wait_for_schema()
+        return super().get_schema_hash(serializer)
+
+    @staticmethod
+    def _dispatch_and_render(view, future: Optional[Future], request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if future is not None:
+            wait((future,))
+        render = getattr(response, 'render', None)
+        if callable(render):
+            # Django's handler would otherwise render in another sync hop.
+            response = render()
+        return response
+
+
+@receiver(setting_changed)
+def reset_schema_executor(setting: str, **kwargs):
+    global _executor
+    if setting == 'DRF_REACT_TEMPLATE_ASYNC_WORKERS':
+        with _executor_lock:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = None
+    elif setting in CACHE_SETTINGS:
+        _schema_keys.clear()
@@ -0,0 +1,159 @@
+import json
+from typing import Any, Dict, Optional, Tuple, Type, Union
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.renderers import INDENT_SEPARATORS, SHORT_SEPARATORS
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+DEFAULT_JSON_BACKEND = 'drf_react_template.backends.StdlibJSONBackend'
+
+
+class BaseJSONBackend:
+    """
+    Encodes renderer payloads to UTF-8 bytes. Serializer objects and any other
+        non-native values are handled by the renderer's encoder class.
+    """
+
+    def supports(
+        self,
+        indent: Optional[Union[int, str]],
+        separators: Tuple[str, str],
+        ensure_ascii: bool,
+        allow_nan: bool,
+    ) -> bool:
+        return True
+
+    def dumps(
+        self,
+        data: Any,
+        encoder_class: Type[json.JSONEncoder],
+        renderer_context: Dict[str, Any],
+        indent: Optional[Union[int, str]],
+        separators: Tuple[str, str],
+        ensure_ascii: bool,
+        allow_nan: bool,
+    ) -> bytes:
+        raise NotImplementedError()
+
+
+class StdlibJSONBackend(BaseJSONBackend):
+    def dumps(
+        self,
+        data: Any,
+        encoder_class: Type[json.JSONEncoder],
+        renderer_context: Dict[str, Any],
+        indent: Optional[Union[int, str]],
+        separators: Tuple[str, str],
+        ensure_ascii: bool,
+        allow_nan: bool,
+    ) -> bytes:
+        return json.dumps(
+            data,
+            cls=encoder_class,
+            indent=indent,
+            ensure_ascii=ensure_ascii,
+            allow_nan=allow_nan,
+            separators=separators,
+            renderer_context=renderer_context,
+        ).encode('utf-8')
+
+
+def _has_inexact_float(value: Any) -> bool:
+    """
+    Whether `value` holds a float orjson does not write as `json.dumps` does:
+        NaN and infinities (written as `null`), and magnitudes below 1e-4 or
+        from 1e16 on, which `repr` writes in exponent form (`1e-05`, `1e+16`).
+    """
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if value and not 1e-4 <= abs(value) < 1e16:
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class OrjsonJSONBackend(BaseJSONBackend):
+    """
+    Uses `orjson` when it is installed. Only the option combinations orjson
+        can reproduce byte for byte are supported: compact or 2-space indented
+        UTF-8 output with strict (no NaN) float handling. Payloads orjson
+        rejects (non-str keys, integers over 64 bits) or would format
+        differently (see `_has_inexact_float`) fall back to stdlib.
+    """
+
+    fallback = StdlibJSONBackend()
+
+    def supports(
+        self,
+        indent: Optional[Union[int, str]],
+        separators: Tuple[str, str],
+        ensure_ascii: bool,
+        allow_nan: bool,
+    ) -> bool:
+        if orjson is None or ensure_ascii or allow_nan:
+            return False
+        if indent is None:
+            return tuple(separators) == SHORT_SEPARATORS
+        return indent == 2 and tuple(separators) == INDENT_SEPARATORS
+
+    def dumps(
+        self,
+        data: Any,
+        encoder_class: Type[json.JSONEncoder],
+        renderer_context: Dict[str, Any],
+        indent: Optional[Union[int, str]],
+        separators: Tuple[str, str],
+        ensure_ascii: bool,
+        allow_nan: bool,
+    ) -> bytes:
+        # Dates, times and dataclasses go through the encoder's `default` so
+        # they are formatted exactly as `DjangoJSONEncoder` formats them.
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if indent is not None:
+            option |= orjson.OPT_INDENT_2
+        encoder = encoder_class(renderer_context=renderer_context)
+
+        def default(obj: Any) -> Any:
+            value = encoder.default(obj)
+            if _has_inexact_float(value):
+                raise TypeError('Inexact float')
+            return value
+
+        try:
+            if not _has_inexact_float(data):
+                return orjson.dumps(data, default=default, option=option)
+        except orjson.JSONEncodeError:
+            pass
+        return self.fallback.dumps(
+            data,
+            encoder_class,
+            renderer_context,
+            indent,
+            separators,
+            ensure_ascii,
+            allow_nan,
+        )
+
+
+stdlib_json_backend = StdlibJSONBackend()
+_json_backends: Dict[str, BaseJSONBackend] = {}
+
+
+def get_json_backend(path: Optional[str] = None) -> BaseJSONBackend:
+    path = path or getattr(
+        settings, 'DRF_REACT_TEMPLATE_JSON_BACKEND', DEFAULT_JSON_BACKEND
+    )
+    backend = _json_backends.get(path)
+    if backend is None:
+        backend = _json_backends.setdefault(path, import_string(path)())
+    return backend
@@ -0,0 +1,505 @@
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.core.signals import setting_changed
+from django.db.models import Manager, QuerySet
+from django.dispatch import receiver
+from django.utils.functional import Promise
+from django.utils.translation import get_language
+from rest_framework.fields import ChoiceField, Field
+from rest_framework.serializers import BaseSerializer, ListSerializer
+from rest_framework.utils.representation import manager_repr, smart_repr
+
+try:
+    from importlib import metadata
+except ImportError:  # pragma: no cover
+    metadata = None
+
+DISTRIBUTION_NAME = 'drf-react-template-framework'
+SHARED_CACHE_KEY_PREFIX = 'drf-react-template:schema'
+DEFAULT_VARIANT_CACHE_MAX_ENTRIES = 1000
+DEFAULT_VARIANT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+CACHE_SETTINGS = {
+    'DRF_REACT_TEMPLATE_TYPE_MAP',
+    'DRF_REACT_TEMPLATE_SCHEMA_CACHE',
+    'DRF_REACT_TEMPLATE_SCHEMA_DEFINITIONS',
+    'DRF_REACT_TEMPLATE_MAX_DEPTH',
+    'DRF_REACT_TEMPLATE_REMOTE_ENUM_THRESHOLD',
+}
+
+
+class SchemaCache:
+    """
+    Process-wide store for generated schema, uiSchema and column output.
+        Entries are built at most once per key; concurrent builders of the
+        same key all receive the value that was stored first.
+
+    With `DRF_REACT_TEMPLATE_SCHEMA_CACHE_LANGUAGES` set, entries are grouped
+        by the language active when they were stored and only that many
+        languages are kept, the least recently used being evicted as a whole.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        # Keys stored under each language, least recently used first; only
+        # tracked when the number of languages is bounded.
+        self._language_keys: 'OrderedDict[Optional[str], Set[Hashable]]' = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def languages(self) -> Tuple[Optional[str], ...]:
+        """
+        The languages with entries, least recently used first, when bounded.
+        """
+        return tuple(self._language_keys)
+
+    def _touch(self):
+        if self._language_keys:
+            try:
+                self._language_keys.move_to_end(get_language())
+            except KeyError:
+                pass
+
+    def _add_language_key(self, key: Hashable, max_languages: int):
+        language = get_language()
+        keys = self._language_keys.get(language)
+        if keys is None:
+            keys = self._language_keys[language] = set()
+            while len(self._language_keys) > max(max_languages, 1):
+                _language, evicted = self._language_keys.popitem(last=False)
+                for evicted_key in evicted:
+                    self._entries.pop(evicted_key, None)
+        else:
+            self._language_keys.move_to_end(language)
+        keys.add(key)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._entries.get(key, default)
+        self._touch()
+        return value
+
+    def set(self, key: Hashable, value: Any) -> Any:
+        max_languages = getattr(
+            settings, 'DRF_REACT_TEMPLATE_SCHEMA_CACHE_LANGUAGES', None
+        )
+        with self._lock:
+            value = self._entries.setdefault(key, value)
+            if max_languages is not None:
+                self._add_language_key(key, max_languages)
+            return value
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        try:
+            value = self._entries[key]
+        except KeyError:
+            return self.set(key, build())
+        self._touch()
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._language_keys.clear()
+
+
+schema_cache = SchemaCache()
+
+
+class VariantCacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    resident_bytes: int
+
+
+class SchemaVariantCache:
+    """
+    Bounded store for encoded schemas and schema hashes of serializers that
+        vary per request (e.g. per tenant), keyed by the variant key of
+        `FormSchemaViewSetMixin.get_schema_variant_key`. The least recently
+        used entries are evicted once there are more than
+        `DRF_REACT_TEMPLATE_VARIANT_CACHE_MAX_ENTRIES` entries or their
+        encoded size exceeds `DRF_REACT_TEMPLATE_VARIANT_CACHE_MAX_BYTES`.
+    """
+
+    def __init__(self):
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.resident_bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _get_size(value: Any) -> int:
+        if isinstance(value, (bytes, bytearray, memoryview, str)):
+            return len(value)
+        return 0
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = build()
+        self.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        max_entries = getattr(
+            settings,
+            'DRF_REACT_TEMPLATE_VARIANT_CACHE_MAX_ENTRIES',
+            DEFAULT_VARIANT_CACHE_MAX_ENTRIES,
+        )
+        max_bytes = getattr(
+            settings,
+            'DRF_REACT_TEMPLATE_VARIANT_CACHE_MAX_BYTES',
+            DEFAULT_VARIANT_CACHE_MAX_BYTES,
+        )
+        size = self._get_size(value)
+        if size > max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.resident_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.resident_bytes += size
+            while len(self._entries) > max_entries or self.resident_bytes > max_bytes:
+                _key, (_value, evicted_size) = self._entries.popitem(last=False)
+                self.resident_bytes -= evicted_size
+                self.evictions += 1
+
+    def get_stats(self) -> VariantCacheStats:
+        return VariantCacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            entries=len(self._entries),
+            resident_bytes=self.resident_bytes,
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.resident_bytes = 0
+
+
+schema_variant_cache = SchemaVariantCache()
+
+
+class SerializerTree(NamedTuple):
+    # No serializer nested in the tree opts out of the schema cache.
+    cache_enabled: bool
+    # The fields holding nested serializers with `schema_dynamic_fields`.
+    dynamic_fields: FrozenSet[str]
+
+
+_serializer_trees: Dict[type, SerializerTree] = {}
+
+
+def _get_meta_option(serializer_class: type, name: str, default: Any) -> Any:
+    return getattr(getattr(serializer_class, 'Meta', None), name, default)
+
+
+def _get_serializer_fields(serializer: Any) -> Mapping[str, Any]:
+    try:
+        return serializer.fields
+    except Exception:
+        # e.g. `get_fields` reading the request from the context.
+        return getattr(type(serializer), '_declared_fields', {})
+
+
+def _iter_nested_classes(field: Any, seen: Set[type]) -> Iterator[type]:
+    if isinstance(field, ListSerializer):
+        field = field.child
+    if not isinstance(field, BaseSerializer) or type(field) in seen:
+        return
+    seen.add(type(field))
+    yield type(field)
+    for child in _get_serializer_fields(field).values():
+        yield from _iter_nested_classes(child, seen)
+
+
+def get_serializer_tree(serializer_class: type) -> SerializerTree:
+    """
+    What the serializers nested in `serializer_class` declare about the
+        schema of the whole tree, walked once per class.
+    """
+    tree = _serializer_trees.get(serializer_class)
+    if tree is None:
+        try:
+            fields = _get_serializer_fields(serializer_class())
+        except Exception:
+            fields = getattr(serializer_class, '_declared_fields', {})
+        nested = {
+            name: tuple(_iter_nested_classes(field, {serializer_class}))
+            for name, field in fields.items()
+        }
+        tree = SerializerTree(
+            cache_enabled=all(
+                _get_meta_option(nested_class, 'schema_cache', True)
+                for classes in nested.values()
+                for nested_class in classes
+            ),
+            dynamic_fields=frozenset(
+                name
+                for name, classes in nested.items()
+                if any(
+                    _get_meta_option(nested_class, 'schema_dynamic_fields', ())
+                    for nested_class in classes
+                )
+            ),
+        )
+        # Concurrent walks of the same class store equal values.
+        _serializer_trees[serializer_class] = tree
+    return tree
+
+
+def is_cache_enabled(serializer_class: type) -> bool:
+    """
+    Serializers whose schema really is dynamic opt out with
+        `class Meta: schema_cache = False`, which also opts out every
+        serializer they are nested in.
+    """
+    if not getattr(settings, 'DRF_REACT_TEMPLATE_SCHEMA_CACHE', True):
+        return False
+    return (
+        _get_meta_option(serializer_class, 'schema_cache', True)
+        and get_serializer_tree(serializer_class).cache_enabled
+    )
+
+
+def get_dynamic_fields(serializer_class: type) -> FrozenSet[str]:
+    """
+    The fields whose schema depends on the request (callable defaults, style
+        or choices set in `__init__`), declared with
+        `class Meta: schema_dynamic_fields = ('owner', ...)`. They are rebuilt
+        on every request and laid over the cached schema of the other fields.
+        A field holding a nested serializer with dynamic fields is rebuilt
+        as a whole.
+    """
+    return (
+        frozenset(_get_meta_option(serializer_class, 'schema_dynamic_fields', ()))
+        | get_serializer_tree(serializer_class).dynamic_fields
+    )
+
+
+def get_cache_key(serializer_class: type, action: str) -> Tuple[Hashable, ...]:
+    return serializer_class, action, get_language()
+
+
+def get_schema_variant(
+    renderer_context: Optional[Dict[str, Any]],
+) -> Optional[Hashable]:
+    """
+    The schema variant key of the request, `None` for the default schema.
+    """
+    return (renderer_context or {}).get('schema_variant')
+
+
+def get_schema_hash_key(schema_hash: str) -> Tuple[Hashable, ...]:
+    return 'schema-hash', schema_hash
+
+
+def get_shared_schema_hash_key(schema_hash: str) -> str:
+    return f'{SHARED_CACHE_KEY_PREFIX}:hash:{schema_hash}'
+
+
+def get_shared_cache() -> Optional[BaseCache]:
+    """
+    The Django cache encoded schemas are shared through across processes,
+        named by `DRF_REACT_TEMPLATE_SHARED_CACHE`; `None` when disabled.
+    """
+    alias = getattr(settings, 'DRF_REACT_TEMPLATE_SHARED_CACHE', None)
+    return caches[alias] if alias else None
+
+
+_package_version: Optional[str] = None
+
+
+def get_package_version() -> str:
+    """
+    The installed package version, or a digest of the package source when
+        running from a checkout.
+    """
+    global _package_version
+    if _package_version is None and metadata is not None:
+        try:
+            _package_version = metadata.version(DISTRIBUTION_NAME)
+        except metadata.PackageNotFoundError:
+            pass
+    if _package_version is None:
+        digest = hashlib.sha256()
+        for path in sorted(Path(__file__).parent.rglob('*.py')):
+            digest.update(path.read_bytes())
+        _package_version = digest.hexdigest()[:16]
+    return _package_version
+
+
+STATE_REPR_MAX_DEPTH = 4
+FIELD_STATE_ATTRIBUTES = (
+    'label',
+    'help_text',
+    'required',
+    'read_only',
+    'allow_null',
+    'default',
+    'initial',
+    'style',
+)
+
+
+def _state_repr(value: Any, depth: int = 0) -> str:
+    # Never evaluate querysets: their rows are data, not definition.
+    if isinstance(value, Manager):
+        return manager_repr(value)
+    if isinstance(value, QuerySet):
+        return f'<QuerySet {value.model._meta.label}>'
+    if isinstance(value, Field):
+        return _field_repr(value)
+    if depth > STATE_REPR_MAX_DEPTH:
+        return f'<{type(value).__qualname__}>'
+    if isinstance(value, dict):
+        return repr({key: _state_repr(item, depth + 1) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return repr([_state_repr(item, depth + 1) for item in value])
+    if (
+        isinstance(value, (Promise, type))
+        or inspect.isroutine(value)
+        or not hasattr(value, '__dict__')
+    ):
+        return smart_repr(value)
+    # Validators and the like, whose `__repr__` may evaluate a queryset.
+    return f'{type(value).__qualname__}({_state_repr(vars(value), depth + 1)})'
+
+
+def _field_repr(field: Any, force_many: bool = False) -> str:
+    """
+    `rest_framework.utils.representation.field_repr` without evaluating the
+        querysets of relational fields and validators.
+    """
+    kwargs = dict(field._kwargs)
+    if force_many:
+        kwargs['many'] = True
+        kwargs.pop('child', None)
+    arguments = [_state_repr(value) for value in field._args]
+    arguments.extend(
+        f'{key}={_state_repr(value)}' for key, value in sorted(kwargs.items())
+    )
+    return f'{type(field).__name__}({", ".join(arguments)})'
+
+
+def _field_state_repr(field: Any) -> str:
+    """
+    The state of `field` its schema is generated from, which `_field_repr`
+        (the constructor arguments) misses when the serializer changes it in
+        `__init__`.
+    """
+    state = [_state_repr(getattr(field, name, None)) for name in FIELD_STATE_ATTRIBUTES]
+    if isinstance(field, ChoiceField):
+        state.append(_state_repr(field.choices))
+    if not isinstance(field, BaseSerializer):
+        state.extend(_state_repr(validator) for validator in field.validators)
+    return ', '.join(state)
+
+
+def _iter_definition(
+    serializer: Any, ancestors: Tuple[type, ...] = ()
+) -> Iterator[str]:
+    serializer_class = type(serializer)
+    yield f'{serializer_class.__module__}.{serializer_class.__qualname__}'
+    if serializer_class in ancestors:
+        # Self-referential trees, see `ProcessingMixin._is_lazy_serializer`.
+        return
+    meta = getattr(serializer_class, 'Meta', None)
+    yield repr(getattr(meta, 'fields', None))
+    ancestors = (*ancestors, serializer_class)
+    for name, field in serializer.fields.items():
+        if isinstance(field, ListSerializer):
+            yield f'{name} = {_field_repr(field.child, force_many=True)}'
+            yield f'  {_field_state_repr(field)}'
+            yield from _iter_definition(field.child, ancestors)
+        else:
+            yield f'{name} = {_field_repr(field)}'
+            yield f'  {_field_state_repr(field)}'
+            if isinstance(field, BaseSerializer):
+                yield from _iter_definition(field, ancestors)
+
+
+def get_definition_hash(serializer: Any) -> str:
+    """
+    A digest of everything the schema of `serializer` is generated from: its
+        field tree with the arguments and state of every field, and the
+        settings that change the generated schema.
+    """
+    parts = [
+        *_iter_definition(serializer),
+        *(
+            f'{name}={getattr(settings, name, None)!r}'
+            for name in sorted(CACHE_SETTINGS)
+        ),
+    ]
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def get_shared_cache_key(
+    serializer: Any, action: str, *encoding_options: Hashable
+) -> str:
+    parts = (
+        get_package_version(),
+        get_definition_hash(serializer),
+        action,
+        str(get_language()),
+        *(repr(option) for option in encoding_options),
+    )
+    digest = hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+    return f'{SHARED_CACHE_KEY_PREFIX}:{digest}'
+
+
+@receiver(setting_changed)
+def clear_schema_cache(setting: str, **kwargs):
+    if (
+        setting in CACHE_SETTINGS
+        or setting == 'DRF_REACT_TEMPLATE_SCHEMA_CACHE_LANGUAGES'
+    ):
+        schema_cache.clear()
+    if setting in CACHE_SETTINGS or setting.startswith(
+        'DRF_REACT_TEMPLATE_VARIANT_CACHE_'
+    ):
+        schema_variant_cache.clear()
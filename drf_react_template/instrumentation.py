@@ -0,0 +1,92 @@
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import Any, ContextManager, Dict, List, Optional
+
+from django.dispatch import Signal
+
+# Sent once a `FormSchemaViewSetMixin` response has been rendered, with
+# `view`, `request` and `timings` keyword arguments.
+form_schema_timings = Signal()
+
+SERVER_TIMING_HEADER = 'Server-Timing'
+
+
+class Timings:
+    """
+    Per-request phase durations (milliseconds), payload sizes (bytes) and
+        schema cache outcomes. Phases may nest; each phase only counts the
+        time not spent in the phases nested inside it, so durations add up
+        to the instrumented total.
+    """
+
+    def __init__(self, server_timing: bool = False):
+        self.server_timing = server_timing
+        self.durations: Dict[str, float] = {}
+        self.sizes: Dict[str, int] = {}
+        self.cache: Dict[str, bool] = {}
+        # Open phases as [phase, start, time spent in nested phases].
+        self._stack: List[List[Any]] = []
+
+    def start(self, phase: str):
+        self._stack.append([phase, perf_counter(), 0.0])
+
+    def stop(self, phase: str):
+        if not any(entry[0] == phase for entry in self._stack):
+            return
+        end = perf_counter()
+        # Phases left open inside this one (e.g. by an exception) are dropped.
+        open_phase, start, nested = self._stack.pop()
+        while open_phase != phase:
+            open_phase, start, nested = self._stack.pop()
+        elapsed = end - start
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        self.durations[phase] = (
+            self.durations.get(phase, 0.0) + (elapsed - nested) * 1000
+        )
+
+    @contextmanager
+    def measure(self, phase: str):
+        self.start(phase)
+        try:
+            yield self
+        finally:
+            self.stop(phase)
+
+    def set_size(self, name: str, size: int):
+        self.sizes[name] = size
+
+    def set_cache(self, name: str, hit: bool):
+        # Any miss during the request makes it a miss.
+        self.cache[name] = self.cache.get(name, True) and hit
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'durations': dict(self.durations),
+            'sizes': dict(self.sizes),
+            'cache': dict(self.cache),
+        }
+
+    def get_server_timing(self) -> str:
+        metrics = [
+            f'{phase};dur={duration:.3f}' for phase, duration in self.durations.items()
+        ]
+        metrics.extend(
+            f'{name}-cache;desc={"hit" if hit else "miss"}'
+            for name, hit in self.cache.items()
+        )
+        metrics.extend(f'{name}-size;desc={size}' for name, size in self.sizes.items())
+        return ', '.join(metrics)
+
+
+def get_timings(renderer_context: Optional[Dict[str, Any]]) -> Optional[Timings]:
+    return (renderer_context or {}).get('timings')
+
+
+def measure(timings: Optional[Timings], phase: str) -> ContextManager:
+    """
+    `timings.measure(phase)`, or a no-op when the request is not instrumented.
+    """
+    if timings is None:
+        return nullcontext()
+    return timings.measure(phase)
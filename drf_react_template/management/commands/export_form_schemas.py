@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from drf_react_template.warmup import export_form_schemas
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the schema of every FormSchemaViewSetMixin action as static, '
+        'content-hashed JSON files with a manifest.json, e.g. for a CDN.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('outdir', help='Directory to write the schemas to.')
+        parser.add_argument(
+            '--language',
+            action='append',
+            dest='languages',
+            help='Language to export schemas for, may be repeated.',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        manifest = export_form_schemas(
+            options['outdir'], languages=options['languages']
+        )
+        count = sum(
+            len(languages)
+            for actions in manifest['schemas'].values()
+            for languages in actions.values()
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"Exported {count} form schemas to {options['outdir']} in {elapsed:.3f}s"
+        )
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from drf_react_template.warmup import export_schema_store
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the encoded schema of every FormSchemaViewSetMixin action to a '
+        'file served through DRF_REACT_TEMPLATE_SCHEMA_STORE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Schema store file to write.')
+        parser.add_argument(
+            '--language',
+            action='append',
+            dest='languages',
+            help='Language to export schemas for, may be repeated.',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = export_schema_store(options['path'], languages=options['languages'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"Exported {count} form schemas to {options['path']} in {elapsed:.3f}s"
+        )
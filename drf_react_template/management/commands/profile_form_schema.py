@@ -0,0 +1,131 @@
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from drf_react_template.profiling import CollapsedStackProfiler, get_schema_runner
+
+# Functions reported by `--mode cprofile` unless `--restrict` is given.
+DEFAULT_RESTRICTION = 'drf_react_template|rest_framework'
+
+
+class Command(BaseCommand):
+    help = (
+        'Profile building and encoding the form schema of a FormSchemaViewSetMixin '
+        'or serializer class, with the schema cache disabled.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Dotted path of a viewset or serializer class.'
+        )
+        parser.add_argument('--action', default='retrieve', help='View action.')
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=100,
+            help='Number of times the schema is built.',
+        )
+        parser.add_argument(
+            '--mode',
+            choices=('cprofile', 'tracemalloc', 'collapsed'),
+            default='cprofile',
+        )
+        parser.add_argument(
+            '--limit', type=int, default=30, help='Number of entries reported.'
+        )
+        parser.add_argument(
+            '--sort',
+            default='tottime',
+            help='cProfile sort key, e.g. tottime, cumulative, ncalls.',
+        )
+        parser.add_argument(
+            '--restrict',
+            default=DEFAULT_RESTRICTION,
+            help='Regular expression the reported cProfile functions must match.',
+        )
+        parser.add_argument(
+            '--group-by',
+            choices=('lineno', 'filename', 'traceback'),
+            default='lineno',
+            help='tracemalloc statistics grouping.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the raw result to this file: a pstats dump for cprofile, '
+            'collapsed stacks for collapsed.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            run = get_schema_runner(options['path'], options['action'])
+        except (ImportError, TypeError) as e:
+            raise CommandError(str(e))
+        iterations = options['iterations']
+        with override_settings(DRF_REACT_TEMPLATE_SCHEMA_CACHE=False):
+            run()
+            start = time.perf_counter()
+            getattr(self, f'_profile_{options["mode"]}')(run, iterations, options)
+            elapsed = time.perf_counter() - start
+        self.stderr.write(
+            f'Profiled {iterations} schema builds of {options["path"]} '
+            f'({options["action"]}) in {elapsed:.3f}s'
+        )
+
+    def _profile_cprofile(self, run, iterations, options):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        for _i in range(iterations):
+            run()
+        profiler.disable()
+        if options['output']:
+            profiler.dump_stats(options['output'])
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats(options['sort'])
+        restrictions = [options['limit']]
+        if options['restrict']:
+            restrictions.insert(0, options['restrict'])
+        stats.print_stats(*restrictions)
+        self.stdout.write(stream.getvalue())
+
+    def _profile_tracemalloc(self, run, iterations, options):
+        group_by = options['group_by']
+        trace_filters = (tracemalloc.Filter(False, tracemalloc.__file__),)
+        tracemalloc.start(25 if group_by == 'traceback' else 1)
+        try:
+            before = tracemalloc.take_snapshot().filter_traces(trace_filters)
+            if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+                tracemalloc.reset_peak()
+            for _i in range(iterations):
+                run()
+            after = tracemalloc.take_snapshot().filter_traces(trace_filters)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.stdout.write(
+            f'Traced memory: current {current / 1024:.1f} KiB, '
+            f'peak {peak / 1024:.1f} KiB'
+        )
+        for stat in after.compare_to(before, group_by)[: options['limit']]:
+            if group_by != 'traceback':
+                self.stdout.write(str(stat))
+                continue
+            self.stdout.write(
+                f'{stat.size_diff / 1024:+.1f} KiB in {stat.count_diff:+d} blocks'
+            )
+            for line in stat.traceback.format(limit=6, most_recent_first=True):
+                self.stdout.write(f'    {line}')
+
+    def _profile_collapsed(self, run, iterations, options):
+        profiler = CollapsedStackProfiler()
+        profiler.run(run, iterations)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                profiler.write(f)
+        else:
+            profiler.write(self.stdout)
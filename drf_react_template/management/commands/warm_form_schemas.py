@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from drf_react_template.warmup import warm_up_schemas
+
+
+class Command(BaseCommand):
+    help = 'Precompute the schema of every FormSchemaViewSetMixin action.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--language',
+            action='append',
+            dest='languages',
+            help='Language to build schemas for, may be repeated.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of threads used to build schemas.',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = warm_up_schemas(
+            languages=options['languages'], max_workers=options['workers']
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'Precomputed {count} form schemas in {elapsed:.3f}s')
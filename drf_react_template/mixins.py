@@ -1,31 +1,548 @@
-from rest_framework import status
+import hashlib
+from itertools import islice
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q, QuerySet
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import relations, serializers, status
 from rest_framework.decorators import action
-from rest_framework.mixins import Response
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.mixins import ListModelMixin, Response
 from rest_framework.viewsets import GenericViewSet
 
+from drf_react_template.cache import (
+    get_cache_key,
+    get_dynamic_fields,
+    get_schema_hash_key,
+    get_shared_cache,
+    get_shared_schema_hash_key,
+    is_cache_enabled,
+    schema_cache,
+)
+from drf_react_template.instrumentation import Timings, form_schema_timings, measure
 from drf_react_template.renderers import JSONSerializerRenderer
+from drf_react_template.schema_form_encoder import (
+    REMOTE_ENUM_SEARCH_KEY,
+    DeferredSerializer,
+    FormSchemaProcessor,
+    FormSerializerType,
+    SerializerEncoder,
+    is_remote_enum,
+    resolve_translations,
+)
+
+SUB_SCHEMA_PREFIX_KEYS = frozenset(('subSchema', 'ui:subSchema', 'enumSource'))
+
+
+def _replace_prefix(value: Any, old: str, new: str) -> Any:
+    """
+    A copy of the sub-schema `value` built at prefix `old` whose data indexes
+        start with `new` instead.
+    """
+    if isinstance(value, dict):
+        return {
+            key: (
+                new + item[len(old) :]
+                if key in SUB_SCHEMA_PREFIX_KEYS and isinstance(item, str)
+                else _replace_prefix(item, old, new)
+            )
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_replace_prefix(item, old, new) for item in value]
+    return value
 
 
 class FormSchemaViewSetMixin(GenericViewSet):
     renderer_classes = (JSONSerializerRenderer,)
     serializer_list_class = None
+    create_form_cache_control: Dict[str, Any] = {'no_cache': True}
+    create_form_vary_headers: Sequence[str] = ('Accept', 'Accept-Language')
+    schema_hash_header = 'X-Schema-Hash'
+    schema_hash_query_param = 'schema_hash'
+    schema_by_hash_cache_control: Dict[str, Any] = {
+        'public': True,
+        'max_age': 31536000,
+        'immutable': True,
+    }
+    schema_exempt_actions: Sequence[str] = (
+        'schema_by_hash',
+        'sub_schema',
+        'enum_choices',
+    )
+    sub_schema_query_param = 'prefix'
+    enum_page_size = 100
+    enum_max_page_size = 1000
+    server_timing: Optional[bool] = None
+    schema_data_only: Optional[bool] = None
 
     def get_serializer_class(self):
         if self.action == 'list' and self.serializer_list_class:
             return self.serializer_list_class
         return self.serializer_class
 
+    def get_timings(self) -> Optional[Timings]:
+        """
+        A `Timings` for this request when the `Server-Timing` header is
+            enabled or `form_schema_timings` has receivers, otherwise `None`.
+        """
+        server_timing = self.server_timing
+        if server_timing is None:
+            server_timing = getattr(settings, 'DRF_REACT_TEMPLATE_SERVER_TIMING', False)
+        if server_timing or form_schema_timings.has_listeners(type(self)):
+            return Timings(server_timing=server_timing)
+        return None
+
+    def get_schema_variant_key(self) -> Optional[Hashable]:
+        """
+        A key for serializers whose fields or `style` vary per request, e.g.
+            the tenant of `self.request`. Schemas of each variant are cached
+            in the bounded `schema_variant_cache`; `None` (the default) uses
+            the schema shared by every request.
+        """
+        return None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # After authentication, which variants commonly depend on.
+        self.schema_variant = self.get_schema_variant_key()
+        self.timings = self.get_timings()
+        if self.timings is not None:
+            # Closed in `finalize_response`: the action handler, i.e. fetching
+            # and serializing `formData`.
+            self.timings.start('form_data')
+
+    def get_renderer_context(self) -> Dict[str, Any]:
+        renderer_context = super().get_renderer_context()
+        renderer_context['timings'] = getattr(self, 'timings', None)
+        renderer_context['schema_variant'] = getattr(self, 'schema_variant', None)
+        return renderer_context
+
+    def get_serializer(self, *args, **kwargs):
+        with measure(getattr(self, 'timings', None), 'serializer'):
+            serializer = super().get_serializer(*args, **kwargs)
+        self._form_serializer = serializer
+        return serializer
+
+    def get_form_serializer(self) -> FormSerializerType:
+        """
+        The serializer the action already built when it matches the serializer
+            class, otherwise a deferred one that is only built on a cache miss.
+        """
+        serializer_class = self.get_serializer_class()
+        serializer = getattr(self, '_form_serializer', None)
+        if isinstance(serializer, serializers.ListSerializer):
+            # Binding a `many=True` child blanks its label, which only the
+            # column output of the list action ignores.
+            serializer = serializer.child if self.action == 'list' else None
+        if type(serializer) is serializer_class and not getattr(
+            serializer.root, 'partial', False
+        ):
+            # Fields of partial serializers (`partial_update`) have no defaults.
+            return serializer
+        return DeferredSerializer(serializer_class, self.get_serializer)
+
+    def get_schema_hash(self, serializer: Optional[FormSerializerType] = None) -> str:
+        return SerializerEncoder(
+            renderer_context=self.get_renderer_context()
+        ).get_schema_hash(serializer or self.get_form_serializer())
+
+    def get_client_schema_hash(self) -> Optional[str]:
+        """
+        The schema hash the client already holds, `None` when the client
+            does not take part in schema-by-reference negotiation. Responses
+            that consulted it vary on the header.
+        """
+        self._vary_on_schema_hash = True
+        schema_hash = self.request.headers.get(self.schema_hash_header)
+        if schema_hash is None:
+            schema_hash = self.request.query_params.get(self.schema_hash_query_param)
+        return schema_hash
+
+    def is_schema_data_only(self) -> bool:
+        """
+        Whether responses leave out the `serializer` object in favour of the
+            `schemaHash` of a schema exported with `export_form_schemas`.
+            Serializers with dynamic fields and schema variants, which are not
+            exported, always send their schema.
+        """
+        data_only = self.schema_data_only
+        if data_only is None:
+            data_only = getattr(settings, 'DRF_REACT_TEMPLATE_SCHEMA_DATA_ONLY', False)
+        return (
+            data_only
+            and getattr(self, 'schema_variant', None) is None
+            and not get_dynamic_fields(self.get_serializer_class())
+        )
+
+    def get_form_payload(self, form_data: Any) -> Dict[str, Any]:
+        serializer = self.get_form_serializer()
+        if self.is_schema_data_only():
+            return {
+                'formData': form_data,
+                'schemaHash': self.get_schema_hash(serializer),
+            }
+        client_schema_hash = self.get_client_schema_hash()
+        if client_schema_hash is None:
+            return {'serializer': serializer, 'formData': form_data}
+        schema_hash = self.get_schema_hash(serializer)
+        if client_schema_hash == schema_hash:
+            return {'formData': form_data, 'schemaHash': schema_hash}
+        return {
+            'serializer': serializer,
+            'formData': form_data,
+            'schemaHash': schema_hash,
+        }
+
     def finalize_response(self, request, response, *args, **kwargs):
+        timings = getattr(self, 'timings', None)
+        if timings is not None:
+            timings.stop('form_data')
         response = super(FormSchemaViewSetMixin, self).finalize_response(
             request, response, args, kwargs
         )
-        if response.status_code in (status.HTTP_200_OK, status.HTTP_201_CREATED):
-            response.data = {
-                'serializer': self.get_serializer(),
-                'formData': response.data,
-            }
+        if self.action in self.schema_exempt_actions:
+            return response
+        if isinstance(response, Response) and response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_201_CREATED,
+        ):
+            response.data = self.get_form_payload(response.data)
+        if getattr(self, '_vary_on_schema_hash', False):
+            patch_vary_headers(response, (self.schema_hash_header,))
         return response
 
+    @staticmethod
+    def _etag_matches(etag: str, if_none_match: str) -> bool:
+        etags = parse_etags(if_none_match)
+        if '*' in etags:
+            return True
+        return any((e[2:] if e.startswith('W/') else e) == etag for e in etags)
+
+    def get_form_etag(self, schema_hash: str) -> str:
+        """
+        An ETag for the negotiated representation of the form: the schema,
+            whether the payload carries it (see `get_form_payload`), and the
+            renderer and media type (e.g. `indent`) it is encoded with.
+        """
+        if self.is_schema_data_only():
+            shape = 'data'
+        else:
+            client_schema_hash = self.get_client_schema_hash()
+            if client_schema_hash == schema_hash:
+                shape = 'data'
+            elif client_schema_hash is None:
+                shape = 'schema'
+            else:
+                shape = 'schema+hash'
+        renderer_class = type(self.request.accepted_renderer)
+        parts = (
+            schema_hash,
+            shape,
+            f'{renderer_class.__module__}.{renderer_class.__qualname__}',
+            self.request.accepted_media_type or '',
+        )
+        return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
     @action(detail=False, methods=('get',), url_path='create')
     def create_form(self, request, *args, **kwargs):
-        return Response({})
+        etag = quote_etag(self.get_form_etag(self.get_schema_hash()))
+        if self._etag_matches(etag, request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({})
+        response['ETag'] = etag
+        if self.create_form_cache_control:
+            patch_cache_control(response, **self.create_form_cache_control)
+        if self.create_form_vary_headers:
+            patch_vary_headers(response, self.create_form_vary_headers)
+        return response
+
+    @action(
+        detail=False,
+        methods=('get',),
+        url_path=r'schema/(?P<schema_hash>[0-9a-f]{64})',
+    )
+    def schema_by_hash(self, request, *args, **kwargs):
+        schema_hash = kwargs['schema_hash']
+        schema = schema_cache.get(get_schema_hash_key(schema_hash))
+        if schema is None and get_shared_cache() is not None:
+            schema = get_shared_cache().get(get_shared_schema_hash_key(schema_hash))
+            if schema is not None:
+                schema_cache.set(get_schema_hash_key(schema_hash), schema)
+        if schema is None:
+            raise NotFound()
+        response = Response({'serializer': schema, 'schemaHash': schema_hash})
+        if self.schema_by_hash_cache_control:
+            patch_cache_control(response, **self.schema_by_hash_cache_control)
+        return response
+
+    def _is_cache_enabled(self, serializer_class: type) -> bool:
+        """
+        Whether output of this request may be cached by serializer class,
+            i.e. the request has no schema variant.
+        """
+        return (
+            is_cache_enabled(serializer_class)
+            and getattr(self, 'schema_variant', None) is None
+        )
+
+    def _get_form_field(self, path: str) -> Optional[serializers.Field]:
+        """
+        The writable field at the data index `path`, `None` when there is none.
+        """
+        field = self.get_serializer()
+        for name in path.split('.') if path else ():
+            if isinstance(field, serializers.ListSerializer):
+                field = field.child
+            if not isinstance(field, serializers.BaseSerializer):
+                return None
+            field = field.fields.get(name)
+            if field is None or field.read_only:
+                return None
+        return field
+
+    def get_sub_schema_serializer(self, prefix: str) -> serializers.BaseSerializer:
+        """
+        The nested serializer at `prefix`, a data index as found in the
+            `subSchema` of a lazily referenced serializer.
+        """
+        serializer = self._get_form_field(prefix)
+        if not isinstance(serializer, serializers.BaseSerializer):
+            raise NotFound()
+        return serializer
+
+    @action(detail=False, methods=('get',), url_path='sub-schema')
+    def sub_schema(self, request, *args, **kwargs):
+        prefix = request.query_params.get(self.sub_schema_query_param, '')
+        serializer = self.get_sub_schema_serializer(prefix)
+
+        serializer_class = self.get_serializer_class()
+        cached = self._is_cache_enabled(serializer_class)
+
+        def build():
+            schema, ui_schema = FormSchemaProcessor(
+                serializer,
+                self.get_renderer_context(),
+                prefix=prefix,
+                cache_plans=cached,
+            ).get_schemas()
+            return {'schema': schema, 'uiSchema': ui_schema}
+
+        if cached:
+            # Fields declared once (e.g. in a self-referential tree) are
+            # reachable from any number of prefixes; they are cached once,
+            # by declaring class and name, and moved to the requested prefix.
+            cached_prefix, sub_schema = schema_cache.get_or_build(
+                (
+                    *get_cache_key(serializer_class, self.action),
+                    type(serializer.parent),
+                    serializer.field_name,
+                ),
+                lambda: (prefix, resolve_translations(build())),
+            )
+            if cached_prefix != prefix:
+                sub_schema = _replace_prefix(sub_schema, cached_prefix, prefix)
+        else:
+            sub_schema = build()
+        return Response({'serializer': sub_schema, 'prefix': prefix})
+
+    def get_enum_field(self, path: str) -> serializers.Field:
+        """
+        The remote enum field at `path`, a data index as found in the
+            `enumSource` of its schema.
+        """
+        field = self._get_form_field(path)
+        if isinstance(field, serializers.ListField):
+            field = field.child
+        if field is None or not is_remote_enum(field):
+            raise NotFound()
+        return field
+
+    def get_enum_choices(self, path: str) -> List[Tuple[Any, str]]:
+        """
+        The `(value, label)` pairs of the remote enum at `path`. Static
+            `ChoiceField` choices are cached; `enum_choices` pages related
+            fields through `get_enum_queryset` instead.
+        """
+        field = self.get_enum_field(path)
+
+        def build():
+            return [(value, str(label)) for value, label in field.choices.items()]
+
+        serializer_class = self.get_serializer_class()
+        if isinstance(field, serializers.ChoiceField) and self._is_cache_enabled(
+            serializer_class
+        ):
+            return schema_cache.get_or_build(
+                (*get_cache_key(serializer_class, 'enum_choices'), path), build
+            )
+        return build()
+
+    def _get_enum_pk(self, relation: relations.RelatedField, value: str) -> Any:
+        try:
+            if isinstance(relation, relations.PrimaryKeyRelatedField):
+                return relation.get_queryset().model._meta.pk.to_python(value)
+            return relation.to_internal_value(value).pk
+        except (ValidationError, DjangoValidationError):
+            return None
+
+    def get_enum_queryset(
+        self, field: serializers.Field, values: List[str], search: str
+    ) -> QuerySet:
+        """
+        The queryset of the related remote enum `field`, filtered in the
+            database by exact `values` or by a case-insensitive `search` of the
+            `schema:enum:search` lookups (default: the value field).
+        """
+        relation = getattr(field, 'child_relation', field)
+        queryset = relation.get_queryset()
+        if not queryset.ordered:
+            queryset = queryset.order_by('pk')
+        lookup = getattr(relation, 'slug_field', None)
+        if values:
+            if lookup is None:
+                lookup, values = 'pk', [self._get_enum_pk(relation, v) for v in values]
+            return queryset.filter(**{f'{lookup}__in': values})
+        if search:
+            search_fields = field.style.get(REMOTE_ENUM_SEARCH_KEY) or (
+                lookup or getattr(relation, 'lookup_field', 'pk'),
+            )
+            query = Q()
+            for search_field in search_fields:
+                query |= Q(**{f'{search_field}__icontains': search})
+            queryset = queryset.filter(query)
+        return queryset
+
+    def _get_positive_int(self, name: str, default: int) -> int:
+        value = self.request.query_params.get(name)
+        if value is None:
+            return default
+        try:
+            value = int(value)
+        except ValueError:
+            value = 0
+        if value < 1:
+            raise ValidationError({name: 'A positive integer is required.'})
+        return value
+
+    @action(detail=False, methods=('get',), url_path='choices')
+    def enum_choices(self, request, *args, **kwargs):
+        """
+        A page of the choices of a remote enum field, filtered by a
+            case-insensitive `search` or by exact `value`s (e.g. to label the
+            current form data). `ChoiceField` choices are searched by label
+            and value in memory; related fields are filtered, counted and
+            sliced in the database.
+        """
+        path = request.query_params.get('field', '')
+        field = self.get_enum_field(path)
+        values = request.query_params.getlist('value')
+        search = request.query_params.get('search', '')
+        page = self._get_positive_int('page', 1)
+        page_size = min(
+            self._get_positive_int('page_size', self.enum_page_size),
+            self.enum_max_page_size,
+        )
+        start = (page - 1) * page_size
+        relation = getattr(field, 'child_relation', field)
+        if isinstance(relation, relations.RelatedField):
+            queryset = self.get_enum_queryset(field, values, search)
+            count = queryset.count()
+            choices_page = [
+                (relation.to_representation(item), str(relation.display_value(item)))
+                for item in queryset[start : start + page_size]
+            ]
+        else:
+            choices = self.get_enum_choices(path)
+            search = search.casefold()
+            if values:
+                values = set(values)
+                choices = [choice for choice in choices if str(choice[0]) in values]
+            elif search:
+                choices = [
+                    choice
+                    for choice in choices
+                    if search in choice[1].casefold()
+                    or search in str(choice[0]).casefold()
+                ]
+            count = len(choices)
+            choices_page = choices[start : start + page_size]
+        return Response(
+            {
+                'field': path,
+                'count': count,
+                'page': page,
+                'pageSize': page_size,
+                'enum': [value for value, _ in choices_page],
+                'enumNames': [label for _, label in choices_page],
+            }
+        )
+
+
+class StreamingListModelMixin(ListModelMixin):
+    """
+    Streams unpaginated `list` responses of a `FormSchemaViewSetMixin`: the
+        column schema is written first, then `formData` rows are serialized
+        and written in chunks from `queryset.iterator()`, keeping peak memory
+        flat regardless of row count.
+    """
+
+    stream_list_format = 'json'  # or 'ndjson'
+    stream_list_chunk_size = 1000
+
+    def _iter_chunks(self, queryset: Iterable) -> Iterator[List[Any]]:
+        if isinstance(queryset, QuerySet):
+            rows = queryset.iterator(chunk_size=self.stream_list_chunk_size)
+        else:
+            rows = iter(queryset)
+        while True:
+            chunk = list(islice(rows, self.stream_list_chunk_size))
+            if not chunk:
+                return
+            yield self.get_serializer(chunk, many=True).data
+
+    def list(self, request, *args, **kwargs):
+        renderer = getattr(request, 'accepted_renderer', None)
+        if self.paginator is not None or not isinstance(
+            renderer, JSONSerializerRenderer
+        ):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        ndjson = self.stream_list_format == 'ndjson'
+        # Negotiated like any other response, rows aside.
+        payload = self.get_form_payload(None)
+        renderer_context = self.get_renderer_context()
+        response = StreamingHttpResponse(
+            renderer.stream(
+                payload.get('serializer'),
+                self._iter_chunks(queryset),
+                renderer_context,
+                ndjson=ndjson,
+                schema_hash=payload.get('schemaHash'),
+                send_serializer='serializer' in payload,
+            ),
+            content_type='application/x-ndjson' if ndjson else renderer.media_type,
+        )
+        # `render` never runs for a streamed body, and the rows are only
+        # serialized once the response is iterated: report what is known now.
+        timings = getattr(self, 'timings', None)
+        if timings is not None:
+            timings.stop('form_data')
+            renderer.report_timings(timings, {**renderer_context, 'response': response})
+        return response
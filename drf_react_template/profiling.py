@@ -0,0 +1,103 @@
+import os
+import sys
+from collections import Counter
+from time import perf_counter_ns
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+from drf_react_template.mixins import FormSchemaViewSetMixin
+from drf_react_template.renderers import JSONSerializerRenderer
+from drf_react_template.warmup import build_view
+
+
+def get_schema_target(
+    path: str, action: str = 'retrieve'
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    The serializer and renderer context whose schema `path` produces for
+        `action`. `path` is the dotted path of a `FormSchemaViewSetMixin`
+        subclass or of a serializer class.
+    """
+    target = import_string(path)
+    if isinstance(target, type) and issubclass(target, FormSchemaViewSetMixin):
+        view = build_view(target, action)
+        return view.get_serializer(), view.get_renderer_context()
+    if isinstance(target, type) and issubclass(target, serializers.BaseSerializer):
+        return target(), {'view': SimpleNamespace(action=action)}
+    raise TypeError(
+        f'{path} is neither a FormSchemaViewSetMixin nor a serializer class'
+    )
+
+
+def get_schema_runner(path: str, action: str = 'retrieve') -> Callable[[], bytes]:
+    """
+    A callable that builds and encodes the schema of `path` once. Run it with
+        the schema cache disabled to profile the full build every time.
+    """
+    serializer, renderer_context = get_schema_target(path, action)
+    renderer = JSONSerializerRenderer()
+
+    def run() -> bytes:
+        return renderer.get_serializer_bytes(
+            serializer, renderer_context=renderer_context
+        )
+
+    return run
+
+
+def _get_frame_name(frame, event: str, arg: Any) -> str:
+    if event.startswith('c_'):
+        module = getattr(arg, '__module__', None) or 'builtins'
+        return f'{module}:{getattr(arg, "__qualname__", arg.__name__)}'
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f'{module}:{getattr(code, "co_qualname", code.co_name)}'
+
+
+class CollapsedStackProfiler:
+    """
+    A deterministic `sys.setprofile` profiler recording the self time of every
+        call stack, written in the collapsed format read by flamegraph tools
+        (`flamegraph.pl`, speedscope, inferno): `frame;frame;frame <weight>`
+        where the weight is in microseconds.
+    """
+
+    def __init__(self):
+        self.stacks: Counter = Counter()
+        self._stack: List[str] = []
+        self._last = 0
+
+    def _profile(self, frame, event: str, arg: Any):
+        now = perf_counter_ns()
+        if self._stack:
+            self.stacks[tuple(self._stack)] += now - self._last
+        if event in ('call', 'c_call'):
+            self._stack.append(_get_frame_name(frame, event, arg))
+        elif self._stack:
+            self._stack.pop()
+        self._last = perf_counter_ns()
+
+    def run(self, func: Callable[[], Any], iterations: int = 1):
+        self._last = perf_counter_ns()
+        sys.setprofile(self._profile)
+        try:
+            for _i in range(iterations):
+                func()
+        finally:
+            sys.setprofile(None)
+            self._stack = []
+
+    def iter_collapsed(self) -> Iterable[str]:
+        for stack, nanoseconds in sorted(self.stacks.items()):
+            microseconds = nanoseconds // 1000
+            if microseconds:
+                yield f'{";".join(stack)} {microseconds}'
+
+    def write(self, stream, limit: Optional[int] = None):
+        for i, line in enumerate(self.iter_collapsed()):
+            if limit is not None and i >= limit:
+                break
+            stream.write(line + '\n')
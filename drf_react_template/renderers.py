@@ -1,4 +1,4 @@
-import json
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
 
 from rest_framework.renderers import (
     INDENT_SEPARATORS,
@@ -7,35 +7,365 @@ from rest_framework.renderers import (
     JSONRenderer,
 )
 
-from drf_react_template.schema_form_encoder import SerializerEncoder
+from drf_react_template.backends import (
+    BaseJSONBackend,
+    get_json_backend,
+    stdlib_json_backend,
+)
+from drf_react_template.cache import (
+    get_shared_cache,
+    schema_cache,
+    schema_variant_cache,
+)
+from drf_react_template.instrumentation import (
+    SERVER_TIMING_HEADER,
+    Timings,
+    form_schema_timings,
+    get_timings,
+    measure,
+)
+from drf_react_template.schema_form_encoder import (
+    FormSerializerType,
+    SerializerEncoder,
+    is_form_serializer,
+)
+
+LINE_SEPARATOR = '\u2028'.encode('utf-8')
+PARAGRAPH_SEPARATOR = '\u2029'.encode('utf-8')
 
 
 class JSONSerializerRenderer(JSONRenderer):
     encoder_class = SerializerEncoder
+    json_backend: Optional[str] = None
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
         """
         Render `data` into JSON, returning a bytestring.
             Include renderer_context in JsonEncoder
         """
+        renderer_context = renderer_context or {}
+        timings = get_timings(renderer_context)
         if data is None:
-            return bytes()
+            ret = bytes()
+        else:
+            with measure(timings, 'encode'):
+                ret = self._render(data, accepted_media_type, renderer_context)
+        if timings is not None:
+            timings.set_size('payload', len(ret))
+            self.report_timings(timings, renderer_context)
+        return ret
+
+    def _render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str],
+        renderer_context: Dict[str, Any],
+    ) -> bytes:
+        indent, separators = self._get_encoding_options(
+            accepted_media_type, renderer_context
+        )
+        if self._is_serializer_payload(data):
+            return self._render_serializer_payload(
+                data, indent, separators, renderer_context
+            )
+        return self._dumps(data, indent, separators, renderer_context)
+
+    @staticmethod
+    def report_timings(timings: Timings, renderer_context: Dict[str, Any]):
+        """
+        Add the `Server-Timing` header when enabled and send the
+            `form_schema_timings` signal.
+        """
+        response = renderer_context.get('response')
+        if timings.server_timing and response is not None:
+            response[SERVER_TIMING_HEADER] = timings.get_server_timing()
+        view = renderer_context.get('view')
+        form_schema_timings.send(
+            sender=type(view),
+            view=view,
+            request=renderer_context.get('request'),
+            timings=timings,
+        )
 
+    def get_serializer_bytes(
+        self,
+        serializer: FormSerializerType,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Dict[str, Any]] = None,
+    ) -> Union[bytes, memoryview]:
+        """
+        The encoded schema fragment for `serializer`, as spliced into `render`.
+        """
         renderer_context = renderer_context or {}
-        indent = self.get_indent(accepted_media_type, renderer_context)
+        indent, separators = self._get_encoding_options(
+            accepted_media_type, renderer_context
+        )
+        return self._get_serializer_bytes(
+            serializer,
+            indent,
+            separators,
+            renderer_context,
+            self._get_newline_indent(indent),
+        )
 
+    def stream(
+        self,
+        serializer: Optional[FormSerializerType],
+        chunks: Iterable[List[Any]],
+        renderer_context: Optional[Dict[str, Any]] = None,
+        ndjson: bool = False,
+        schema_hash: Optional[str] = None,
+        send_serializer: Optional[bool] = None,
+    ) -> Iterator[bytes]:
+        """
+        Yield the payload for `serializer` and `formData` rows encoded chunk by
+            chunk, so only one chunk of rows is held in memory at a time.
+            Streams are never indented. With `ndjson` the serializer object and
+            each row are written as separate lines. With `schema_hash` the
+            `schemaHash` is written too, in place of the serializer object
+            unless `send_serializer` (see `get_form_payload`). The serializer
+            object is encoded before this returns.
+        """
+        renderer_context = renderer_context or {}
+        if send_serializer is None:
+            send_serializer = schema_hash is None
+        separators = SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+        key_separator = separators[1].encode('utf-8')
+        head: Tuple[Union[bytes, memoryview], ...] = ()
+        if send_serializer:
+            head = (
+                b'"serializer"',
+                key_separator,
+                self._get_serializer_bytes(
+                    serializer, None, separators, renderer_context, b''
+                ),
+            )
+        tail: Tuple[bytes, ...] = ()
+        if schema_hash is not None:
+            tail = (
+                b'"schemaHash"',
+                key_separator,
+                self._dumps(schema_hash, None, separators, renderer_context),
+            )
+        if ndjson:
+            return self._iter_ndjson(head, tail, chunks, separators, renderer_context)
+        return self._iter_json(head, tail, chunks, separators, renderer_context)
+
+    def _iter_ndjson(
+        self,
+        head: Tuple[Union[bytes, memoryview], ...],
+        tail: Tuple[bytes, ...],
+        chunks: Iterable[List[Any]],
+        separators: Tuple[str, str],
+        renderer_context: Dict[str, Any],
+    ) -> Iterator[bytes]:
+        item_separator = separators[0].encode('utf-8')
+        if head and tail:
+            head = (*head, item_separator)
+        yield b''.join((b'{', *head, *tail, b'}\n'))
+        for chunk in chunks:
+            for row in chunk:
+                yield self._dumps(row, None, separators, renderer_context) + b'\n'
+
+    def _iter_json(
+        self,
+        head: Tuple[Union[bytes, memoryview], ...],
+        tail: Tuple[bytes, ...],
+        chunks: Iterable[List[Any]],
+        separators: Tuple[str, str],
+        renderer_context: Dict[str, Any],
+    ) -> Iterator[bytes]:
+        item_separator, key_separator = (s.encode('utf-8') for s in separators)
+        # Keys in the order of `get_form_payload`, as `render` writes them.
+        if head:
+            head = (*head, item_separator)
+        yield b''.join((b'{', *head, b'"formData"', key_separator, b'['))
+        first = True
+        for chunk in chunks:
+            if not chunk:
+                continue
+            encoded = self._dumps(chunk, None, separators, renderer_context)
+            yield encoded[1:-1] if first else item_separator + encoded[1:-1]
+            first = False
+        if tail:
+            yield b''.join((b']', item_separator, *tail, b'}'))
+        else:
+            yield b']}'
+
+    def get_encoding_options(
+        self,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Hashable, ...]:
+        """
+        Everything the encoded schema bytes depend on besides the schema.
+        """
+        indent, separators = self._get_encoding_options(
+            accepted_media_type, renderer_context or {}
+        )
+        return indent, separators, self.ensure_ascii, self.strict
+
+    def _get_encoding_options(
+        self, accepted_media_type: Optional[str], renderer_context: Dict[str, Any]
+    ) -> Tuple[Optional[Union[int, str]], Tuple[str, str]]:
+        indent = self.get_indent(accepted_media_type, renderer_context)
         if indent is None:
             separators = SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
         else:
             separators = INDENT_SEPARATORS
-        ret = json.dumps(
+        return indent, separators
+
+    @staticmethod
+    def _get_newline_indent(indent: Optional[Union[int, str]]) -> bytes:
+        if indent is None:
+            return b''
+        indent_str = ' ' * indent if isinstance(indent, int) else indent
+        return ('\n' + indent_str).encode('utf-8')
+
+    @staticmethod
+    def _is_serializer_payload(data: Any) -> bool:
+        return (
+            isinstance(data, dict)
+            and all(isinstance(key, str) for key in data)
+            and any(is_form_serializer(v) for v in data.values())
+        )
+
+    def get_json_backend(
+        self,
+        indent: Optional[Union[int, str]],
+        separators: Tuple[str, str],
+    ) -> BaseJSONBackend:
+        backend = get_json_backend(self.json_backend)
+        if backend.supports(indent, separators, self.ensure_ascii, not self.strict):
+            return backend
+        return stdlib_json_backend
+
+    def _dumps(
+        self,
+        data: Any,
+        indent: Optional[Union[int, str]],
+        separators: Tuple[str, str],
+        renderer_context: Dict[str, Any],
+    ) -> bytes:
+        ret = self.get_json_backend(indent, separators).dumps(
             data,
-            cls=self.encoder_class,
-            indent=indent,
-            ensure_ascii=self.ensure_ascii,
-            allow_nan=not self.strict,
-            separators=separators,
-            renderer_context=renderer_context,
+            self.encoder_class,
+            renderer_context,
+            indent,
+            separators,
+            self.ensure_ascii,
+            not self.strict,
         )
-        ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
-        return bytes(ret.encode('utf-8'))
+        if not self.ensure_ascii:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(
+                PARAGRAPH_SEPARATOR, b'\\u2029'
+            )
+        return ret
+
+    def _dumps_member(
+        self,
+        value: Any,
+        indent: Optional[Union[int, str]],
+        separators: Tuple[str, str],
+        renderer_context: Dict[str, Any],
+        newline_indent: bytes,
+    ) -> bytes:
+        """
+        Encode `value` as it appears one level inside the top-level object.
+        """
+        ret = self._dumps(value, indent, separators, renderer_context)
+        if indent is not None:
+            # JSON strings never contain a raw newline, so every newline is
+            # structural and simply gains one more level of indentation.
+            ret = ret.replace(b'\n', newline_indent)
+        return ret
+
+    def _get_serializer_bytes(
+        self,
+        serializer: FormSerializerType,
+        indent: Optional[Union[int, str]],
+        separators: Tuple[str, str],
+        renderer_context: Dict[str, Any],
+        newline_indent: bytes,
+    ) -> Union[bytes, memoryview]:
+        built = False
+        encoding_options = (indent, separators, self.ensure_ascii, self.strict)
+        encoder = self.encoder_class(renderer_context=renderer_context)
+        timings = get_timings(renderer_context)
+
+        def build():
+            nonlocal built
+            built = True
+            shared_cache_key = encoder.get_shared_cache_key(
+                serializer, *encoding_options
+            )
+            if shared_cache_key is None:
+                return self._dumps_member(
+                    serializer, indent, separators, renderer_context, newline_indent
+                )
+            shared_cache = get_shared_cache()
+            ret = shared_cache.get(shared_cache_key)
+            if timings is not None:
+                timings.set_cache('shared_schema_bytes', ret is not None)
+            if ret is None:
+                ret = self._dumps_member(
+                    serializer, indent, separators, renderer_context, newline_indent
+                )
+                shared_cache.set(shared_cache_key, ret)
+            return ret
+
+        cache_key = encoder.get_static_cache_key(serializer)
+        variant_cache_key = encoder.get_variant_cache_key(serializer)
+        stored = encoder.get_stored_schema(serializer, *encoding_options)
+        if stored is not None:
+            ret = stored
+        elif cache_key is not None:
+            ret = schema_cache.get_or_build((*cache_key, *encoding_options), build)
+        elif variant_cache_key is not None:
+            ret = schema_variant_cache.get_or_build(
+                (*variant_cache_key, *encoding_options), build
+            )
+        else:
+            ret = build()
+        if timings is not None:
+            timings.set_cache('schema_bytes', not built)
+            timings.set_size('schema', len(ret))
+        return ret
+
+    def _render_serializer_payload(
+        self,
+        data: Dict[str, Any],
+        indent: Optional[Union[int, str]],
+        separators: Tuple[str, str],
+        renderer_context: Dict[str, Any],
+    ) -> bytes:
+        """
+        Join pre-encoded serializer schema bytes with the freshly encoded
+            remaining members, producing the same bytes as `json.dumps` on
+            the whole payload.
+        """
+        item_separator, key_separator = (s.encode('utf-8') for s in separators)
+        newline_indent = self._get_newline_indent(indent)
+        item_separator += newline_indent
+
+        chunks: List[bytes] = [b'{', newline_indent]
+        for i, (key, value) in enumerate(data.items()):
+            if i:
+                chunks.append(item_separator)
+            chunks.append(self._dumps(key, None, separators, renderer_context))
+            chunks.append(key_separator)
+            if is_form_serializer(value):
+                chunks.append(
+                    self._get_serializer_bytes(
+                        value, indent, separators, renderer_context, newline_indent
+                    )
+                )
+            else:
+                chunks.append(
+                    self._dumps_member(
+                        value, indent, separators, renderer_context, newline_indent
+                    )
+                )
+        chunks.append(b'' if indent is None else b'\n')
+        chunks.append(b'}')
+        return b''.join(chunks)
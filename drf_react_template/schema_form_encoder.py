@@ -1,12 +1,49 @@
+import hashlib
+import json
 import re
-from typing import Any, Dict, List, Tuple, Union
+import threading
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from django.conf import settings
 from django.core import validators
 from django.core.serializers.json import DjangoJSONEncoder
-from rest_framework import fields, serializers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from django.utils.translation import get_language
+from rest_framework import fields, relations, serializers
 from rest_framework import validators as drf_validators
 
+from drf_react_template.cache import (
+    get_cache_key,
+    get_dynamic_fields,
+    get_schema_hash_key,
+    get_schema_variant,
+    get_shared_cache,
+    get_shared_cache_key,
+    get_shared_schema_hash_key,
+    is_cache_enabled,
+    schema_cache,
+    schema_variant_cache,
+)
+from drf_react_template.instrumentation import get_timings, measure
+from drf_react_template.store import get_schema_store, get_store_key
+
 SerializerType = Union[
     serializers.BaseSerializer,
     serializers.Serializer,
@@ -34,6 +71,14 @@ DEPENDENCY_KEYS = {
     DEPENDENCY_OVERRIDE_KEY,
 }
 
+REMOTE_ENUM_KEY = 'schema:enum:remote'
+REMOTE_ENUM_SEARCH_KEY = 'schema:enum:search'
+REMOTE_ENUM_FIELDS = (
+    fields.ChoiceField,
+    relations.RelatedField,
+    relations.ManyRelatedField,
+)
+
 STYLE_KEYS_TO_IGNORE = {
     *OVERRIDE_KEYS,
     *DEPENDENCY_KEYS,
@@ -52,6 +97,194 @@ EXCLUDED_VALIDATOR_CLASSES = [
     drf_validators.ProhibitSurrogateCharactersValidator,
 ]
 
+FIELD_PLAN_CACHE_KEY = 'field-plan'
+
+
+class FieldPlan(NamedTuple):
+    """
+    Per-field metadata resolved once per serializer class: types, widgets,
+        validation keywords, overrides and dependencies. Instance specific
+        values (defaults, choices, `allow_null`) are still read from the field.
+    """
+
+    field_class: type
+    type: Any
+    enum: Any
+    remote_enum: bool
+    widget: Optional[str]
+    ui_widget: Optional[str]
+    title: str
+    help_text: Optional[str]
+    is_serializer: bool
+    is_list_serializer: bool
+    is_list_field: bool
+    validation: Tuple[Tuple[str, Any], ...]
+    custom_validators: Tuple[Dict[str, Any], ...]
+    schema_override: Optional[Dict[str, Any]]
+    ui_override: Optional[Dict[str, Any]]
+    column_override: Optional[Dict[str, Any]]
+    dependencies: Tuple[Tuple[str, Any], ...]
+    sort: Optional[str]
+    ui_style: Dict[str, Any]
+    child: Optional['FieldPlan']
+
+
+def is_remote_enum(field: SerializerType) -> bool:
+    """
+    Whether the choices of `field` are served by the `enum_choices` action
+        rather than inlined: a choice or related field opted in (or out) with
+        the `schema:enum:remote` style key, or a `ChoiceField` with more
+        choices than `DRF_REACT_TEMPLATE_REMOTE_ENUM_THRESHOLD`.
+    """
+    if not isinstance(field, REMOTE_ENUM_FIELDS):
+        return False
+    remote = field.style.get(REMOTE_ENUM_KEY)
+    if remote is not None:
+        return bool(remote)
+    if not isinstance(field, fields.ChoiceField):
+        return False
+    threshold = getattr(settings, 'DRF_REACT_TEMPLATE_REMOTE_ENUM_THRESHOLD', None)
+    return threshold is not None and len(field.choices) > threshold
+
+
+def resolve_translations(value: Any) -> Any:
+    """
+    A copy of a schema with lazy translations (labels, help texts, choice
+        names, validator messages) resolved in the active language, so that
+        cached schemas are not translated again every time they are encoded.
+    """
+    if isinstance(value, Promise):
+        return force_str(value)
+    if isinstance(value, dict):
+        return {
+            resolve_translations(k): resolve_translations(v) for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [resolve_translations(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(resolve_translations(v) for v in value)
+    return value
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, Mapping):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class TypeRegistry:
+    """
+    Read-only field type map, resolved once from a processor `TYPE_MAP`,
+        `DRF_REACT_TEMPLATE_TYPE_MAP` and any `extra_types`. Lookups follow the
+        field class MRO, so subclasses inherit the closest mapped type, and are
+        cached per field class.
+    """
+
+    def __init__(self, type_map: Mapping[str, Mapping[str, Any]]):
+        self.type_map = MappingProxyType(
+            {name: MappingProxyType(dict(value)) for name, value in type_map.items()}
+        )
+        self._lookups: Dict[type, Mapping[str, Any]] = {}
+
+    def lookup(self, field_class: type) -> Mapping[str, Any]:
+        try:
+            return self._lookups[field_class]
+        except KeyError:
+            pass
+        result = EMPTY_TYPE
+        for cls in field_class.__mro__:
+            entry = self.type_map.get(cls.__name__)
+            if entry is not None:
+                result = entry
+                break
+        # Concurrent lookups of the same class store equal values.
+        self._lookups[field_class] = result
+        return result
+
+
+EMPTY_TYPE: Mapping[str, Any] = MappingProxyType({})
+_type_registries: Dict[Hashable, TypeRegistry] = {}
+_type_registries_lock = threading.Lock()
+
+
+def get_type_registry(
+    type_map: Mapping[str, Mapping[str, Any]],
+    extra_types: Optional[Mapping[str, Mapping[str, Any]]] = None,
+) -> TypeRegistry:
+    key = (id(type_map), _freeze(extra_types) if extra_types else ())
+    registry = _type_registries.get(key)
+    if registry is None:
+        with _type_registries_lock:
+            registry = _type_registries.get(key)
+            if registry is None:
+                registry = TypeRegistry(
+                    {
+                        **type_map,
+                        **getattr(settings, 'DRF_REACT_TEMPLATE_TYPE_MAP', {}),
+                        **(extra_types or {}),
+                    }
+                )
+                _type_registries[key] = registry
+    return registry
+
+
+@receiver(setting_changed)
+def clear_type_registries(setting: str, **kwargs):
+    if setting == 'DRF_REACT_TEMPLATE_TYPE_MAP':
+        with _type_registries_lock:
+            _type_registries.clear()
+
+
+class SchemaDefinitions:
+    """
+    The distinct nested serializers of one schema, each emitted once under
+        `definitions` and referenced with `$ref`. Definitions are named after
+        the serializer class, suffixed with a counter when two classes share
+        a name. uiSchema has no `$ref`, so nested uiSchema properties are only
+        built once per class and shared between their occurrences. Classes
+        whose output depends on the prefix of the occurrence (`subSchema`,
+        `enumSource`) are not shared but inlined at every occurrence.
+    """
+
+    def __init__(self):
+        self.schemas: Dict[str, Dict[str, Any]] = {}
+        self.ui_properties: Dict[type, Dict[str, Any]] = {}
+        self.prefixed: Set[type] = set()
+        self._names: Dict[type, str] = {}
+
+    @staticmethod
+    def get_ref(name: str) -> str:
+        return f'#/definitions/{name}'
+
+    def add_schema(
+        self, serializer_class: type, build: Callable[[], Dict[str, Any]]
+    ) -> str:
+        name = self._names.get(serializer_class)
+        if name is None:
+            name = base_name = serializer_class.__name__
+            count = 1
+            while name in self.schemas:
+                count += 1
+                name = f'{base_name}{count}'
+            self._names[serializer_class] = name
+            # Reserve the name so outer definitions precede nested ones.
+            self.schemas[name] = {}
+            self.schemas[name] = build()
+        return name
+
+    def remove_schema(self, serializer_class: type) -> Dict[str, Any]:
+        """
+        Drops the definition of `serializer_class`, which turned out to depend
+            on the prefix of its occurrence, and returns its schema.
+        """
+        self.prefixed.add(serializer_class)
+        return self.schemas.pop(self._names.pop(serializer_class))
+
+
+DefinitionsType = Union[bool, SchemaDefinitions, None]
+
 
 class ProcessingMixin:
     TYPE_MAP: Dict[str, Dict[str, str]] = {
@@ -64,6 +297,11 @@ class ProcessingMixin:
         'DateField': {'type': 'string', 'widget': 'date'},
         'URLField': {'type': 'string', 'widget': 'uri'},
         'ChoiceField': {'type': 'string', 'enum': 'choices'},
+        'MultipleChoiceField': {
+            'type': 'array',
+            'enum': 'choices',
+            'widget': 'checkbox',
+        },
         'EmailField': {'type': 'string', 'widget': 'email'},
         'RegexField': {'type': 'string', 'widget': 'regex'},
         'ImageField': {'type': 'file', 'widget': 'file'},
@@ -75,18 +313,42 @@ class ProcessingMixin:
         serializer: SerializerType,
         renderer_context: Dict[str, Any],
         prefix: str = '',
-        extra_types: Dict[str, Any] = {},
+        extra_types: Optional[Dict[str, Any]] = None,
+        definitions: DefinitionsType = None,
+        ancestors: Tuple[type, ...] = (),
+        max_depth: Optional[int] = None,
+        only: Optional[Collection[str]] = None,
+        cache_plans: bool = False,
     ):
         self.serializer = serializer
         if self._is_list_serializer(serializer):
             self.fields = self._filter_fields(serializer.child.fields.items())
         else:
             self.fields = self._filter_fields(serializer.fields.items())
+        self.dynamic_fields = get_dynamic_fields(self._get_definition_class())
         self.renderer_context = renderer_context
         self.prefix = prefix
+        # Whether the output holds data indexes, see `SchemaDefinitions`.
+        self.prefix_dependent = False
         self.extra_types = extra_types
-        self.extra_types.update(getattr(settings, 'DRF_REACT_TEMPLATE_TYPE_MAP', {}))
-        self.TYPE_MAP.update(self.extra_types)
+        self.type_registry = get_type_registry(self.TYPE_MAP, extra_types)
+        self.cache_plans = cache_plans
+        self.plans = self._get_field_plans()
+        if only is not None:
+            # After compiling the plans, which are cached for all fields.
+            self.fields = tuple((name, f) for name, f in self.fields if name in only)
+        if definitions is None:
+            definitions = getattr(
+                settings, 'DRF_REACT_TEMPLATE_SCHEMA_DEFINITIONS', False
+            )
+        self.ancestors = ancestors
+        if max_depth is None and not ancestors:
+            max_depth = getattr(settings, 'DRF_REACT_TEMPLATE_MAX_DEPTH', None)
+        self.max_depth = max_depth
+        self.owns_definitions = not isinstance(definitions, SchemaDefinitions)
+        if definitions is True:
+            definitions = SchemaDefinitions()
+        self.definitions: Optional[SchemaDefinitions] = definitions or None
 
     def _get_type_map_value(self, field: SerializerType):
         result = {
@@ -94,12 +356,183 @@ class ProcessingMixin:
             'enum': field.style.get('schema:enum'),
             'widget': field.style.get('ui:widget'),
         }
-        result_default = self.TYPE_MAP.get(type(field).__name__, {})
+        result_default = self.type_registry.lookup(type(field))
         for k, v in result_default.items():
             if not result[k]:
                 result[k] = result_default[k]
         return result
 
+    @staticmethod
+    def _get_style_dict(field: SerializerType) -> Dict[str, Any]:
+        style_dict = {}
+        for k, v in field.style.items():
+            if not k.startswith("schema:") and k not in STYLE_KEYS_TO_IGNORE:
+                style_dict[k] = v
+        return style_dict
+
+    @staticmethod
+    def _get_validation_properties(
+        field: SerializerType,
+    ) -> Tuple[Tuple[str, Any], ...]:
+        result = []
+        for validator in field.validators:
+            for validator_class, attr_value in VALIDATION_MAP.items():
+                if isinstance(validator, validator_class):
+                    result_key, result_filter = attr_value
+                    result.append((result_key, result_filter(validator)))
+        return tuple(result)
+
+    @staticmethod
+    def _get_custom_validators(field: SerializerType) -> Tuple[Dict[str, Any], ...]:
+        excluded_validators = tuple(
+            EXCLUDED_VALIDATOR_CLASSES + list(VALIDATION_MAP.keys())
+        )
+        return tuple(
+            {
+                'code': getattr(v, 'code', v.__class__.__name__.lower()),
+                'message': getattr(v, 'message'),
+            }
+            for v in field.validators
+            if not isinstance(v, excluded_validators)
+        )
+
+    def _compile_field_plan(self, field: SerializerType, name: str) -> FieldPlan:
+        is_serializer = self._is_field_serializer(field)
+        is_list_field = isinstance(field, serializers.ListField)
+        type_map_obj = self._get_type_map_value(field)
+        child = None
+        ui_widget = type_map_obj.get('widget')
+        if is_list_field:
+            child = self._compile_field_plan(field.child, '')
+            ui_widget = child.widget
+            if not ui_widget and isinstance(field.child, serializers.ChoiceField):
+                ui_widget = 'checkbox'
+        style = field.style
+        return FieldPlan(
+            field_class=type(field),
+            type=type_map_obj['type'],
+            enum=type_map_obj.get('enum'),
+            remote_enum=is_remote_enum(field),
+            widget=type_map_obj.get('widget'),
+            ui_widget=ui_widget,
+            title=self._get_title(field, name),
+            help_text=field.help_text,
+            is_serializer=is_serializer,
+            is_list_serializer=self._is_list_serializer(field),
+            is_list_field=is_list_field,
+            validation=() if is_serializer else self._get_validation_properties(field),
+            custom_validators=(
+                () if is_serializer else self._get_custom_validators(field)
+            ),
+            schema_override=style.get(SCHEMA_OVERRIDE_KEY),
+            ui_override=style.get(UI_SCHEMA_OVERRIDE_KEY),
+            column_override=style.get(COLUMN_PROCESSOR_OVERRIDE_KEY),
+            dependencies=tuple(
+                (k, v) for k, v in style.items() if k in DEPENDENCY_KEYS
+            ),
+            sort=style.get('schema:sort'),
+            ui_style=self._get_style_dict(field),
+            child=child,
+        )
+
+    def _get_field_plans(self) -> Dict[str, FieldPlan]:
+        def build():
+            return {
+                name: self._compile_field_plan(field, name)
+                for name, field in self.fields
+            }
+
+        if self._is_list_serializer(self.serializer):
+            serializer_class = type(self.serializer.child)
+        else:
+            serializer_class = type(self.serializer)
+        if not self.cache_plans or not is_cache_enabled(serializer_class):
+            # Instances may be styled differently in `__init__`; only output
+            # that is itself cached per class shares plans per class.
+            return build()
+        return schema_cache.get_or_build(
+            (FIELD_PLAN_CACHE_KEY, serializer_class, self.type_registry), build
+        )
+
+    def _get_plan(self, field: SerializerType, name: str) -> FieldPlan:
+        plan = self.plans.get(name)
+        if (
+            plan is None
+            or plan.field_class is not type(field)
+            or name in self.dynamic_fields
+        ):
+            # The instance diverged from its class, e.g. fields added or
+            # styled in `__init__`; compile this field without caching it.
+            plan = self._compile_field_plan(field, name)
+        return plan
+
+    def _field_order(self) -> List[str]:
+        if self._is_list_serializer(self.serializer):
+            return list(self.serializer.child.Meta.fields)
+        return list(self.serializer.Meta.fields)
+
+    @staticmethod
+    def _set_custom_validators(
+        plan: FieldPlan, result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        if plan.custom_validators:
+            result['ui:custom-validators'] = [
+                dict(validator) for validator in plan.custom_validators
+            ]
+        return result
+
+    @staticmethod
+    def _get_ui_leaf_properties(plan: FieldPlan) -> Dict[str, Any]:
+        result = {}
+        if plan.ui_widget:
+            result['ui:widget'] = plan.ui_widget
+        if plan.help_text:
+            result['ui:help'] = plan.help_text
+        result.update(plan.ui_style)
+        return result
+
+    def _wrap_ui_schema(self, ui_properties: Dict[str, Any]) -> Dict[str, Any]:
+        ui_schema = {
+            **{'ui:order': self._field_order()},
+            **self._get_style_dict(self.serializer),
+            **ui_properties,
+        }
+        if self._is_list_serializer(self.serializer):
+            return {'items': ui_schema}
+        return ui_schema
+
+    def _get_definition_class(self) -> type:
+        if self._is_list_serializer(self.serializer):
+            return type(self.serializer.child)
+        return type(self.serializer)
+
+    def _get_nested_kwargs(self, name: str) -> Dict[str, Any]:
+        return {
+            'prefix': self._generate_data_index(name),
+            'extra_types': self.extra_types,
+            'definitions': self.definitions or False,
+            'ancestors': (*self.ancestors, self._get_definition_class()),
+            'max_depth': self.max_depth,
+            'cache_plans': self.cache_plans,
+        }
+
+    def _is_lazy_serializer(self, field: SerializerType) -> bool:
+        """
+        Nested serializers that repeat an ancestor (self-referential trees)
+            or sit deeper than `max_depth` are not expanded; they are
+            replaced by a reference the `sub_schema` action resolves.
+        """
+        depth = len(self.ancestors) + 1
+        if self.max_depth is not None and depth > self.max_depth:
+            return True
+        if self._is_list_serializer(field):
+            field_class = type(field.child)
+        else:
+            field_class = type(field)
+        return field_class is self._get_definition_class() or (
+            field_class in self.ancestors
+        )
+
     def _generate_data_index(self, name: str) -> str:
         return f'{self.prefix}.{name}' if self.prefix else name
 
@@ -124,23 +557,18 @@ class ProcessingMixin:
     def _is_hidden_serializer(self) -> bool:
         return all(
             [
-                self._get_type_map_value(field).get('widget') == 'hidden'
+                self._get_plan(field, name).widget == 'hidden'
                 for name, field in self.fields
             ]
         )
 
 
 class SchemaProcessor(ProcessingMixin):
-    def __init__(
-        self,
-        serializer: SerializerType,
-        renderer_context: Dict[str, Any],
-        prefix: str = '',
-        extra_types: Dict[str, Any] = {},
-    ):
-        super().__init__(serializer, renderer_context, prefix, extra_types)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.fields_to_be_removed = set()
         self.fields_to_be_kept = set()
+        self.fields_not_required = set()
 
     def _is_serializer_optional(self) -> bool:
         return (
@@ -167,77 +595,109 @@ class SchemaProcessor(ProcessingMixin):
         return [
             name
             for name, field in self.fields
-            if field.required and not self._is_field_serializer(field)
+            if field.required and not self._get_plan(field, name).is_serializer
         ]
 
     def _set_validation_properties(
-        self, field: SerializerType, result: Dict[str, Any]
+        self, plan: FieldPlan, result: Dict[str, Any]
     ) -> Dict[str, Any]:
-        for validator in field.validators:
-            for validator_class, attr_value in VALIDATION_MAP.items():
-                if isinstance(validator, validator_class):
-                    result_key, result_filter = attr_value
-                    result[result_key] = result_filter(validator)
+        for result_key, value in plan.validation:
+            result[result_key] = value
+        return result
 
+    def _get_enum_properties(
+        self, field: SerializerType, name: str, plan: FieldPlan
+    ) -> Dict[str, Any]:
+        result = {}
+        enum = plan.enum
+        if plan.remote_enum:
+            self.prefix_dependent = True
+            result['enumSource'] = self._generate_data_index(name)
+        elif enum:
+            if enum == 'choices':
+                choices = field.choices
+                result['enum'] = list(choices.keys())
+                result['enumNames'] = [v for v in choices.values()]
+            if isinstance(enum, (list, tuple)):
+                if isinstance(enum, (list, tuple)):
+                    result['enum'] = [item[0] for item in enum]
+                    result['enumNames'] = [item[1] for item in enum]
+                else:
+                    result['enum'] = enum
+                    result['enumNames'] = [item for item in enum]
         return result
 
-    def _get_field_properties(self, field: SerializerType, name: str) -> Dict[str, Any]:
+    def _get_field_properties(
+        self, field: SerializerType, name: str, plan: Optional[FieldPlan] = None
+    ) -> Dict[str, Any]:
+        if plan is None:
+            plan = self._get_plan(field, name)
         result = {}
-        type_map_obj = self._get_type_map_value(field)
-        result['type'] = type_map_obj['type']
-        result['title'] = self._get_title(field, name)
-        if isinstance(field, serializers.ListField):
+        result['type'] = plan.type
+        result['title'] = plan.title
+        if plan.is_list_field:
             if field.allow_empty:
                 result['required'] = not getattr(field, 'allow_empty', True)
-            result['items'] = self._get_field_properties(field.child, "")
+            result['items'] = self._get_field_properties(field.child, name, plan.child)
             result['uniqueItems'] = True
         else:
             if field.allow_null:
                 result['type'] = [result['type'], 'null']
-            enum = type_map_obj.get('enum')
-            if enum:
-                if enum == 'choices':
-                    choices = field.choices
-                    result['enum'] = list(choices.keys())
-                    result['enumNames'] = [v for v in choices.values()]
-                if isinstance(enum, (list, tuple)):
-                    if isinstance(enum, (list, tuple)):
-                        result['enum'] = [item[0] for item in enum]
-                        result['enumNames'] = [item[1] for item in enum]
-                    else:
-                        result['enum'] = enum
-                        result['enumNames'] = [item for item in enum]
+            if issubclass(plan.field_class, fields.MultipleChoiceField):
+                result['items'] = {
+                    'type': 'string',
+                    **self._get_enum_properties(field, name, plan),
+                }
+                result['uniqueItems'] = True
+            else:
+                result.update(self._get_enum_properties(field, name, plan))
             try:
                 result['default'] = field.get_default()
             except fields.SkipField:
                 pass
 
-        result = self._set_validation_properties(field, result)
+        result = self._set_validation_properties(plan, result)
 
         return result
 
     def _get_all_field_properties(self) -> Dict[str, Any]:
         result = {}
         for name, field in self.fields:
-            if self._is_field_serializer(field):
-                result[name] = SchemaProcessor(
-                    field, self.renderer_context, prefix=self._generate_data_index(name)
-                ).get_schema()
+            plan = self._get_plan(field, name)
+            if plan.is_serializer:
+                processor = SchemaProcessor(
+                    field, self.renderer_context, **self._get_nested_kwargs(name)
+                )
+                if self._is_lazy_serializer(field):
+                    result[name] = processor.get_lazy_schema()
+                elif self.definitions is None:
+                    result[name] = processor.get_schema()
+                else:
+                    result[name] = processor.get_schema_reference()
+                self.prefix_dependent |= processor.prefix_dependent
             else:
-                override = field.style.get(SCHEMA_OVERRIDE_KEY)
-                result[name] = override or self._get_field_properties(field, name)
+                result[name] = plan.schema_override or self._get_field_properties(
+                    field, name, plan
+                )
         return result
 
     def _remove_from_required(
         self, schema: Dict[str, Any], field_name: str
     ) -> Dict[str, Any]:
-        try:
-            if self._is_list_serializer(self.serializer):
-                schema['items']['required'].remove(field_name)
-            else:
-                schema['required'].remove(field_name)
-        except ValueError:
-            pass
+        # Applied in one pass by `_add_dependencies`.
+        self.fields_not_required.add(field_name)
+        return schema
+
+    def _apply_not_required(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        if self.fields_not_required:
+            target = (
+                schema['items'] if self._is_list_serializer(self.serializer) else schema
+            )
+            target['required'] = [
+                name
+                for name in target['required']
+                if name not in self.fields_not_required
+            ]
         return schema
 
     def _get_from_properties(
@@ -283,14 +743,21 @@ class SchemaProcessor(ProcessingMixin):
 
     @staticmethod
     def _create_enum_dependency_object(
-        field_name: str, enum_key: str, main_properties: Dict[str, Any]
+        field_name: str,
+        enum_key: str,
+        main_properties: Dict[str, Any],
+        enum_index: Optional[Dict[Any, int]] = None,
     ) -> Dict[str, Any]:
-        if enum_key not in main_properties['enum']:
+        if enum_index is None:
+            enum_index = {}
+            for i, key in enumerate(main_properties['enum']):
+                enum_index.setdefault(key, i)
+        idx = enum_index.get(enum_key)
+        if idx is None:
             raise KeyError(
                 f"'{enum_key}' is not a valid enum, the options are: "
                 f"{main_properties['enum']}"
             )
-        idx = main_properties['enum'].index(enum_key)
         enum_dependency_object = {
             'properties': {field_name: main_properties.copy()},
             'required': [],
@@ -309,9 +776,12 @@ class SchemaProcessor(ProcessingMixin):
         if 'enum' not in main_properties:
             raise KeyError('Only enumerable fields can have dynamic dependencies')
         dependency_object = {'oneOf': []}
+        enum_index = {}
+        for i, key in enumerate(main_properties['enum']):
+            enum_index.setdefault(key, i)
         for enum_key, dep_fields in dependent_properties.items():
             enum_dependency_object = self._create_enum_dependency_object(
-                name, enum_key, main_properties
+                name, enum_key, main_properties, enum_index
             )
             if not dep_fields:
                 dep_fields = []
@@ -330,19 +800,16 @@ class SchemaProcessor(ProcessingMixin):
         dependencies = {}
         for name, field in self.fields:
             dependency_object = {}
-            style_keys = set(field.style.keys())
-            dep_key = list(DEPENDENCY_KEYS.intersection(style_keys))
-            if dep_key:
-                if len(dep_key) > 1:
-                    raise KeyError(
-                        f"Cannot have multiple types of dependencies on a field."
-                        f"Please select one of: '{DEPENDENCY_SIMPLE_KEY}', "
-                        f"'{DEPENDENCY_CONDITIONAL_KEY}', '{DEPENDENCY_OVERRIDE_KEY}'"
-                    )
-                dep_key = dep_key[0]
-            else:
+            plan_dependencies = self._get_plan(field, name).dependencies
+            if not plan_dependencies:
                 continue
-            dependent_properties = field.style[dep_key]
+            if len(plan_dependencies) > 1:
+                raise KeyError(
+                    f"Cannot have multiple types of dependencies on a field."
+                    f"Please select one of: '{DEPENDENCY_SIMPLE_KEY}', "
+                    f"'{DEPENDENCY_CONDITIONAL_KEY}', '{DEPENDENCY_OVERRIDE_KEY}'"
+                )
+            dep_key, dependent_properties = plan_dependencies[0]
 
             if dep_key == DEPENDENCY_SIMPLE_KEY:
                 dependency_object, schema = self._simple_dependency(
@@ -362,6 +829,7 @@ class SchemaProcessor(ProcessingMixin):
 
         for field_name in self.fields_to_be_removed.difference(self.fields_to_be_kept):
             self._get_from_properties(schema, field_name, pop=True)  # In place mutation
+        schema = self._apply_not_required(schema)
         if dependencies:
             schema['dependencies'] = dependencies
         return schema
@@ -386,89 +854,186 @@ class SchemaProcessor(ProcessingMixin):
                 'properties': self._get_all_field_properties(),
             }
         schema = self._add_dependencies(schema)
+        if self.owns_definitions and self.definitions is not None:
+            if self.definitions.schemas:
+                schema['definitions'] = self.definitions.schemas
         return schema
 
+    def _build_definition(self) -> Dict[str, Any]:
+        schema = self.get_schema()
+        # The title belongs to each occurrence, see `get_schema_reference`.
+        del schema['title']
+        return schema
 
-class UiSchemaProcessor(ProcessingMixin):
-    def _field_order(self) -> List[str]:
+    def get_lazy_schema(self) -> Dict[str, Any]:
+        """
+        A placeholder for this nested serializer: `subSchema` holds the prefix
+            to request from the `sub_schema` action.
+        """
+        self.prefix_dependent = True
         if self._is_list_serializer(self.serializer):
-            return list(self.serializer.child.Meta.fields)
-        return list(self.serializer.Meta.fields)
+            return {
+                'title': self._get_serializer_title(),
+                'type': 'array',
+                'minItems': 0 if self._is_serializer_optional() else 1,
+                'items': {'type': 'object'},
+                'subSchema': self.prefix,
+            }
+        return {
+            'title': self._get_serializer_title(),
+            'type': 'object',
+            'subSchema': self.prefix,
+        }
+
+    def get_schema_reference(self) -> Dict[str, Any]:
+        """
+        The `$ref` to this nested serializer's entry in `definitions`,
+            adding the entry on first use; the schema itself when it depends
+            on the prefix of this occurrence.
+        """
+        definition_class = self._get_definition_class()
+        if self._is_list_serializer(self.serializer):
+            processor = type(self)(
+                self.serializer.child,
+                self.renderer_context,
+                prefix=self.prefix,
+                extra_types=self.extra_types,
+                definitions=self.definitions,
+                ancestors=self.ancestors,
+                max_depth=self.max_depth,
+                cache_plans=self.cache_plans,
+            )
+        else:
+            processor = self
+        if definition_class in self.definitions.prefixed:
+            ref = processor._build_definition()
+            self.prefix_dependent = True
+        else:
+            name = self.definitions.add_schema(
+                definition_class, processor._build_definition
+            )
+            if processor.prefix_dependent:
+                ref = self.definitions.remove_schema(definition_class)
+                self.prefix_dependent = True
+            else:
+                ref = {'$ref': self.definitions.get_ref(name)}
+        if self._is_list_serializer(self.serializer):
+            return {
+                'title': self._get_serializer_title(),
+                'type': 'array',
+                'minItems': 0 if self._is_serializer_optional() else 1,
+                'items': ref,
+            }
+        return {'title': self._get_serializer_title(), **ref}
 
-    def _get_style_dict(self, field) -> Dict[str, Any]:
-        style_dict = {}
-        for k, v in field.style.items():
-            if not k.startswith("schema:") and k not in STYLE_KEYS_TO_IGNORE:
-                style_dict[k] = v
-        return style_dict
 
+class UiSchemaProcessor(ProcessingMixin):
     def _set_validation_properties(
-        self, field: SerializerType, result: Dict[str, Any]
+        self, plan: FieldPlan, result: Dict[str, Any]
     ) -> Dict[str, Any]:
-        excluded_validators = tuple(
-            EXCLUDED_VALIDATOR_CLASSES + list(VALIDATION_MAP.keys())
-        )
-        custom_validators = [
-            v for v in field.validators if not isinstance(v, excluded_validators)
-        ]
-        if custom_validators:
-            result['ui:custom-validators'] = [
-                {
-                    'code': getattr(v, 'code', v.__class__.__name__.lower()),
-                    'message': getattr(v, 'message'),
-                }
-                for v in custom_validators
-            ]
-
-        return result
+        return self._set_custom_validators(plan, result)
 
     def _get_ui_field_properties(
-        self, field: SerializerType, name: str
+        self, field: SerializerType, name: str, plan: Optional[FieldPlan] = None
     ) -> Dict[str, Any]:
-        data_index = self._generate_data_index(name)
-        result = {}
-        if self._is_field_serializer(field):
-            return UiSchemaProcessor(
-                field, self.renderer_context, prefix=data_index
-            ).get_ui_schema()
-        elif isinstance(field, serializers.ListField):
-            child = field.child
-            widget = self._get_type_map_value(field=child).get('widget')
-            if not widget and isinstance(child, serializers.ChoiceField):
-                widget = 'checkbox'
-        else:
-            widget = self._get_type_map_value(field=field).get('widget')
-        help_text = field.help_text
-        if widget:
-            result['ui:widget'] = widget
-        if help_text:
-            result['ui:help'] = help_text
-        result.update(self._get_style_dict(field))
-        result = self._set_validation_properties(field, result)
+        if plan is None:
+            plan = self._get_plan(field, name)
+        if plan.is_serializer:
+            if self._is_lazy_serializer(field):
+                self.prefix_dependent = True
+                return {'ui:subSchema': self._generate_data_index(name)}
+            processor = UiSchemaProcessor(
+                field, self.renderer_context, **self._get_nested_kwargs(name)
+            )
+            result = processor.get_ui_schema()
+            self.prefix_dependent |= processor.prefix_dependent
+            return result
+        result = self._get_ui_leaf_properties(plan)
+        result = self._set_validation_properties(plan, result)
         return result
 
     def _get_all_ui_properties(self) -> Dict[str, Any]:
         result = {}
         for name, field in self.fields:
-            override = field.style.get(UI_SCHEMA_OVERRIDE_KEY)
-            result[name] = override or self._get_ui_field_properties(field, name)
+            plan = self._get_plan(field, name)
+            result[name] = plan.ui_override or self._get_ui_field_properties(
+                field, name, plan
+            )
         return result
 
     def get_ui_schema(self) -> Dict[str, Any]:
-        if self._is_list_serializer(self.serializer):
-            return {
-                'items': {
-                    **{'ui:order': self._field_order()},
-                    **self._get_style_dict(self.serializer),
-                    **self._get_all_ui_properties(),
-                }
-            }
-        else:
-            return {
-                **{'ui:order': self._field_order()},
-                **self._get_style_dict(self.serializer),
-                **self._get_all_ui_properties(),
-            }
+        if self.owns_definitions or self.definitions is None:
+            return self._wrap_ui_schema(self._get_all_ui_properties())
+        definition_class = self._get_definition_class()
+        ui_properties = self.definitions.ui_properties.get(definition_class)
+        if ui_properties is None:
+            ui_properties = self._get_all_ui_properties()
+            if self.prefix_dependent:
+                self.definitions.prefixed.add(definition_class)
+            elif definition_class not in self.definitions.prefixed:
+                self.definitions.ui_properties[definition_class] = ui_properties
+        return self._wrap_ui_schema(ui_properties)
+
+
+class FormSchemaProcessor(SchemaProcessor):
+    """
+    Produces the `SchemaProcessor` schema and the `UiSchemaProcessor` uiSchema
+        together, visiting each level of the serializer tree once.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ui_properties: Dict[str, Any] = {}
+
+    def _get_all_field_properties(self) -> Dict[str, Any]:
+        result = {}
+        for name, field in self.fields:
+            plan = self._get_plan(field, name)
+            if plan.is_serializer:
+                processor = FormSchemaProcessor(
+                    field, self.renderer_context, **self._get_nested_kwargs(name)
+                )
+                if self._is_lazy_serializer(field):
+                    result[name] = processor.get_lazy_schema()
+                    ui_schema = {'ui:subSchema': processor.prefix}
+                elif self.definitions is None:
+                    result[name], ui_schema = processor.get_schemas()
+                else:
+                    result[name], ui_schema = processor.get_schema_references()
+                self.prefix_dependent |= processor.prefix_dependent
+            else:
+                result[name] = plan.schema_override or self._get_field_properties(
+                    field, name, plan
+                )
+                ui_schema = self._set_custom_validators(
+                    plan, self._get_ui_leaf_properties(plan)
+                )
+            self.ui_properties[name] = plan.ui_override or ui_schema
+        return result
+
+    def get_schemas(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        schema = self.get_schema()
+        return schema, self._wrap_ui_schema(self.ui_properties)
+
+    def get_field_schemas(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        The schema and uiSchema properties of each field, without the
+            serializer level `required`, `dependencies` and `ui:order`.
+        """
+        properties = self._get_all_field_properties()
+        return properties, self.ui_properties
+
+    def _build_definition(self) -> Dict[str, Any]:
+        schema = super()._build_definition()
+        # Classes inlined at every occurrence overwrite this with the
+        # properties of the occurrence, read back by `get_schema_references`.
+        self.definitions.ui_properties[type(self.serializer)] = self.ui_properties
+        return schema
+
+    def get_schema_references(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        schema = self.get_schema_reference()
+        ui_properties = self.definitions.ui_properties[self._get_definition_class()]
+        return schema, self._wrap_ui_schema(ui_properties)
 
 
 class ColumnProcessor(ProcessingMixin):
@@ -481,7 +1046,7 @@ class ColumnProcessor(ProcessingMixin):
             'dataIndex': data_index,
             'key': name,
         }
-        sort_order = field.style.get('schema:sort')
+        sort_order = self._get_plan(field, name).sort
         if sort_order:
             if sort_order not in ['ascend', 'descend']:
                 raise ValueError(
@@ -491,24 +1056,66 @@ class ColumnProcessor(ProcessingMixin):
             result['defaultSortOrder'] = sort_order
         return result
 
-    def get_schema(self) -> List[Dict[str, str]]:
-        result = []
+    def get_field_columns(self) -> Dict[str, List[Dict[str, str]]]:
+        """
+        The columns of each field, nested serializers contributing one column
+            per field they contain.
+        """
+        result = {}
         for name, field in self.fields:
-            data_index = self._generate_data_index(name)
-            if self._is_field_serializer(field):
+            plan = self._get_plan(field, name)
+            if plan.is_serializer:
                 # TODO: How to list nested list serializers?
-                if self._is_list_serializer(field):
+                if plan.is_list_serializer or self._is_lazy_serializer(field):
                     continue
-                result.extend(
-                    ColumnProcessor(
-                        field, self.renderer_context, prefix=data_index
-                    ).get_schema()
-                )
+                result[name] = ColumnProcessor(
+                    field,
+                    self.renderer_context,
+                    **{**self._get_nested_kwargs(name), 'definitions': False},
+                ).get_schema()
             else:
-                override = field.style.get(COLUMN_PROCESSOR_OVERRIDE_KEY)
-                result.append(override or self._get_column_properties(field, name))
+                result[name] = [
+                    plan.column_override or self._get_column_properties(field, name)
+                ]
         return result
 
+    def get_schema(self) -> List[Dict[str, str]]:
+        return [
+            column
+            for columns in self.get_field_columns().values()
+            for column in columns
+        ]
+
+
+class DeferredSerializer:
+    """
+    Stands in for a view's serializer without building it: the serializer is
+        only instantiated when its schema is not already cached.
+    """
+
+    __slots__ = ('serializer_class', 'factory', '_serializer')
+
+    def __init__(
+        self,
+        serializer_class: type,
+        factory: Callable[[], serializers.Serializer],
+    ):
+        self.serializer_class = serializer_class
+        self.factory = factory
+        self._serializer = None
+
+    def get_serializer(self) -> serializers.Serializer:
+        if self._serializer is None:
+            self._serializer = self.factory()
+        return self._serializer
+
+
+FormSerializerType = Union[serializers.Serializer, DeferredSerializer]
+
+
+def is_form_serializer(obj: Any) -> bool:
+    return isinstance(obj, (serializers.Serializer, DeferredSerializer))
+
 
 class SerializerEncoder(DjangoJSONEncoder):
     LIST_ACTION = 'list'
@@ -531,15 +1138,241 @@ class SerializerEncoder(DjangoJSONEncoder):
     def _get_view_action(self) -> str:
         return self.renderer_context.get('view', {}).__dict__.get('action', '')
 
+    def _get_processor_kwargs(self, serializer: FormSerializerType) -> Dict[str, Any]:
+        # Field plans are shared per class when the output is cached per class.
+        return {'cache_plans': self.get_cache_key(serializer) is not None}
+
+    def _build_serializer_schema(
+        self, serializer: serializers.Serializer
+    ) -> Union[Dict, List]:
+        kwargs = self._get_processor_kwargs(serializer)
+        if self._get_view_action() == self.LIST_ACTION:
+            return ColumnProcessor(
+                serializer, self.renderer_context, **kwargs
+            ).get_schema()
+        schema, ui_schema = FormSchemaProcessor(
+            serializer, self.renderer_context, **kwargs
+        ).get_schemas()
+        return {'schema': schema, 'uiSchema': ui_schema}
+
+    def _build_skeleton(self, serializer: serializers.Serializer) -> Union[Dict, List]:
+        """
+        The cached part of a serializer with dynamic fields: the full schema,
+            or the columns grouped by field for the list action.
+        """
+        if self._get_view_action() == self.LIST_ACTION:
+            return ColumnProcessor(
+                serializer,
+                self.renderer_context,
+                **self._get_processor_kwargs(serializer),
+            ).get_field_columns()
+        return self._build_serializer_schema(serializer)
+
+    def _apply_dynamic_overlay(
+        self, skeleton: Union[Dict, List], serializer: serializers.Serializer
+    ) -> Union[Dict, List]:
+        """
+        Rebuild the dynamic fields of `serializer` for this request and lay
+            them over the cached skeleton, keeping the field order.
+        """
+        only = get_dynamic_fields(type(serializer))
+        kwargs = self._get_processor_kwargs(serializer)
+        if self._get_view_action() == self.LIST_ACTION:
+            overlay = ColumnProcessor(
+                serializer, self.renderer_context, only=only, **kwargs
+            ).get_field_columns()
+            return [
+                column
+                for name, columns in skeleton.items()
+                for column in overlay.get(name, columns)
+            ]
+        properties, ui_properties = FormSchemaProcessor(
+            serializer, self.renderer_context, definitions=False, only=only, **kwargs
+        ).get_field_schemas()
+        schema = skeleton['schema']
+        for name in properties:
+            if name not in schema['properties'] or name in schema.get(
+                'dependencies', ()
+            ):
+                raise ValueError(
+                    f"The dynamic field '{name}' cannot take part in dependencies"
+                )
+        return {
+            'schema': {**schema, 'properties': {**schema['properties'], **properties}},
+            'uiSchema': {**skeleton['uiSchema'], **ui_properties},
+        }
+
+    @staticmethod
+    def _get_serializer_class(serializer: FormSerializerType) -> type:
+        if isinstance(serializer, DeferredSerializer):
+            return serializer.serializer_class
+        return type(serializer)
+
+    def get_cache_key(
+        self, serializer: FormSerializerType
+    ) -> Optional[Tuple[Hashable, ...]]:
+        serializer_class = self._get_serializer_class(serializer)
+        if (
+            not is_cache_enabled(serializer_class)
+            or get_schema_variant(self.renderer_context) is not None
+        ):
+            return None
+        return get_cache_key(serializer_class, self._get_view_action())
+
+    def get_variant_cache_key(
+        self, serializer: FormSerializerType
+    ) -> Optional[Tuple[Hashable, ...]]:
+        """
+        The key of the encoded schema and schema hash in `schema_variant_cache`,
+            `None` without a schema variant or when the schema is not cached.
+        """
+        variant = get_schema_variant(self.renderer_context)
+        serializer_class = self._get_serializer_class(serializer)
+        if (
+            variant is None
+            or not is_cache_enabled(serializer_class)
+            or get_dynamic_fields(serializer_class)
+        ):
+            return None
+        return (
+            'variant',
+            variant,
+            *get_cache_key(serializer_class, self._get_view_action()),
+        )
+
+    def get_static_cache_key(
+        self, serializer: FormSerializerType
+    ) -> Optional[Tuple[Hashable, ...]]:
+        """
+        The cache key of output covering the whole schema (its hash, encoded
+            bytes), `None` when the serializer has dynamic fields.
+        """
+        if get_dynamic_fields(self._get_serializer_class(serializer)):
+            return None
+        return self.get_cache_key(serializer)
+
+    def get_shared_cache_key(
+        self, serializer: FormSerializerType, *encoding_options: Hashable
+    ) -> Optional[str]:
+        """
+        The key of the encoded schema in the shared cache, `None` when there
+            is no shared cache or the schema is not cached.
+        """
+        if get_shared_cache() is None or self.get_static_cache_key(serializer) is None:
+            return None
+        if isinstance(serializer, DeferredSerializer):
+            serializer = serializer.get_serializer()
+        return get_shared_cache_key(
+            serializer, self._get_view_action(), *encoding_options
+        )
+
+    def get_stored_schema(
+        self, serializer: FormSerializerType, *encoding_options: Hashable
+    ) -> Optional[memoryview]:
+        """
+        The encoded schema from the `DRF_REACT_TEMPLATE_SCHEMA_STORE` file,
+            `None` when there is no store or it does not hold the schema.
+        """
+        store = get_schema_store()
+        if store is None or self.get_static_cache_key(serializer) is None:
+            return None
+        key = get_store_key(
+            self._get_serializer_class(serializer),
+            self._get_view_action(),
+            get_language(),
+            *encoding_options,
+        )
+        if isinstance(serializer, DeferredSerializer):
+            stored = store.get(key, serializer.get_serializer)
+        else:
+            stored = store.get(key, lambda: serializer)
+        timings = get_timings(self.renderer_context)
+        if timings is not None:
+            timings.set_cache('schema_store', stored is not None)
+        return stored
+
+    def get_schema_hash(self, serializer: FormSerializerType) -> str:
+        built = False
+
+        def build():
+            nonlocal built
+            shared_cache_key = self.get_shared_cache_key(serializer, 'hash')
+            if shared_cache_key is not None:
+                schema_hash = get_shared_cache().get(shared_cache_key)
+                if timings is not None:
+                    timings.set_cache('shared_schema_hash', schema_hash is not None)
+                if schema_hash is not None:
+                    return schema_hash
+            built = True
+            schema = self.default(serializer)
+            encoded = json.dumps(schema, cls=DjangoJSONEncoder, separators=(',', ':'))
+            schema_hash = hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+            if cache_key is not None:
+                schema_cache.set(get_schema_hash_key(schema_hash), schema)
+            if shared_cache_key is not None:
+                # The schema is shared by its hash too, for `schema_by_hash`
+                # requests routed to other workers.
+                get_shared_cache().set_many(
+                    {
+                        shared_cache_key: schema_hash,
+                        get_shared_schema_hash_key(schema_hash): schema,
+                    }
+                )
+            return schema_hash
+
+        timings = get_timings(self.renderer_context)
+        cache_key = self.get_static_cache_key(serializer)
+        variant_cache_key = self.get_variant_cache_key(serializer)
+        if cache_key is not None:
+            schema_hash = schema_cache.get_or_build((*cache_key, 'hash'), build)
+        elif variant_cache_key is not None:
+            schema_hash = schema_variant_cache.get_or_build(
+                (*variant_cache_key, 'hash'), build
+            )
+        else:
+            schema_hash = build()
+        if timings is not None:
+            timings.set_cache('schema_hash', not built)
+        return schema_hash
+
     def default(self, obj: Any) -> Union[Dict, List]:
-        if isinstance(obj, serializers.Serializer):
-            if self._get_view_action() == self.LIST_ACTION:
-                return ColumnProcessor(obj, self.renderer_context).get_schema()
+        if is_form_serializer(obj):
+            timings = get_timings(self.renderer_context)
+
+            def get_serializer() -> serializers.Serializer:
+                if isinstance(obj, DeferredSerializer):
+                    return obj.get_serializer()
+                return obj
+
+            phase = (
+                'columns' if self._get_view_action() == self.LIST_ACTION else 'schema'
+            )
+            cache_key = self.get_cache_key(obj)
+            dynamic = cache_key is not None and bool(
+                get_dynamic_fields(self._get_serializer_class(obj))
+            )
+            built = False
+
+            def build():
+                nonlocal built
+                built = True
+                with measure(timings, phase):
+                    if dynamic:
+                        result = self._build_skeleton(get_serializer())
+                    else:
+                        result = self._build_serializer_schema(get_serializer())
+                    if cache_key is not None:
+                        result = resolve_translations(result)
+                return result
+
+            if cache_key is None:
+                result = build()
             else:
-                return {
-                    'schema': SchemaProcessor(obj, self.renderer_context).get_schema(),
-                    'uiSchema': UiSchemaProcessor(
-                        obj, self.renderer_context
-                    ).get_ui_schema(),
-                }
+                result = schema_cache.get_or_build(cache_key, build)
+            if timings is not None:
+                timings.set_cache('schema', not built)
+            if dynamic:
+                with measure(timings, 'dynamic'):
+                    result = self._apply_dynamic_overlay(result, get_serializer())
+            return result
         return super().default(obj)
@@ -0,0 +1,162 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple, Union
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from drf_react_template.cache import (
+    CACHE_SETTINGS,
+    get_definition_hash,
+    get_package_version,
+)
+
+logger = logging.getLogger(__name__)
+
+STORE_MAGIC = b'DRFRTSS1'
+# Magic and index length, followed by the JSON index and the schema data.
+STORE_HEADER = struct.Struct('<8sQ')
+
+StoreEntry = Tuple[str, str, bytes]
+
+
+def get_store_key(
+    serializer_class: type, action: str, language: Optional[str], *encoding_options
+) -> str:
+    return '|'.join(
+        (
+            f'{serializer_class.__module__}.{serializer_class.__qualname__}',
+            action,
+            str(language),
+            *(repr(option) for option in encoding_options),
+        )
+    )
+
+
+def write_schema_store(path: Union[str, os.PathLike], entries: Iterable[StoreEntry]):
+    """
+    Write `(store key, definition hash, encoded schema)` entries to a store
+        file. The file is replaced atomically, so processes that mapped the
+        previous file keep reading it until they reopen the store.
+    """
+    index: Dict[str, Any] = {'version': get_package_version(), 'entries': {}}
+    chunks = []
+    offset = 0
+    for key, definition_hash, data in entries:
+        index['entries'][key] = [offset, len(data), definition_hash]
+        chunks.append(data)
+        offset += len(data)
+    encoded_index = json.dumps(index, separators=(',', ':')).encode('utf-8')
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.schema-store-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(STORE_HEADER.pack(STORE_MAGIC, len(encoded_index)))
+            f.write(encoded_index)
+            f.writelines(chunks)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class SchemaStore:
+    """
+    A read-only, memory-mapped file of encoded schemas written by the
+        `export_schema_store` command. Every process maps the same pages, and
+        schemas are served as `memoryview` slices of the mapping without
+        being copied into the process.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self._mmap)
+        magic, index_length = STORE_HEADER.unpack_from(self.buffer)
+        if magic != STORE_MAGIC:
+            raise ValueError(f'{path} is not a schema store')
+        data_start = STORE_HEADER.size + index_length
+        index = json.loads(bytes(self.buffer[STORE_HEADER.size : data_start]))
+        self.version: str = index['version']
+        self.entries: Dict[str, Tuple[int, int, str]] = {
+            key: (data_start + offset, length, definition_hash)
+            for key, (offset, length, definition_hash) in index['entries'].items()
+        }
+        self._verified: Dict[str, bool] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def get(self, key: str, get_serializer: Callable[[], Any]) -> Optional[memoryview]:
+        """
+        The encoded schema stored under `key`. The first lookup of each key
+            compares the definition hash of the serializer with the stored one,
+            so entries exported from an older serializer are never served.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        start, length, definition_hash = entry
+        verified = self._verified.get(key)
+        if verified is None:
+            verified = get_definition_hash(get_serializer()) == definition_hash
+            self._verified[key] = verified
+        if not verified:
+            return None
+        return self.buffer[start : start + length]
+
+
+_store: Optional[SchemaStore] = None
+_store_path: Optional[str] = None
+_store_lock = threading.Lock()
+
+
+def _open_schema_store(path: str) -> Optional[SchemaStore]:
+    try:
+        store = SchemaStore(path)
+    except (OSError, ValueError):
+        logger.exception('Could not open the schema store %s', path)
+        return None
+    if store.version != get_package_version():
+        logger.warning(
+            'Ignoring the schema store %s exported by version %s',
+            path,
+            store.version,
+        )
+        return None
+    return store
+
+
+def get_schema_store() -> Optional[SchemaStore]:
+    """
+    The store named by `DRF_REACT_TEMPLATE_SCHEMA_STORE`, opened once per
+        process; `None` when not configured or unusable.
+    """
+    global _store, _store_path
+    path = getattr(settings, 'DRF_REACT_TEMPLATE_SCHEMA_STORE', None)
+    if not path:
+        return None
+    if _store_path != path:
+        with _store_lock:
+            if _store_path != path:
+                _store = _open_schema_store(path)
+                _store_path = path
+    return _store
+
+
+@receiver(setting_changed)
+def reset_schema_store(setting: str, **kwargs):
+    global _store, _store_path
+    if setting == 'DRF_REACT_TEMPLATE_SCHEMA_STORE' or setting in CACHE_SETTINGS:
+        with _store_lock:
+            _store = _store_path = None
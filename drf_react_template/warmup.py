@@ -0,0 +1,241 @@
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.http import HttpRequest
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import translation
+
+from drf_react_template.cache import (
+    get_definition_hash,
+    get_dynamic_fields,
+    get_package_version,
+)
+from drf_react_template.mixins import FormSchemaViewSetMixin
+from drf_react_template.renderers import JSONSerializerRenderer
+from drf_react_template.schema_form_encoder import SerializerEncoder
+from drf_react_template.store import StoreEntry, get_store_key, write_schema_store
+
+logger = logging.getLogger(__name__)
+
+# Actions whose responses are never wrapped with a serializer schema.
+SKIPPED_ACTIONS = {'destroy'}
+
+ViewAction = Tuple[type, str, Dict[str, Any]]
+
+MANIFEST_NAME = 'manifest.json'
+SCHEMA_DIR = 'schemas'
+
+
+def _iter_callbacks(patterns: Iterable) -> Iterator[Any]:
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_callbacks(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.callback
+
+
+def iter_form_schema_actions(urlconf: Optional[str] = None) -> Iterator[ViewAction]:
+    """
+    Yield `(viewset_class, action, initkwargs)` for every action served by a
+        `FormSchemaViewSetMixin` subclass in the URL configuration.
+    """
+    seen = set()
+    for callback in _iter_callbacks(get_resolver(urlconf).url_patterns):
+        viewset_class = getattr(callback, 'cls', None)
+        actions = getattr(callback, 'actions', None)
+        if not (
+            isinstance(viewset_class, type)
+            and issubclass(viewset_class, FormSchemaViewSetMixin)
+            and actions
+        ):
+            continue
+        for action in actions.values():
+            if (
+                action in SKIPPED_ACTIONS
+                or action in viewset_class.schema_exempt_actions
+            ):
+                continue
+            if (viewset_class, action) in seen:
+                continue
+            seen.add((viewset_class, action))
+            yield viewset_class, action, callback.initkwargs
+
+
+def build_view(
+    viewset_class: type,
+    action: str,
+    initkwargs: Optional[Dict[str, Any]] = None,
+    request: Optional[HttpRequest] = None,
+) -> FormSchemaViewSetMixin:
+    """
+    Instantiate a viewset as its dispatch would, ready to build serializers.
+    """
+    if request is None:
+        request = HttpRequest()
+        request.method = 'GET'
+        request.META = {'SERVER_NAME': 'localhost', 'SERVER_PORT': '80'}
+    view = viewset_class(**(initkwargs or {}))
+    view.action_map = {request.method.lower(): action}
+    view.args = ()
+    view.kwargs = {}
+    view.format_kwarg = None
+    view.request = view.initialize_request(request)
+    view.action = action
+    return view
+
+
+def warm_up_view(
+    viewset_class: type,
+    action: str,
+    initkwargs: Optional[Dict[str, Any]] = None,
+    language: Optional[str] = None,
+):
+    """
+    Build and cache the schema (or columns), schema hash and encoded schema
+        bytes for a single viewset action.
+    """
+    with translation.override(language):
+        view = build_view(viewset_class, action, initkwargs)
+        renderer_context = view.get_renderer_context()
+        serializer = view.get_serializer()
+        SerializerEncoder(renderer_context=renderer_context).get_schema_hash(serializer)
+        for renderer in view.get_renderers():
+            if isinstance(renderer, JSONSerializerRenderer):
+                renderer.get_serializer_bytes(
+                    serializer, renderer_context=renderer_context
+                )
+
+
+def _warm_up(view_action: ViewAction, language: str) -> bool:
+    viewset_class, action, initkwargs = view_action
+    try:
+        warm_up_view(viewset_class, action, initkwargs, language)
+    except Exception:
+        logger.exception(
+            'Could not precompute the %s schema of %s', action, viewset_class.__name__
+        )
+        return False
+    return True
+
+
+def warm_up_schemas(
+    languages: Optional[Sequence[str]] = None,
+    max_workers: Optional[int] = None,
+    urlconf: Optional[str] = None,
+) -> int:
+    """
+    Precompute every `FormSchemaViewSetMixin` schema reachable from the URL
+        configuration, returning the number of schemas built. Intended to run
+        before workers fork (e.g. gunicorn `--preload`) so they inherit warm
+        caches through copy-on-write.
+    """
+    languages = languages or [settings.LANGUAGE_CODE]
+    tasks: List[Tuple[ViewAction, str]] = [
+        (view_action, language)
+        for view_action in iter_form_schema_actions(urlconf)
+        for language in languages
+    ]
+    if max_workers is None:
+        max_workers = getattr(settings, 'DRF_REACT_TEMPLATE_WARMUP_WORKERS', 1)
+    if max_workers > 1 and len(tasks) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(lambda task: _warm_up(*task), tasks))
+    else:
+        results = [_warm_up(*task) for task in tasks]
+    return sum(results)
+
+
+def iter_schema_store_entries(
+    languages: Optional[Sequence[str]] = None,
+    urlconf: Optional[str] = None,
+) -> Iterator[StoreEntry]:
+    """
+    Yield a schema store entry for the encoded schema of every
+        `FormSchemaViewSetMixin` action and language, as served with the
+        default encoding options.
+    """
+    for viewset_class, action, initkwargs in iter_form_schema_actions(urlconf):
+        for language in languages or [settings.LANGUAGE_CODE]:
+            with translation.override(language):
+                view = build_view(viewset_class, action, initkwargs)
+                renderer_context = view.get_renderer_context()
+                serializer = view.get_serializer()
+                encoder = SerializerEncoder(renderer_context=renderer_context)
+                if encoder.get_static_cache_key(serializer) is None:
+                    continue
+                for renderer in view.get_renderers():
+                    if not isinstance(renderer, JSONSerializerRenderer):
+                        continue
+                    key = get_store_key(
+                        type(serializer),
+                        action,
+                        translation.get_language(),
+                        *renderer.get_encoding_options(None, renderer_context),
+                    )
+                    data = renderer.get_serializer_bytes(
+                        serializer, renderer_context=renderer_context
+                    )
+                    yield key, get_definition_hash(serializer), bytes(data)
+
+
+def export_schema_store(
+    path: str,
+    languages: Optional[Sequence[str]] = None,
+    urlconf: Optional[str] = None,
+) -> int:
+    """
+    Write the schema store read through `DRF_REACT_TEMPLATE_SCHEMA_STORE`,
+        returning the number of schemas written.
+    """
+    entries = {
+        entry[0]: entry for entry in iter_schema_store_entries(languages, urlconf)
+    }
+    write_schema_store(path, entries.values())
+    return len(entries)
+
+
+def export_form_schemas(
+    outdir: str,
+    languages: Optional[Sequence[str]] = None,
+    urlconf: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Write the encoded schema (or columns) of every `FormSchemaViewSetMixin`
+        action and language to `<outdir>/schemas/<schemaHash>.json`, exactly
+        as the `serializer` member of the API response, and a manifest of the
+        files by viewset basename, action and language. Returns the manifest.
+    """
+    schema_dir = os.path.join(outdir, SCHEMA_DIR)
+    os.makedirs(schema_dir, exist_ok=True)
+    manifest: Dict[str, Any] = {'version': get_package_version(), 'schemas': {}}
+    for viewset_class, action, initkwargs in iter_form_schema_actions(urlconf):
+        basename = initkwargs.get('basename') or viewset_class.__name__
+        for language in languages or [settings.LANGUAGE_CODE]:
+            with translation.override(language):
+                view = build_view(viewset_class, action, initkwargs)
+                if get_dynamic_fields(view.get_serializer_class()):
+                    continue
+                renderer_context = view.get_renderer_context()
+                serializer = view.get_serializer()
+                renderer = view.get_renderers()[0]
+                if not isinstance(renderer, JSONSerializerRenderer):
+                    continue
+                schema_hash = SerializerEncoder(
+                    renderer_context=renderer_context
+                ).get_schema_hash(serializer)
+                data = renderer.get_serializer_bytes(
+                    serializer, renderer_context=renderer_context
+                )
+                path = f'{SCHEMA_DIR}/{schema_hash}.json'
+                with open(os.path.join(outdir, path), 'wb') as f:
+                    f.write(data)
+                manifest['schemas'].setdefault(basename, {}).setdefault(action, {})[
+                    translation.get_language()
+                ] = path
+    with open(os.path.join(outdir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
@@ -1,7 +1,8 @@
 from django.shortcuts import get_object_or_404
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
 
-from drf_react_template.mixins import FormSchemaViewSetMixin
+from drf_react_template.async_mixins import AsyncFormSchemaViewSetMixin
+from drf_react_template.mixins import FormSchemaViewSetMixin, StreamingListModelMixin
 from example.polls import models, serializers
 
 
@@ -19,3 +20,14 @@ class PollViewSet(
             self.get_queryset(),
             id=self.kwargs['pk'],
         )
+
+
+class StreamingPollViewSet(StreamingListModelMixin, FormSchemaViewSetMixin):
+    queryset = models.Question.objects.all()
+    serializer_class = serializers.QuestionListSerializer
+
+
+class AsyncPollViewSet(ListModelMixin, AsyncFormSchemaViewSetMixin):
+    queryset = models.Question.objects.all().prefetch_related('choice_set')
+    serializer_class = serializers.QuestionSerializer
+    serializer_list_class = serializers.QuestionListSerializer
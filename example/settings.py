@@ -32,6 +32,7 @@ ALLOWED_HOSTS = []
 
 INSTALLED_APPS = [
     'example.polls.apps.PollsConfig',
+    'drf_react_template',
     'django.contrib.auth',
     'django.contrib.contenttypes',
 ]
@@ -15,9 +15,11 @@ Including another URLconf
 """
 from rest_framework import routers
 
-from example.polls.viewsets import PollViewSet
+from example.polls.viewsets import AsyncPollViewSet, PollViewSet, StreamingPollViewSet
 
 router = routers.SimpleRouter()
 router.register(r'polls', PollViewSet)
+router.register(r'polls-stream', StreamingPollViewSet, basename='polls-stream')
+router.register(r'polls-async', AsyncPollViewSet, basename='polls-async')
 
 urlpatterns = router.urls
@@ -1,9 +1,19 @@
 import pytest
 from rest_framework.test import APIClient
 
+from drf_react_template.cache import schema_cache, schema_variant_cache
 from tests import factories
 
 
+@pytest.fixture(autouse=True)
+def clear_schema_cache():
+    schema_cache.clear()
+    schema_variant_cache.clear()
+    yield
+    schema_cache.clear()
+    schema_variant_cache.clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
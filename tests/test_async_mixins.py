@@ -0,0 +1,88 @@
+from asyncio import iscoroutinefunction
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from rest_framework import status
+
+from drf_react_template import async_mixins
+from drf_react_template.cache import get_cache_key, schema_cache
+from example.polls.serializers import QuestionSerializer
+from example.polls.viewsets import AsyncPollViewSet
+
+
+@pytest.fixture
+def polls_async_url():
+    return '/polls-async/'
+
+
+def async_get(url, **extra):
+    return async_to_sync(AsyncClient().get)(url, **extra)
+
+
+def test_as_view_is_async():
+    view = AsyncPollViewSet.as_view({'get': 'list'})
+    assert iscoroutinefunction(view)
+    assert view.cls is AsyncPollViewSet
+    assert view.actions == {'get': 'list'}
+    assert view.csrf_exempt
+
+
+def test_async_create_form(api_client, polls_async_url, polls_create_url):
+    response = async_get(f'{polls_async_url}create/')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == api_client.get(polls_create_url).json()
+    assert get_cache_key(QuestionSerializer, 'create_form') in schema_cache
+
+    etag = response['ETag']
+    response = async_get(f'{polls_async_url}create/', headers={'If-None-Match': etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_async_list(api_client, polls_async_url, polls_list_url, question):
+    response = async_get(polls_async_url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == api_client.get(polls_list_url).json()
+
+
+def test_prewarm_schema():
+    future = async_mixins.prewarm_schema(AsyncPollViewSet, 'create_form', {}, 'en-us')
+    future.result()
+
+    key = (AsyncPollViewSet, 'create_form', 'en-us')
+    assert async_mixins._schema_keys[key] == (
+        QuestionSerializer,
+        'create_form',
+        'en-us',
+    )
+    assert key not in async_mixins._pending
+    assert (
+        async_mixins.prewarm_schema(AsyncPollViewSet, 'create_form', {}, 'en-us')
+        is None
+    )
+    assert (
+        async_mixins.prewarm_schema(AsyncPollViewSet, 'sub_schema', {}, 'en-us') is None
+    )
+
+    schema_cache.clear()
+    assert async_mixins.prewarm_schema(AsyncPollViewSet, 'create_form', {}, 'en-us')
+
+
+def test_prewarm_schema_logs_failures(caplog):
+    class BrokenViewSet(AsyncPollViewSet):
+        def get_serializer_class(self):
+            raise RuntimeError()
+
+    async_mixins.prewarm_schema(BrokenViewSet, 'list', {}, 'en-us').result()
+    assert 'Could not precompute the list schema of BrokenViewSet' in caplog.text
+
+
+def test_async_workers_setting(settings):
+    executor = async_mixins.get_schema_executor()
+    settings.DRF_REACT_TEMPLATE_ASYNC_WORKERS = 3
+
+    assert async_mixins.get_schema_executor() is not executor
+    assert async_mixins.get_schema_executor()._max_workers == 3
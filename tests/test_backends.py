@@ -0,0 +1,148 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.test import override_settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework.renderers import (
+    INDENT_SEPARATORS,
+    LONG_SEPARATORS,
+    SHORT_SEPARATORS,
+)
+
+from drf_react_template.backends import (
+    OrjsonJSONBackend,
+    StdlibJSONBackend,
+    get_json_backend,
+)
+from drf_react_template.renderers import JSONSerializerRenderer
+from drf_react_template.schema_form_encoder import SerializerEncoder
+from example.polls.serializers import QuestionListSerializer, QuestionSerializer
+
+
+class View:
+    def __init__(self, action):
+        self.action = action
+
+
+class FloatSerializer(serializers.Serializer):
+    score = serializers.FloatField(min_value=1e-05, max_value=1e16)
+
+    class Meta:
+        fields = ('score',)
+
+
+PAYLOADS = (
+    {},
+    [],
+    {'text': 'Café 日本 \U0001f600 "quoted" \\ \n\t'},
+    {'int': 1, 'negative': -42, 'big': 2**63 - 1, 'float': 1.5, 'small': 0.1},
+    {'tiny': 1e-05, 'huge': 1e16, 'negative': -9.99e-05, 'zero': -0.0},
+    {'bounds': (1e-4, 9999999999999998.0, -1e-4)},
+    {'bool': True, 'none': None, 'nested': [{'a': [1, [2, [3]]]}]},
+    {'decimal': Decimal('12.340')},
+    {
+        'datetime': datetime.datetime(2020, 1, 2, 3, 4, 5, 678901),
+        'aware': datetime.datetime(2020, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+        'date': datetime.date(2020, 1, 2),
+        'time': datetime.time(3, 4, 5, 123456),
+        'duration': datetime.timedelta(days=1, seconds=5),
+    },
+    {'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678')},
+    {'lazy': _('Image is too small, must be 1KB minimum.')},
+    {1: 'non-str key', 'huge': 2**70},
+    {'serializer': QuestionSerializer(), 'formData': {'question_text': 'text'}},
+    {'serializer': FloatSerializer(), 'formData': {'score': 0.5}},
+)
+
+
+@pytest.fixture
+def orjson_backend():
+    pytest.importorskip('orjson')
+    return OrjsonJSONBackend()
+
+
+def encode(backend, data, indent, separators, action='retrieve'):
+    return backend.dumps(
+        data,
+        SerializerEncoder,
+        {'view': View(action)},
+        indent,
+        separators,
+        False,
+        False,
+    )
+
+
+@pytest.mark.parametrize('payload', PAYLOADS)
+@pytest.mark.parametrize(
+    ['indent', 'separators'], ([None, SHORT_SEPARATORS], [2, INDENT_SEPARATORS])
+)
+def test_orjson_backend_parity(orjson_backend, payload, indent, separators):
+    assert orjson_backend.supports(indent, separators, False, False)
+    assert encode(orjson_backend, payload, indent, separators) == encode(
+        StdlibJSONBackend(), payload, indent, separators
+    )
+
+
+@pytest.mark.parametrize('value', (float('nan'), float('inf'), -float('inf')))
+def test_orjson_backend_rejects_non_finite_floats(orjson_backend, value):
+    with pytest.raises(ValueError):
+        encode(StdlibJSONBackend(), {'score': value}, None, SHORT_SEPARATORS)
+    with pytest.raises(ValueError):
+        encode(orjson_backend, {'score': value}, None, SHORT_SEPARATORS)
+
+
+def test_orjson_backend_parity_list_columns(orjson_backend):
+    payload = {'serializer': QuestionListSerializer(), 'formData': []}
+    assert encode(
+        orjson_backend, payload, None, SHORT_SEPARATORS, action='list'
+    ) == encode(StdlibJSONBackend(), payload, None, SHORT_SEPARATORS, action='list')
+
+
+@pytest.mark.parametrize(
+    ['indent', 'separators', 'ensure_ascii', 'allow_nan'],
+    (
+        [None, LONG_SEPARATORS, False, False],
+        [4, INDENT_SEPARATORS, False, False],
+        [None, SHORT_SEPARATORS, True, False],
+        [None, SHORT_SEPARATORS, False, True],
+    ),
+)
+def test_orjson_backend_unsupported_options(
+    orjson_backend, indent, separators, ensure_ascii, allow_nan
+):
+    assert not orjson_backend.supports(indent, separators, ensure_ascii, allow_nan)
+
+
+def test_get_json_backend():
+    assert isinstance(get_json_backend(), StdlibJSONBackend)
+    path = 'drf_react_template.backends.OrjsonJSONBackend'
+    with override_settings(DRF_REACT_TEMPLATE_JSON_BACKEND=path):
+        assert isinstance(get_json_backend(), OrjsonJSONBackend)
+    assert get_json_backend(path) is get_json_backend(path)
+
+
+@pytest.mark.parametrize(
+    'backend',
+    (
+        'drf_react_template.backends.StdlibJSONBackend',
+        'drf_react_template.backends.OrjsonJSONBackend',
+    ),
+)
+def test_renderer_backend_parity(backend):
+    payload = {
+        'serializer': QuestionSerializer(),
+        'formData': {'a': '\u2028', 'score': 1e-05, 'big': 1e16},
+    }
+    renderer = JSONSerializerRenderer()
+    renderer.json_backend = backend
+    renderer_context = {'view': View('retrieve')}
+
+    assert renderer.render(payload, None, renderer_context) == (
+        encode(StdlibJSONBackend(), payload, None, SHORT_SEPARATORS).replace(
+            '\u2028'.encode('utf-8'), b'\\u2028'
+        )
+    )
@@ -0,0 +1,68 @@
+import json
+
+from benchmarks import run
+from benchmarks.synthetic import Profile, build_row, build_serializer
+
+SMOKE_PROFILE = Profile('smoke', fields=6, depth=1, enum_size=3, dependencies=2, rows=2)
+
+
+def test_build_serializer():
+    serializer = build_serializer(fields=6, depth=2, enum_size=3, dependencies=2)()
+    assert list(serializer.fields) == [
+        *(f'field_{i}' for i in range(6)),
+        'choice',
+        'child',
+        'children',
+    ]
+    assert len(serializer.fields['choice'].choices) == 3
+    assert 'child' in serializer.fields['child'].fields
+    assert serializer.fields['children'].many
+
+    serializer_class = build_serializer(fields=6, depth=1, enum_size=3)
+    data = serializer_class(build_row(SMOKE_PROFILE)).data
+    assert data['child']['choice'] == 'option_0'
+    assert data['children'] == [data['child']]
+
+
+def test_run_and_compare(tmp_path):
+    results = run.run((SMOKE_PROFILE,), number=1, repeat=1)
+    assert set(results['results']) == {
+        f'smoke/{case}/{variant}'
+        for case, variants in (
+            ('schema', ('uncached',)),
+            ('ui_schema', ('uncached',)),
+            ('columns', ('uncached',)),
+            ('render_retrieve', ('cached', 'uncached')),
+            ('render_list', ('cached', 'uncached')),
+            ('request_list', ('cached', 'uncached')),
+            ('request_retrieve', ('cached', 'uncached')),
+            ('request_create_form', ('cached', 'uncached')),
+        )
+        for variant in variants
+    }
+    baseline = json.loads(json.dumps(results))
+    assert run.compare(results, baseline, max_regression=0.1) == []
+    baseline['results']['smoke/schema/uncached']['min_us'] /= 2
+    assert run.compare(results, baseline, max_regression=0.1) == [
+        'smoke/schema/uncached'
+    ]
+
+    output = tmp_path / 'results.json'
+    assert (
+        run.main(
+            [
+                '--profile',
+                'small',
+                '--filter',
+                'small/columns',
+                '--number',
+                '1',
+                '--repeat',
+                '1',
+                '--output',
+                str(output),
+            ]
+        )
+        == 0
+    )
+    assert list(json.loads(output.read_text())['results']) == ['small/columns/uncached']
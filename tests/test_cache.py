@@ -0,0 +1,306 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import caches
+from django.test import override_settings
+from django.utils import translation
+from django.utils.functional import Promise
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+
+from drf_react_template.cache import (
+    SchemaVariantCache,
+    VariantCacheStats,
+    get_cache_key,
+    get_definition_hash,
+    get_package_version,
+    get_shared_cache_key,
+    is_cache_enabled,
+    schema_cache,
+)
+from drf_react_template.renderers import JSONSerializerRenderer
+from drf_react_template.schema_form_encoder import (
+    FormSchemaProcessor,
+    SerializerEncoder,
+)
+from example.polls import models
+from example.polls.serializers import ChoiceSerializer, QuestionSerializer
+from tests import factories
+
+
+class View:
+    def __init__(self, action):
+        self.action = action
+
+
+def encode(serializer, action='retrieve'):
+    return SerializerEncoder(renderer_context={'view': View(action)}).default(
+        serializer
+    )
+
+
+def test_schema_is_cached_per_serializer_class():
+    first = encode(QuestionSerializer())
+    second = encode(QuestionSerializer())
+
+    assert first is second
+    assert get_cache_key(QuestionSerializer, 'retrieve') in schema_cache
+
+
+def test_schema_cache_key_includes_action_and_language():
+    retrieve = encode(ChoiceSerializer(), action='retrieve')
+    listing = encode(ChoiceSerializer(), action='list')
+    with translation.override('fr'):
+        translated = encode(ChoiceSerializer(), action='retrieve')
+
+    assert retrieve is not listing
+    assert retrieve is not translated
+    assert get_cache_key(ChoiceSerializer, 'list') in schema_cache
+    with translation.override('fr'):
+        assert get_cache_key(ChoiceSerializer, 'retrieve') in schema_cache
+
+
+def test_schema_cache_opt_out():
+    class DynamicSerializer(ChoiceSerializer):
+        class Meta(ChoiceSerializer.Meta):
+            schema_cache = False
+
+    assert not is_cache_enabled(DynamicSerializer)
+    assert encode(DynamicSerializer()) is not encode(DynamicSerializer())
+    assert len(schema_cache) == 0
+
+
+def test_schema_cache_opt_out_nested():
+    calls = iter(range(100))
+
+    class CountedSerializer(ChoiceSerializer):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.fields['choice_text'].label = f'Choice {next(calls)}'
+
+        class Meta(ChoiceSerializer.Meta):
+            schema_cache = False
+
+    class ParentSerializer(QuestionSerializer):
+        choices = CountedSerializer(many=True)
+
+    assert not is_cache_enabled(ParentSerializer)
+    labels = {
+        encode(ParentSerializer())['schema']['properties']['choices']['items'][
+            'properties'
+        ]['choice_text']['title']
+        for _i in range(2)
+    }
+    assert len(labels) == 2
+    assert len(schema_cache) == 0
+
+
+def test_schema_cache_disabled_by_setting():
+    with override_settings(DRF_REACT_TEMPLATE_SCHEMA_CACHE=False):
+        assert not is_cache_enabled(ChoiceSerializer)
+        encode(ChoiceSerializer())
+    assert len(schema_cache) == 0
+
+
+@pytest.mark.parametrize(
+    ['setting', 'cleared'],
+    (['DRF_REACT_TEMPLATE_TYPE_MAP', True], ['UNRELATED_SETTING', False]),
+)
+def test_schema_cache_cleared_on_setting_changed(setting, cleared):
+    class CustomFieldSerializer(serializers.Serializer):
+        uuid_field = serializers.UUIDField()
+
+        class Meta:
+            fields = ('uuid_field',)
+
+    encode(CustomFieldSerializer())
+    with override_settings(**{setting: {'UUIDField': {'type': 'uuid'}}}):
+        assert (len(schema_cache) == 0) is cleared
+
+
+def test_cached_schema_resolves_translations():
+    class TranslatedSerializer(serializers.Serializer):
+        votes = serializers.ChoiceField(
+            label=_('Votes'), help_text=_('Votes'), choices=[(1, _('Yes'))]
+        )
+
+        class Meta:
+            fields = ('votes',)
+
+    uncached = FormSchemaProcessor(TranslatedSerializer(), {}).get_schema()
+    cached = encode(TranslatedSerializer())
+    schema = cached['schema']['properties']['votes']
+
+    assert isinstance(uncached['properties']['votes']['title'], Promise)
+    assert schema == {
+        'type': 'string',
+        'title': 'Votes',
+        'enum': [1],
+        'enumNames': ['Yes'],
+    }
+    assert type(schema['title']) is str
+    assert type(schema['enumNames'][0]) is str
+    assert all(type(value) is str for value in cached['uiSchema']['votes'].values())
+
+
+def test_schema_cache_languages(settings):
+    settings.DRF_REACT_TEMPLATE_SCHEMA_CACHE_LANGUAGES = 2
+    for language in ('en', 'fr', 'de'):
+        with translation.override(language):
+            encode(ChoiceSerializer())
+
+    assert schema_cache.languages == ('fr', 'de')
+    with translation.override('en'):
+        assert get_cache_key(ChoiceSerializer, 'retrieve') not in schema_cache
+
+    with translation.override('fr'):
+        encode(ChoiceSerializer())
+    with translation.override('en'):
+        encode(ChoiceSerializer())
+    assert schema_cache.languages == ('fr', 'en')
+    with translation.override('de'):
+        assert get_cache_key(ChoiceSerializer, 'retrieve') not in schema_cache
+
+
+def test_schema_variant_cache_evicts_by_entries_and_bytes(settings):
+    settings.DRF_REACT_TEMPLATE_VARIANT_CACHE_MAX_ENTRIES = 3
+    settings.DRF_REACT_TEMPLATE_VARIANT_CACHE_MAX_BYTES = 10
+    cache = SchemaVariantCache()
+    for key, value in (('a', b'aaa'), ('b', b'bbb'), ('c', b'c')):
+        cache.get_or_build(key, lambda: value)
+    assert cache.get_or_build('a', lambda: None) == b'aaa'
+
+    # Over the entry count: the least recently used entry is evicted.
+    cache.get_or_build('d', lambda: b'd')
+    assert 'b' not in cache
+    # Over the entry count and the byte budget.
+    cache.get_or_build('e', lambda: b'eeeeee')
+    assert list(cache._entries) == ['a', 'd', 'e']
+    # Over the byte budget only.
+    cache.get_or_build('f', lambda: b'ffffffff')
+    assert list(cache._entries) == ['f']
+    # Larger than the byte budget, never stored.
+    assert cache.get_or_build('g', lambda: b'g' * 11) == b'g' * 11
+    assert 'g' not in cache
+
+    assert cache.get_stats() == VariantCacheStats(
+        hits=1, misses=7, evictions=5, entries=1, resident_bytes=8
+    )
+
+
+SHARED_CACHE_SETTINGS = {
+    'CACHES': {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'schemas': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'schemas',
+        },
+    },
+    'DRF_REACT_TEMPLATE_SHARED_CACHE': 'schemas',
+}
+
+
+@override_settings(**SHARED_CACHE_SETTINGS)
+def test_shared_cache():
+    renderer = JSONSerializerRenderer()
+    renderer_context = {'view': View('retrieve')}
+    data = {'serializer': QuestionSerializer(), 'formData': {}}
+    shared_cache = caches['schemas']
+    shared_cache.clear()
+
+    expected = renderer.render(data, None, renderer_context)
+    assert len(shared_cache._cache) == 1
+
+    # A process with an empty cache does not generate the schema.
+    schema_cache.clear()
+    with mock.patch.object(
+        FormSchemaProcessor, 'get_schemas', side_effect=AssertionError
+    ):
+        assert renderer.render(data, None, renderer_context) == expected
+
+    renderer.render(data, None, {**renderer_context, 'indent': 2})
+    with translation.override('fr'):
+        renderer.render(data, None, renderer_context)
+    assert len(shared_cache._cache) == 3
+
+
+@override_settings(**SHARED_CACHE_SETTINGS)
+def test_shared_cache_schema_hash(api_client, polls_list_url):
+    shared_cache = caches['schemas']
+    shared_cache.clear()
+    schema_hash = SerializerEncoder(
+        renderer_context={'view': View('retrieve')}
+    ).get_schema_hash(QuestionSerializer())
+    # The hash and the schema by hash.
+    assert len(shared_cache._cache) == 2
+
+    # A process with an empty cache neither generates the schema to hash it
+    # nor to serve it by hash.
+    schema_cache.clear()
+    with mock.patch.object(
+        FormSchemaProcessor, 'get_schemas', side_effect=AssertionError
+    ):
+        assert (
+            SerializerEncoder(
+                renderer_context={'view': View('retrieve')}
+            ).get_schema_hash(QuestionSerializer())
+            == schema_hash
+        )
+        response = api_client.get(f'{polls_list_url}schema/{schema_hash}/')
+    assert response.json()['schemaHash'] == schema_hash
+    assert response.json()['serializer'] == encode(QuestionSerializer())
+
+
+def test_definition_hash():
+    class RelabelledSerializer(QuestionSerializer):
+        question_text = serializers.CharField(label='Question')
+
+    assert get_definition_hash(QuestionSerializer()) == get_definition_hash(
+        QuestionSerializer()
+    )
+    assert get_definition_hash(QuestionSerializer()) != get_definition_hash(
+        RelabelledSerializer()
+    )
+
+    class RestyledSerializer(QuestionSerializer):
+        def __init__(self, *args, restyle=False, **kwargs):
+            super().__init__(*args, **kwargs)
+            if restyle:
+                self.fields['question_text'].style['ui:widget'] = 'text'
+
+    assert get_definition_hash(RestyledSerializer()) != get_definition_hash(
+        RestyledSerializer(restyle=True)
+    )
+    definition_hash = get_definition_hash(QuestionSerializer())
+    with override_settings(DRF_REACT_TEMPLATE_MAX_DEPTH=1):
+        assert get_definition_hash(QuestionSerializer()) != definition_hash
+    assert get_shared_cache_key(QuestionSerializer(), 'retrieve').startswith(
+        'drf-react-template:schema:'
+    )
+    assert get_package_version()
+
+
+@pytest.mark.django_db
+def test_definition_hash_ignores_table_data(django_assert_num_queries):
+    class RelatedSerializer(serializers.Serializer):
+        question = serializers.PrimaryKeyRelatedField(
+            queryset=models.Question.objects.all()
+        )
+        questions = serializers.PrimaryKeyRelatedField(
+            queryset=models.Question.objects.filter(pk__gt=0), many=True
+        )
+        text = serializers.CharField(
+            validators=[UniqueValidator(queryset=models.Question.objects.all())]
+        )
+
+    with django_assert_num_queries(0):
+        definition_hash = get_definition_hash(RelatedSerializer())
+    factories.QuestionFactory()
+    assert get_definition_hash(RelatedSerializer()) == definition_hash
+
+
+def test_definition_hash_self_referential():
+    from tests.test_schema_form_encoder import CategorySerializer
+
+    assert get_definition_hash(CategorySerializer())
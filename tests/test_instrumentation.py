@@ -0,0 +1,124 @@
+import pytest
+from rest_framework import status
+
+from drf_react_template.instrumentation import Timings, form_schema_timings
+from example.polls.viewsets import PollViewSet, StreamingPollViewSet
+
+
+def test_timings_nested_phases_are_exclusive(monkeypatch):
+    clock = iter([0.0, 1.0, 3.0, 6.0, 10.0, 15.0])
+    monkeypatch.setattr(
+        'drf_react_template.instrumentation.perf_counter', lambda: next(clock)
+    )
+    timings = Timings()
+    timings.start('outer')
+    with timings.measure('inner'):
+        pass
+    with timings.measure('inner'):
+        pass
+    timings.stop('outer')
+    assert timings.durations == {'inner': 6000.0, 'outer': 9000.0}
+
+
+def test_timings_stop_unknown_phase_and_unclosed_nested_phase():
+    timings = Timings()
+    timings.stop('missing')
+    timings.start('outer')
+    timings.start('inner')
+    timings.stop('outer')
+    assert list(timings.durations) == ['outer']
+    timings.stop('inner')
+    assert list(timings.durations) == ['outer']
+
+
+def test_server_timing_header_value():
+    timings = Timings()
+    timings.durations = {'schema': 1.23456, 'encode': 0.5}
+    timings.set_cache('schema', False)
+    timings.set_size('payload', 1024)
+    assert timings.get_server_timing() == (
+        'schema;dur=1.235, encode;dur=0.500, schema-cache;desc=miss, '
+        'payload-size;desc=1024'
+    )
+
+
+@pytest.fixture
+def received_timings():
+    received = []
+
+    def receiver(sender, view, request, timings, **kwargs):
+        received.append((sender, view.action, timings))
+
+    form_schema_timings.connect(receiver, sender=PollViewSet)
+    yield received
+    form_schema_timings.disconnect(receiver, sender=PollViewSet)
+
+
+@pytest.mark.django_db
+def test_server_timing_header(api_client, polls_list_url, settings):
+    response = api_client.get(polls_list_url)
+    assert 'Server-Timing' not in response
+
+    settings.DRF_REACT_TEMPLATE_SERVER_TIMING = True
+    response = api_client.get(polls_list_url)
+    assert response.status_code == status.HTTP_200_OK
+    metrics = dict(m.split(';', 1) for m in response['Server-Timing'].split(', '))
+    assert set(metrics) == {
+        'form_data',
+        'serializer',
+        'encode',
+        'schema_bytes-cache',
+        'schema-size',
+        'payload-size',
+    }
+    assert metrics['schema_bytes-cache'] == 'desc=hit'
+    assert metrics['payload-size'] == f'desc={len(response.content)}'
+
+    settings.DRF_REACT_TEMPLATE_SERVER_TIMING = False
+    PollViewSet.server_timing = True
+    try:
+        response = api_client.get(polls_list_url)
+    finally:
+        PollViewSet.server_timing = None
+    assert 'Server-Timing' in response
+
+
+@pytest.mark.django_db
+def test_timings_signal(api_client, polls_create_url, received_timings):
+    api_client.get(polls_create_url)
+    api_client.get(polls_create_url)
+    response = api_client.get(polls_create_url, HTTP_IF_NONE_MATCH='*')
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert 'Server-Timing' not in response
+
+    (sender, action, first), (_s, _a, second), (_s, _a, not_modified) = received_timings
+    assert (sender, action) == (PollViewSet, 'create_form')
+    assert set(first.durations) == {'form_data', 'serializer', 'schema', 'encode'}
+    assert first.cache == {'schema': False, 'schema_hash': False, 'schema_bytes': False}
+    assert first.sizes['payload'] > first.sizes['schema'] > 0
+    assert set(second.durations) == {'form_data', 'encode'}
+    assert second.cache == {'schema_hash': True, 'schema_bytes': True}
+    assert second.sizes == first.sizes
+    assert not_modified.sizes == {'payload': 0}
+
+
+@pytest.mark.django_db
+def test_streaming_list_timings(api_client, settings):
+    received = []
+
+    def receiver(sender, view, request, timings, **kwargs):
+        received.append(timings)
+
+    settings.DRF_REACT_TEMPLATE_SERVER_TIMING = True
+    form_schema_timings.connect(receiver, sender=StreamingPollViewSet)
+    try:
+        response = api_client.get('/polls-stream/')
+    finally:
+        form_schema_timings.disconnect(receiver, sender=StreamingPollViewSet)
+
+    assert response.streaming
+    (timings,) = received
+    assert {'form_data', 'serializer'} <= set(timings.durations)
+    assert 'encode' not in timings.durations
+    assert timings.sizes['schema'] > 0
+    assert response['Server-Timing'] == timings.get_server_timing()
@@ -0,0 +1,89 @@
+import pstats
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from drf_react_template.cache import schema_cache
+from drf_react_template.profiling import CollapsedStackProfiler, get_schema_target
+from example.polls.serializers import QuestionListSerializer, QuestionSerializer
+
+VIEWSET_PATH = 'example.polls.viewsets.PollViewSet'
+
+
+def _call(*args):
+    stdout = StringIO()
+    call_command('profile_form_schema', *args, stdout=stdout, stderr=StringIO())
+    return stdout.getvalue()
+
+
+def test_get_schema_target():
+    serializer, renderer_context = get_schema_target(VIEWSET_PATH, 'list')
+    assert isinstance(serializer, QuestionListSerializer)
+    assert renderer_context['view'].action == 'list'
+
+    serializer, renderer_context = get_schema_target(
+        'example.polls.serializers.QuestionSerializer', 'create_form'
+    )
+    assert isinstance(serializer, QuestionSerializer)
+    assert renderer_context['view'].action == 'create_form'
+
+
+def test_profile_cprofile(tmp_path):
+    output = tmp_path / 'schema.prof'
+    result = _call(VIEWSET_PATH, '--iterations', '3', '--output', str(output))
+    assert 'schema_form_encoder.py' in result
+    assert 'ncalls' in result
+    assert pstats.Stats(str(output)).total_calls > 0
+    assert len(schema_cache) == 0
+
+
+def test_profile_tracemalloc():
+    result = _call(VIEWSET_PATH, '--mode', 'tracemalloc', '--iterations', '2')
+    assert result.startswith('Traced memory: current')
+
+
+def test_profile_tracemalloc_without_reset_peak(monkeypatch):
+    # tracemalloc.reset_peak() only exists on Python 3.9+.
+    monkeypatch.delattr('tracemalloc.reset_peak', raising=False)
+    result = _call(VIEWSET_PATH, '--mode', 'tracemalloc', '--iterations', '1')
+    assert result.startswith('Traced memory: current')
+
+
+def test_profile_collapsed():
+    result = _call(
+        'example.polls.serializers.QuestionSerializer',
+        '--mode',
+        'collapsed',
+        '--iterations',
+        '3',
+    )
+    lines = result.splitlines()
+    assert lines
+    for line in lines:
+        stack, weight = line.rsplit(' ', 1)
+        assert int(weight) > 0
+        assert stack.startswith('profiling:')
+    assert any('FormSchemaProcessor.get_schemas' in line for line in lines)
+
+
+def test_profile_invalid_path():
+    with pytest.raises(CommandError):
+        _call('example.polls.models.Question')
+    with pytest.raises(CommandError):
+        _call('example.polls.viewsets.MissingViewSet')
+
+
+def test_collapsed_stack_profiler():
+    def leaf():
+        return sum(range(1000))
+
+    def root():
+        return leaf() + leaf()
+
+    profiler = CollapsedStackProfiler()
+    profiler.run(root, iterations=5)
+    assert any(
+        len(stack) > 1 and stack[-2].endswith('root') and stack[-1].endswith('leaf')
+        for stack in profiler.stacks
+    )
@@ -0,0 +1,190 @@
+import json
+from decimal import Decimal
+
+import pytest
+from rest_framework import serializers
+from rest_framework.renderers import (
+    INDENT_SEPARATORS,
+    LONG_SEPARATORS,
+    SHORT_SEPARATORS,
+)
+
+from drf_react_template.cache import get_cache_key, get_dynamic_fields, schema_cache
+from drf_react_template.renderers import JSONSerializerRenderer
+from drf_react_template.schema_form_encoder import SerializerEncoder
+from example.polls.serializers import (
+    ChoiceSerializer,
+    QuestionListSerializer,
+    QuestionSerializer,
+)
+
+
+class View:
+    def __init__(self, action):
+        self.action = action
+
+
+def reference_render(renderer, data, indent, renderer_context):
+    if indent is None:
+        separators = SHORT_SEPARATORS if renderer.compact else LONG_SEPARATORS
+    else:
+        separators = INDENT_SEPARATORS
+    ret = json.dumps(
+        data,
+        cls=SerializerEncoder,
+        indent=indent,
+        ensure_ascii=renderer.ensure_ascii,
+        allow_nan=not renderer.strict,
+        separators=separators,
+        renderer_context=renderer_context,
+    )
+    ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+    return ret.encode('utf-8')
+
+
+@pytest.mark.parametrize('indent', (None, 2, 4))
+@pytest.mark.parametrize('compact', (True, False))
+@pytest.mark.parametrize('ensure_ascii', (True, False))
+@pytest.mark.parametrize(
+    ['serializer_class', 'action', 'form_data'],
+    (
+        [QuestionSerializer, 'retrieve', {}],
+        [
+            QuestionSerializer,
+            'retrieve',
+            {
+                'question_text': 'Caf\u00e9 \u2028 line',
+                'pub_date': '2020-01-01',
+                'choices': [{'choice_text': 'Yes', 'votes': Decimal('1.5')}],
+            },
+        ],
+        [QuestionListSerializer, 'list', []],
+        [QuestionListSerializer, 'list', [{'question_text': 'a', 'pub_date': None}]],
+    ),
+)
+def test_render_matches_single_pass_encoding(
+    serializer_class, action, form_data, indent, compact, ensure_ascii
+):
+    renderer = JSONSerializerRenderer()
+    renderer.compact = compact
+    renderer.ensure_ascii = ensure_ascii
+    renderer_context = {'view': View(action), 'indent': indent}
+    data = {'serializer': serializer_class(), 'formData': form_data}
+
+    expected = reference_render(renderer, data, indent, renderer_context)
+    assert renderer.render(data, None, renderer_context) == expected
+    # Second render is served from the pre-encoded schema bytes.
+    assert renderer.render(data, None, renderer_context) == expected
+
+
+def test_render_caches_schema_bytes_per_encoding_option():
+    renderer = JSONSerializerRenderer()
+    data = {'serializer': QuestionSerializer(), 'formData': {}}
+
+    renderer.render(data, None, {'view': View('retrieve')})
+    entries = len(schema_cache)
+    renderer.render(data, None, {'view': View('retrieve')})
+    assert len(schema_cache) == entries
+
+    renderer.render(data, None, {'view': View('retrieve'), 'indent': 2})
+    assert len(schema_cache) == entries + 1
+
+
+def test_render_without_serializer():
+    renderer = JSONSerializerRenderer()
+
+    assert renderer.render(None) == b''
+    assert renderer.render({'detail': 'Not found.'}) == b'{"detail":"Not found."}'
+
+
+class ContextOwner:
+    requires_context = True
+
+    def __call__(self, serializer_field):
+        return serializer_field.context['owner']
+
+
+class OwnedQuestionSerializer(QuestionSerializer):
+    owner = serializers.CharField(default=ContextOwner())
+
+    class Meta:
+        fields = ('question_text', 'pub_date', 'owner', 'choices')
+        schema_dynamic_fields = ('owner',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        owner = self.context['owner']
+        self.fields['owner'].label = f'Owner ({owner})'
+        self.fields['owner'].style = {'ui:placeholder': owner}
+
+
+@pytest.mark.parametrize('action', ('retrieve', 'list'))
+def test_render_dynamic_fields(action):
+    renderer = JSONSerializerRenderer()
+    renderer_context = {'view': View(action)}
+
+    for owner in ('alice', 'bob', 'alice'):
+        data = {
+            'serializer': OwnedQuestionSerializer(context={'owner': owner}),
+            'formData': {},
+        }
+        expected = reference_render(renderer, data, None, renderer_context)
+        assert renderer.render(data, None, renderer_context) == expected
+
+    cache_key = get_cache_key(OwnedQuestionSerializer, action)
+    assert cache_key in schema_cache
+    # Neither the encoded bytes nor the hash include the overlay.
+    assert (*cache_key, None, SHORT_SEPARATORS, True, True) not in schema_cache
+    assert SerializerEncoder().get_static_cache_key(data['serializer']) is None
+    serializer = json.loads(expected)['serializer']
+    if action == 'list':
+        assert [column['title'] for column in serializer] == [
+            'Question text',
+            'date published',
+            'Owner (alice)',
+        ]
+    else:
+        assert list(serializer['schema']['properties']) == [
+            'question_text',
+            'pub_date',
+            'choices',
+            'owner',
+        ]
+        assert serializer['schema']['properties']['owner'] == {
+            'type': 'string',
+            'title': 'Owner (alice)',
+            'default': 'alice',
+        }
+        assert serializer['uiSchema']['owner'] == {'ui:placeholder': 'alice'}
+
+
+current_owner = ['alice']
+
+
+class OwnedChoiceSerializer(ChoiceSerializer):
+    class Meta(ChoiceSerializer.Meta):
+        schema_dynamic_fields = ('choice_text',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['choice_text'].style = {'ui:placeholder': current_owner[0]}
+
+
+class OwnedChoicesSerializer(QuestionSerializer):
+    choices = OwnedChoiceSerializer(many=True)
+
+
+def test_render_nested_dynamic_fields():
+    renderer = JSONSerializerRenderer()
+    renderer_context = {'view': View('retrieve')}
+
+    for owner in ('alice', 'bob', 'alice'):
+        current_owner[0] = owner
+        data = {'serializer': OwnedChoicesSerializer(), 'formData': {}}
+        expected = reference_render(renderer, data, None, renderer_context)
+        assert renderer.render(data, None, renderer_context) == expected
+        ui_schema = json.loads(expected)['serializer']['uiSchema']
+        assert ui_schema['choices']['items']['choice_text'] == {'ui:placeholder': owner}
+
+    assert get_dynamic_fields(OwnedChoicesSerializer) == {'choices'}
+    assert get_cache_key(OwnedChoicesSerializer, 'retrieve') in schema_cache
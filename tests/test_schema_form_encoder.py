@@ -1,3 +1,5 @@
+import threading
+
 import pytest
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
@@ -8,9 +10,13 @@ from drf_react_template.schema_form_encoder import (
     DEPENDENCY_DYNAMIC_KEY,
     DEPENDENCY_OVERRIDE_KEY,
     DEPENDENCY_SIMPLE_KEY,
+    REMOTE_ENUM_KEY,
     SCHEMA_OVERRIDE_KEY,
     UI_SCHEMA_OVERRIDE_KEY,
     ColumnProcessor,
+    FieldPlan,
+    FormSchemaProcessor,
+    ProcessingMixin,
     SchemaProcessor,
     UiSchemaProcessor,
 )
@@ -405,6 +411,102 @@ def test_extra_field_type(custom_field_type_expected_schema):
     assert result['properties'] == custom_field_type_expected_schema
 
 
+def test_extra_field_type_does_not_leak():
+    type_map = dict(ProcessingMixin.TYPE_MAP)
+
+    class UUIDSerializer(serializers.Serializer):
+        uuid_field = serializers.UUIDField()
+
+    SchemaProcessor(UUIDSerializer(), {}, extra_types={'UUIDField': {'type': 'uuid'}})
+    assert ProcessingMixin.TYPE_MAP == type_map
+    result = SchemaProcessor(UUIDSerializer(), {}).get_schema()
+    assert result['properties']['uuid_field'].get('type') is None
+
+
+def test_field_type_subclass():
+    class SlugLikeField(serializers.CharField):
+        pass
+
+    class SubclassSerializer(serializers.Serializer):
+        slug = SlugLikeField()
+        email = serializers.EmailField()
+
+        class Meta:
+            fields = ('slug', 'email')
+
+    result = SchemaProcessor(SubclassSerializer(), {}).get_schema()
+    assert result['properties']['slug']['type'] == 'string'
+    assert result['properties']['email']['type'] == 'string'
+    ui_result = UiSchemaProcessor(SubclassSerializer(), {}).get_ui_schema()
+    assert ui_result['email']['ui:widget'] == 'email'
+
+
+def test_field_type_multiple_choice():
+    class TagsSerializer(serializers.Serializer):
+        tags = serializers.MultipleChoiceField(choices=[('a', 'Alpha'), ('b', 'Beta')])
+
+        class Meta:
+            fields = ('tags',)
+
+    result = SchemaProcessor(TagsSerializer(), {}).get_schema()
+    assert result['properties']['tags'] == {
+        'type': 'array',
+        'title': 'Tags',
+        'items': {'type': 'string', 'enum': ['a', 'b'], 'enumNames': ['Alpha', 'Beta']},
+        'uniqueItems': True,
+    }
+    ui_result = UiSchemaProcessor(TagsSerializer(), {}).get_ui_schema()
+    assert ui_result['tags'] == {'ui:widget': 'checkbox'}
+
+
+def test_field_type_setting(settings):
+    class UUIDSerializer(serializers.Serializer):
+        uuid_field = serializers.UUIDField()
+
+    settings.DRF_REACT_TEMPLATE_TYPE_MAP = {'UUIDField': {'type': 'uuid'}}
+    result = SchemaProcessor(UUIDSerializer(), {}).get_schema()
+    assert result['properties']['uuid_field']['type'] == 'uuid'
+    settings.DRF_REACT_TEMPLATE_TYPE_MAP = {'UUIDField': {'type': 'guid'}}
+    result = SchemaProcessor(UUIDSerializer(), {}).get_schema()
+    assert result['properties']['uuid_field']['type'] == 'guid'
+
+
+def test_field_type_concurrent_extra_types():
+    class NestedUUIDSerializer(serializers.Serializer):
+        uuid_field = serializers.UUIDField()
+
+    class UUIDSerializer(serializers.Serializer):
+        uuid_field = serializers.UUIDField()
+        nested = NestedUUIDSerializer()
+
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def build(type_name):
+        barrier.wait()
+        for _i in range(200):
+            result = SchemaProcessor(
+                UUIDSerializer(), {}, extra_types={'UUIDField': {'type': type_name}}
+            ).get_schema()
+            nested = result['properties']['nested']['properties']
+            if not (
+                result['properties']['uuid_field']['type']
+                == nested['uuid_field']['type']
+                == type_name
+            ):
+                errors.append(type_name)
+
+    threads = [
+        threading.Thread(target=build, args=(f'uuid-{i % 2}',)) for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert 'UUIDField' not in ProcessingMixin.TYPE_MAP
+
+
 def test_validation_schema():
     class MinSizeImageValidator:
         message = _('Image is too small, must be 1KB minimum.')
@@ -446,3 +548,407 @@ def test_validation_schema():
     assert ui_result['image_field']['ui:custom-validators'] == [
         {'code': 'image_min_1KB', 'message': 'Image is too small, must be 1KB minimum.'}
     ]
+
+
+def test_field_plan_compiled_once_per_serializer_class():
+    processor = SchemaProcessor(QuestionSerializer(), {}, cache_plans=True)
+    assert isinstance(processor.plans['question_text'], FieldPlan)
+    assert processor.plans['pub_date'].widget == 'DatePickerWidget'
+    assert processor.plans['choices'].is_list_serializer
+
+    ui_processor = UiSchemaProcessor(QuestionSerializer(), {}, cache_plans=True)
+    assert ui_processor.plans is processor.plans
+    assert (
+        ColumnProcessor(QuestionListSerializer(), {}, cache_plans=True).plans
+        is not processor.plans
+    )
+    assert SchemaProcessor(QuestionSerializer(), {}).plans is not processor.plans
+
+
+def test_field_plan_instance_styled_in_init():
+    class StyledSerializer(serializers.Serializer):
+        votes = serializers.IntegerField()
+
+        def __init__(self, *args, hidden=False, **kwargs):
+            super().__init__(*args, **kwargs)
+            if hidden:
+                self.fields['votes'].style = {'ui:widget': 'hidden'}
+
+        class Meta:
+            fields = ('votes',)
+
+    hidden = {'ui:widget': 'hidden'}
+    assert (
+        UiSchemaProcessor(StyledSerializer(hidden=True), {}).get_ui_schema()['votes']
+        == hidden
+    )
+    UiSchemaProcessor(StyledSerializer(), {}).get_ui_schema()
+    assert (
+        UiSchemaProcessor(StyledSerializer(hidden=True), {}).get_ui_schema()['votes']
+        == hidden
+    )
+
+
+def test_field_plan_instance_fields_diverging_from_class():
+    class InstanceFieldSerializer(ChoiceSerializer):
+        def get_fields(self):
+            result = super().get_fields()
+            if self.context.get('hidden'):
+                result['votes'] = serializers.CharField(style={'ui:widget': 'hidden'})
+            return result
+
+    result = UiSchemaProcessor(InstanceFieldSerializer(), {}).get_ui_schema()
+    assert result['votes'] == {'ui:widget': 'updown'}
+
+    result = UiSchemaProcessor(
+        InstanceFieldSerializer(context={'hidden': True}), {}
+    ).get_ui_schema()
+    assert result['votes'] == {'ui:widget': 'hidden'}
+
+
+def _build_nested_serializer(depth):
+    class ValidatedSerializer(serializers.Serializer):
+        choice = serializers.ChoiceField(
+            choices=(('a', 'A'), ('b', 'B')),
+            style={DEPENDENCY_DYNAMIC_KEY: {'a': ['note'], 'b': None}},
+        )
+        note = serializers.CharField(
+            max_length=10, help_text='A note', style={'ui:placeholder': 'Note'}
+        )
+        tags = serializers.ListField(child=serializers.EmailField(), min_length=1)
+        secret = serializers.CharField(style={UI_SCHEMA_OVERRIDE_KEY: {'x': 1}})
+
+        class Meta:
+            fields = ('choice', 'note', 'tags', 'secret')
+
+    serializer_class = ValidatedSerializer
+    for level in range(depth):
+        attrs = {
+            'text': serializers.CharField(style={DEPENDENCY_CONDITIONAL_KEY: 'votes'}),
+            'votes': serializers.IntegerField(default=level),
+            'child': serializer_class(),
+            'children': serializer_class(many=True, required=False),
+            'Meta': type(
+                'Meta', (), {'fields': ('text', 'votes', 'child', 'children')}
+            ),
+        }
+        serializer_class = type(
+            f'Level{level}Serializer', (serializers.Serializer,), attrs
+        )
+    return serializer_class
+
+
+@pytest.mark.parametrize('depth', (0, 1, 3, 6))
+def test_form_schema_processor_matches_separate_processors(depth):
+    serializer = _build_nested_serializer(depth)()
+    schema, ui_schema = FormSchemaProcessor(serializer, {}).get_schemas()
+    assert schema == SchemaProcessor(serializer, {}).get_schema()
+    assert ui_schema == UiSchemaProcessor(serializer, {}).get_ui_schema()
+
+
+def test_form_schema_processor_list_serializer(
+    question_and_choice_retrieve_expected_schema,
+    question_and_choice_retrieve_expected_ui_schema,
+):
+    schema, ui_schema = FormSchemaProcessor(QuestionSerializer(), {}).get_schemas()
+    assert schema == question_and_choice_retrieve_expected_schema
+    assert ui_schema == question_and_choice_retrieve_expected_ui_schema
+
+    serializer = ChoiceSerializer(many=True)
+    schema, ui_schema = FormSchemaProcessor(serializer, {}).get_schemas()
+    assert schema == SchemaProcessor(serializer, {}).get_schema()
+    assert ui_schema == UiSchemaProcessor(serializer, {}).get_ui_schema()
+
+
+def test_dependencies_keep_required_order():
+    class OrderedDependencySerializer(serializers.Serializer):
+        first = serializers.CharField(style={DEPENDENCY_SIMPLE_KEY: 'third'})
+        second = serializers.CharField()
+        third = serializers.CharField()
+        fourth = serializers.ChoiceField(
+            choices=(('a', 'A'), ('b', 'B')),
+            style={DEPENDENCY_DYNAMIC_KEY: {'b': 'fifth'}},
+        )
+        fifth = serializers.CharField()
+
+    result = SchemaProcessor(OrderedDependencySerializer(), {}).get_schema()
+    assert result['required'] == ['first', 'second', 'fourth']
+    assert result['dependencies']['fourth']['oneOf'][0]['properties']['fourth'] == {
+        **result['properties']['fourth'],
+        'enum': ['b'],
+        'enumNames': ['B'],
+    }
+
+    result = SchemaProcessor(OrderedDependencySerializer(many=True), {}).get_schema()
+    assert result['items']['required'] == ['first', 'second', 'fourth']
+
+
+class AddressSerializer(serializers.Serializer):
+    street = serializers.CharField(help_text='Street and number')
+    kind = serializers.ChoiceField(
+        choices=(('home', 'Home'), ('work', 'Work')),
+        style={DEPENDENCY_DYNAMIC_KEY: {'work': ['company']}},
+    )
+    company = serializers.CharField()
+
+    class Meta:
+        fields = ('street', 'kind', 'company')
+
+
+class ContactSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    address = AddressSerializer(label='Contact address')
+
+    class Meta:
+        fields = ('name', 'address')
+
+
+class OrderSerializer(serializers.Serializer):
+    reference = serializers.CharField()
+    billing = AddressSerializer()
+    shipping = AddressSerializer(label='Ship to', style={'ui:order': ['*']})
+    contact = ContactSerializer()
+    other_contacts = ContactSerializer(many=True, required=False)
+
+    class Meta:
+        fields = ('reference', 'billing', 'shipping', 'contact', 'other_contacts')
+
+
+def _resolve_refs(value, definitions):
+    if isinstance(value, dict):
+        if '$ref' in value:
+            name = value['$ref'].rsplit('/', 1)[-1]
+            local = {k: v for k, v in value.items() if k != '$ref'}
+            return _resolve_refs({**definitions[name], **local}, definitions)
+        return {k: _resolve_refs(v, definitions) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve_refs(v, definitions) for v in value]
+    return value
+
+
+def test_schema_definitions():
+    inline = SchemaProcessor(OrderSerializer(), {}).get_schema()
+    result = SchemaProcessor(OrderSerializer(), {}, definitions=True).get_schema()
+
+    assert list(result['definitions']) == ['AddressSerializer', 'ContactSerializer']
+    assert result['properties']['billing'] == {
+        'title': 'Billing',
+        '$ref': '#/definitions/AddressSerializer',
+    }
+    assert result['properties']['shipping']['title'] == 'Ship to'
+    assert result['properties']['other_contacts']['items'] == {
+        '$ref': '#/definitions/ContactSerializer'
+    }
+    assert result['definitions']['ContactSerializer']['properties']['address'] == {
+        'title': 'Contact address',
+        '$ref': '#/definitions/AddressSerializer',
+    }
+    assert 'title' not in result['definitions']['AddressSerializer']
+    definitions = result.pop('definitions')
+    assert _resolve_refs(result, definitions) == inline
+
+
+def test_schema_definitions_ui_schema_is_expanded():
+    inline = UiSchemaProcessor(OrderSerializer(), {}).get_ui_schema()
+    result = UiSchemaProcessor(OrderSerializer(), {}, definitions=True).get_ui_schema()
+    assert result == inline
+    assert result['shipping']['ui:order'] == ['*']
+    assert result['billing']['street'] is result['shipping']['street']
+
+    schema, ui_schema = FormSchemaProcessor(
+        OrderSerializer(), {}, definitions=True
+    ).get_schemas()
+    assert (
+        schema == SchemaProcessor(OrderSerializer(), {}, definitions=True).get_schema()
+    )
+    assert ui_schema == inline
+
+
+def test_schema_definitions_name_collision():
+    def make_serializer(field_name):
+        attrs = {field_name: serializers.CharField()}
+        attrs['Meta'] = type('Meta', (), {'fields': (field_name,)})
+        return type('AddressSerializer', (serializers.Serializer,), attrs)
+
+    class CollisionSerializer(serializers.Serializer):
+        first = make_serializer('street')()
+        second = make_serializer('city')()
+        third = AddressSerializer()
+
+    result = SchemaProcessor(CollisionSerializer(), {}, definitions=True).get_schema()
+    assert list(result['definitions']) == [
+        'AddressSerializer',
+        'AddressSerializer2',
+        'AddressSerializer3',
+    ]
+    assert result['properties']['second']['$ref'] == (
+        '#/definitions/AddressSerializer2'
+    )
+    assert list(result['definitions']['AddressSerializer2']['properties']) == ['city']
+
+
+def test_schema_definitions_setting(settings):
+    settings.DRF_REACT_TEMPLATE_SCHEMA_DEFINITIONS = True
+    result = SchemaProcessor(OrderSerializer(), {}).get_schema()
+    assert '$ref' in result['properties']['billing']
+    result = SchemaProcessor(OrderSerializer(), {}, definitions=False).get_schema()
+    assert 'definitions' not in result
+    assert 'properties' in result['properties']['billing']
+
+
+class CategorySerializer(serializers.Serializer):
+    name = serializers.CharField()
+
+    class Meta:
+        fields = ('name', 'parent', 'children')
+
+    def get_fields(self):
+        result = super().get_fields()
+        result['parent'] = CategorySerializer(required=False)
+        result['children'] = CategorySerializer(many=True, required=False)
+        return result
+
+
+def test_self_referential_serializer_is_lazy():
+    schema, ui_schema = FormSchemaProcessor(CategorySerializer(), {}).get_schemas()
+    assert schema['properties']['parent'] == {
+        'title': 'Parent',
+        'type': 'object',
+        'subSchema': 'parent',
+    }
+    assert schema['properties']['children'] == {
+        'title': 'Children',
+        'type': 'array',
+        'minItems': 0,
+        'items': {'type': 'object'},
+        'subSchema': 'children',
+    }
+    assert ui_schema['children'] == {'ui:subSchema': 'children'}
+    assert schema == SchemaProcessor(CategorySerializer(), {}).get_schema()
+    assert ui_schema == UiSchemaProcessor(CategorySerializer(), {}).get_ui_schema()
+    assert ColumnProcessor(CategorySerializer(), {}).get_schema() == [
+        {'title': 'Name', 'dataIndex': 'name', 'key': 'name'}
+    ]
+
+    schema, ui_schema = FormSchemaProcessor(
+        CategorySerializer(), {}, prefix='children.parent'
+    ).get_schemas()
+    assert schema['properties']['parent']['subSchema'] == 'children.parent.parent'
+
+
+class RouteSerializer(serializers.Serializer):
+    billing = CategorySerializer()
+    shipping = CategorySerializer(many=True)
+    contact = ContactSerializer()
+    tags = serializers.ListField(
+        child=serializers.ChoiceField(choices=['a', 'b'], style={REMOTE_ENUM_KEY: True})
+    )
+
+    class Meta:
+        fields = ('billing', 'shipping', 'contact', 'tags')
+
+
+class TaggedRouteSerializer(serializers.Serializer):
+    first = RouteSerializer()
+    second = RouteSerializer()
+
+    class Meta:
+        fields = ('first', 'second')
+
+
+def test_schema_definitions_prefix_dependent():
+    inline_schema, inline_ui_schema = FormSchemaProcessor(
+        TaggedRouteSerializer(), {}
+    ).get_schemas()
+    schema, ui_schema = FormSchemaProcessor(
+        TaggedRouteSerializer(), {}, definitions=True
+    ).get_schemas()
+
+    # Lazy references and remote enums hold the data index of the occurrence,
+    # so only their prefix-free neighbours are shared.
+    assert list(schema['definitions']) == ['ContactSerializer', 'AddressSerializer']
+    assert schema['properties']['second']['properties']['shipping']['items'][
+        'properties'
+    ]['parent'] == {
+        'title': 'Parent',
+        'type': 'object',
+        'subSchema': 'second.shipping.parent',
+    }
+    assert ui_schema['second']['billing']['parent'] == {
+        'ui:subSchema': 'second.billing.parent'
+    }
+    assert schema['properties']['second']['properties']['tags']['items'] == {
+        'type': 'string',
+        'title': '',
+        'enumSource': 'second.tags',
+    }
+    definitions = schema.pop('definitions')
+    assert _resolve_refs(schema, definitions) == inline_schema
+    assert ui_schema == inline_ui_schema
+    assert (
+        UiSchemaProcessor(TaggedRouteSerializer(), {}, definitions=True).get_ui_schema()
+        == inline_ui_schema
+    )
+    schema = SchemaProcessor(TaggedRouteSerializer(), {}, definitions=True).get_schema()
+    schema.pop('definitions')
+    assert _resolve_refs(schema, definitions) == inline_schema
+
+
+def test_max_depth(settings):
+    settings.DRF_REACT_TEMPLATE_MAX_DEPTH = 1
+    schema, ui_schema = FormSchemaProcessor(OrderSerializer(), {}).get_schemas()
+    assert 'properties' in schema['properties']['contact']
+    assert schema['properties']['contact']['properties']['address'] == {
+        'title': 'Contact address',
+        'type': 'object',
+        'subSchema': 'contact.address',
+    }
+    assert ui_schema['contact']['address'] == {'ui:subSchema': 'contact.address'}
+
+    schema = SchemaProcessor(OrderSerializer(), {}, max_depth=0).get_schema()
+    assert schema['properties']['billing']['subSchema'] == 'billing'
+
+
+class ProductSerializer(serializers.Serializer):
+    code = serializers.ChoiceField(
+        choices=[(f'P{i}', f'Product {i}') for i in range(50)]
+    )
+    codes = serializers.ListField(
+        child=serializers.ChoiceField(
+            choices=['a', 'b', 'c'], style={REMOTE_ENUM_KEY: False}
+        )
+    )
+    size = serializers.ChoiceField(choices=['S', 'M', 'L'])
+
+    class Meta:
+        fields = ('code', 'codes', 'size')
+
+
+def test_remote_enum(settings):
+    schema = SchemaProcessor(ProductSerializer(), {}).get_schema()
+    assert len(schema['properties']['code']['enum']) == 50
+
+    settings.DRF_REACT_TEMPLATE_REMOTE_ENUM_THRESHOLD = 10
+    schema = SchemaProcessor(ProductSerializer(), {}, prefix='product').get_schema()
+    assert schema['properties']['code'] == {
+        'title': 'Code',
+        'type': 'string',
+        'enumSource': 'product.code',
+    }
+    assert schema['properties']['size']['enum'] == ['S', 'M', 'L']
+    assert schema['properties']['codes']['items']['enum'] == ['a', 'b', 'c']
+
+
+def test_remote_enum_style():
+    class LetterSerializer(serializers.Serializer):
+        letter = serializers.ChoiceField(
+            choices=['a', 'b'], style={REMOTE_ENUM_KEY: True}
+        )
+
+        class Meta:
+            fields = ('letter',)
+
+    schema, ui_schema = FormSchemaProcessor(LetterSerializer(), {}).get_schemas()
+    assert schema['properties']['letter']['enumSource'] == 'letter'
+    assert 'enum' not in schema['properties']['letter']
+    assert REMOTE_ENUM_KEY not in ui_schema['letter']
@@ -0,0 +1,99 @@
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.fields import CharField
+
+from drf_react_template import store
+from drf_react_template.cache import get_cache_key, schema_cache
+from drf_react_template.warmup import export_schema_store
+from example.polls import serializers
+from example.polls.viewsets import PollViewSet
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    path = str(tmp_path / 'schemas.bin')
+    assert export_schema_store(path) == 4
+    schema_cache.clear()
+    with override_settings(DRF_REACT_TEMPLATE_SCHEMA_STORE=path):
+        yield path
+
+
+def test_schema_store_roundtrip(tmp_path):
+    path = tmp_path / 'store.bin'
+    store.write_schema_store(
+        path, [('a', 'hash-a', b'{"a":1}'), ('b', 'hash-b', b'[]')]
+    )
+    schema_store = store.SchemaStore(path)
+
+    assert len(schema_store) == 2
+    # The definition hash does not match.
+    assert schema_store.get('a', serializers.ChoiceSerializer) is None
+    with mock.patch.object(store, 'get_definition_hash', return_value='hash-b'):
+        stored = schema_store.get('b', lambda: None)
+    assert isinstance(stored, memoryview)
+    assert stored == b'[]'
+    assert schema_store.get('missing', lambda: None) is None
+
+
+def test_schema_store_serves_requests(api_client, polls_create_url, store_path):
+    expected = api_client.get(polls_create_url).content
+    schema_cache.clear()
+
+    with override_settings(DRF_REACT_TEMPLATE_SCHEMA_STORE=None):
+        assert api_client.get(polls_create_url).content == expected
+    schema_cache.clear()
+
+    response = api_client.get(polls_create_url)
+    assert response.content == expected
+    assert store.get_schema_store() is not None
+    # The schema was not encoded in this process (only hashed, for the ETag).
+    cache_key = get_cache_key(serializers.QuestionSerializer, 'create_form')
+    assert (*cache_key, None, (',', ':'), False, True) not in schema_cache
+
+
+def test_schema_store_ignores_changed_serializer(
+    api_client, polls_create_url, store_path
+):
+    class RelabelledSerializer(serializers.QuestionSerializer):
+        question_text = CharField(label='Question')
+
+        class Meta(serializers.QuestionSerializer.Meta):
+            pass
+
+    RelabelledSerializer.__qualname__ = 'QuestionSerializer'
+    RelabelledSerializer.__module__ = serializers.QuestionSerializer.__module__
+    with mock.patch.object(PollViewSet, 'serializer_class', RelabelledSerializer):
+        response = api_client.get(polls_create_url)
+
+    assert response.status_code == status.HTTP_200_OK
+    schema = response.json()['serializer']['schema']
+    assert schema['properties']['question_text']['title'] == 'Question'
+
+
+def test_schema_store_version_mismatch(store_path, caplog):
+    with mock.patch.object(store, 'get_package_version', return_value='0.0.0'):
+        assert store.get_schema_store() is None
+    assert 'Ignoring the schema store' in caplog.text
+
+
+def test_schema_store_invalid_file(tmp_path, caplog):
+    path = tmp_path / 'invalid.bin'
+    path.write_bytes(b'0' * 32)
+
+    with override_settings(DRF_REACT_TEMPLATE_SCHEMA_STORE=str(path)):
+        assert store.get_schema_store() is None
+    assert 'Could not open the schema store' in caplog.text
+
+
+def test_export_schema_store_command(tmp_path):
+    path = tmp_path / 'schemas.bin'
+    out = StringIO()
+    call_command('export_schema_store', str(path), '--language', 'en', stdout=out)
+
+    assert out.getvalue().startswith(f'Exported 4 form schemas to {path}')
+    assert len(store.SchemaStore(path)) == 4
@@ -1,7 +1,23 @@
+import json
+from unittest import mock
+
 import pytest
+from django.test import override_settings
 from rest_framework import status
+from rest_framework.fields import CharField, ChoiceField, ListField
+from rest_framework.mixins import UpdateModelMixin
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.relations import PrimaryKeyRelatedField, SlugRelatedField
+from rest_framework.test import APIRequestFactory
 
-from example.polls import serializers
+from drf_react_template.cache import get_cache_key, schema_cache, schema_variant_cache
+from drf_react_template.schema_form_encoder import (
+    REMOTE_ENUM_KEY,
+    REMOTE_ENUM_SEARCH_KEY,
+)
+from example.polls import models, serializers
+from example.polls.viewsets import PollViewSet, StreamingPollViewSet
+from tests import factories
 
 
 @pytest.mark.django_db
@@ -15,6 +31,7 @@ def test_question_and_choice_viewset_list_empty_data(
         'serializer': question_and_choice_list_expected_schema,
         'formData': [],
     }
+    assert response['Vary'] == 'X-Schema-Hash'
 
 
 @pytest.mark.django_db
@@ -50,3 +67,521 @@ def test_question_and_choice_viewset_create(
         response_obj['serializer']['uiSchema']
         == question_and_choice_retrieve_expected_ui_schema
     )
+
+
+@pytest.mark.django_db
+def test_question_and_choice_viewset_create_etag(api_client, polls_create_url):
+    response = api_client.get(polls_create_url)
+
+    etag = response['ETag']
+    assert etag.startswith('"') and etag.endswith('"')
+    assert response['Cache-Control'] == 'no-cache'
+    assert response['Vary'] == 'Accept, Accept-Language, X-Schema-Hash'
+
+    response = api_client.get(polls_create_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b''
+    assert response['ETag'] == etag
+
+    response = api_client.get(polls_create_url, HTTP_IF_NONE_MATCH=f'W/{etag}')
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    response = api_client.get(polls_create_url, HTTP_IF_NONE_MATCH='"stale"')
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'] == etag
+
+
+@pytest.mark.django_db
+def test_question_and_choice_viewset_create_etag_per_representation(
+    api_client, polls_create_url
+):
+    response = api_client.get(polls_create_url, HTTP_X_SCHEMA_HASH='')
+    schema_hash = response.json()['schemaHash']
+    etags = {
+        response['ETag'],
+        api_client.get(polls_create_url)['ETag'],
+        api_client.get(polls_create_url, HTTP_X_SCHEMA_HASH=schema_hash)['ETag'],
+        api_client.get(polls_create_url, HTTP_ACCEPT='application/json; indent=4')[
+            'ETag'
+        ],
+    }
+    assert len(etags) == 4
+
+    response = api_client.get(
+        polls_create_url,
+        HTTP_X_SCHEMA_HASH=schema_hash,
+        HTTP_IF_NONE_MATCH=api_client.get(polls_create_url)['ETag'],
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {'formData': {}, 'schemaHash': schema_hash}
+
+
+@pytest.mark.django_db
+def test_question_and_choice_viewset_create_etag_changes_with_schema(
+    api_client, polls_create_url
+):
+    etag = api_client.get(polls_create_url)['ETag']
+
+    class TranslatedSerializer(serializers.QuestionSerializer):
+        question_text = CharField(label='Texte')
+
+        class Meta(serializers.QuestionSerializer.Meta):
+            pass
+
+    with mock.patch.object(
+        PollViewSet, 'serializer_class', TranslatedSerializer
+    ), mock.patch.object(
+        PollViewSet,
+        'create_form_cache_control',
+        {'public': True, 'max_age': 300},
+    ):
+        response = api_client.get(polls_create_url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'] != etag
+    assert response['Cache-Control'] in ('public, max-age=300', 'max-age=300, public')
+
+
+@pytest.mark.django_db
+def test_question_and_choice_viewset_create_schema_by_reference(
+    api_client, polls_create_url, question_and_choice_retrieve_expected_schema
+):
+    response = api_client.get(polls_create_url)
+    assert 'schemaHash' not in response.json()
+
+    response = api_client.get(polls_create_url, HTTP_X_SCHEMA_HASH='')
+    response_obj = response.json()
+    schema_hash = response_obj['schemaHash']
+    assert (
+        response_obj['serializer']['schema']
+        == question_and_choice_retrieve_expected_schema
+    )
+
+    response = api_client.get(polls_create_url, HTTP_X_SCHEMA_HASH=schema_hash)
+    assert response.json() == {'formData': {}, 'schemaHash': schema_hash}
+    assert 'X-Schema-Hash' in response['Vary']
+
+    response = api_client.get(polls_create_url, {'schema_hash': schema_hash})
+    assert response.json() == {'formData': {}, 'schemaHash': schema_hash}
+
+
+@pytest.mark.django_db
+def test_question_and_choice_viewset_schema_by_hash(
+    api_client, polls_list_url, question_and_choice_list_expected_schema
+):
+    schema_hash = api_client.get(polls_list_url, {'schema_hash': ''}).json()[
+        'schemaHash'
+    ]
+
+    response = api_client.get(f'{polls_list_url}schema/{schema_hash}/')
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        'serializer': question_and_choice_list_expected_schema,
+        'schemaHash': schema_hash,
+    }
+    assert 'immutable' in response['Cache-Control']
+
+    response = api_client.get(f'{polls_list_url}schema/{"0" * 64}/')
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_schema_data_only(api_client, settings, polls_list_url, polls_create_url):
+    schema_hash = api_client.get(polls_create_url, {'schema_hash': ''}).json()[
+        'schemaHash'
+    ]
+    settings.DRF_REACT_TEMPLATE_SCHEMA_DATA_ONLY = True
+
+    response = api_client.get(polls_create_url)
+    assert response.json() == {'formData': {}, 'schemaHash': schema_hash}
+    assert api_client.get(polls_list_url).json().keys() == {'formData', 'schemaHash'}
+
+    with mock.patch.object(PollViewSet, 'schema_data_only', False):
+        assert 'serializer' in api_client.get(polls_create_url).json()
+
+
+def test_schema_variants(api_client, polls_create_url):
+    class TenantSerializer(serializers.QuestionSerializer):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            tenant = self.context['request'].headers['X-Tenant']
+            self.fields['question_text'].label = f'Question for {tenant}'
+
+        class Meta(serializers.QuestionSerializer.Meta):
+            pass
+
+    def get_schema_variant_key(self):
+        return self.request.headers['X-Tenant']
+
+    etags = {}
+    with mock.patch.object(
+        PollViewSet, 'serializer_class', TenantSerializer
+    ), mock.patch.object(PollViewSet, 'get_schema_variant_key', get_schema_variant_key):
+        for tenant in ('a', 'b', 'a'):
+            response = api_client.get(polls_create_url, HTTP_X_TENANT=tenant)
+            schema = response.json()['serializer']['schema']
+            assert schema['properties']['question_text']['title'] == (
+                f'Question for {tenant}'
+            )
+            etags.setdefault(tenant, response['ETag'])
+            assert etags[tenant] == response['ETag']
+        # Variants are not exported, so their schema is always sent.
+        with override_settings(DRF_REACT_TEMPLATE_SCHEMA_DATA_ONLY=True):
+            response = api_client.get(polls_create_url, HTTP_X_TENANT='a')
+            assert 'serializer' in response.json()
+
+    assert etags['a'] != etags['b']
+    # The schema hash and encoded schema of each tenant.
+    stats = schema_variant_cache.get_stats()
+    assert (stats.hits, stats.misses, stats.entries) == (4, 4, 4)
+    assert stats.resident_bytes > 0
+    assert get_cache_key(TenantSerializer, 'create_form') not in schema_cache
+
+
+@pytest.fixture
+def polls_stream_url():
+    return '/polls-stream/'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', (0, 1, 5))
+def test_streaming_list(
+    api_client,
+    polls_list_url,
+    polls_stream_url,
+    question_and_choice_list_expected_schema,
+    count,
+):
+    factories.QuestionFactory.create_batch(count)
+
+    with mock.patch.object(StreamingPollViewSet, 'stream_list_chunk_size', 2):
+        response = api_client.get(polls_stream_url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    assert response['Content-Type'] == 'application/json'
+    content = b''.join(response.streaming_content)
+    assert content == api_client.get(polls_list_url).content
+    assert json.loads(content) == {
+        'serializer': question_and_choice_list_expected_schema,
+        'formData': serializers.QuestionListSerializer(
+            models.Question.objects.all(), many=True
+        ).data,
+    }
+
+
+@pytest.mark.django_db
+def test_streaming_list_ndjson(
+    api_client, polls_stream_url, question_and_choice_list_expected_schema
+):
+    questions = factories.QuestionFactory.create_batch(3)
+
+    with mock.patch.object(StreamingPollViewSet, 'stream_list_format', 'ndjson'):
+        response = api_client.get(polls_stream_url)
+
+    assert response['Content-Type'] == 'application/x-ndjson'
+    lines = b''.join(response.streaming_content).splitlines()
+    assert json.loads(lines[0]) == {
+        'serializer': question_and_choice_list_expected_schema
+    }
+    assert [json.loads(line) for line in lines[1:]] == [
+        serializers.QuestionListSerializer(question).data for question in questions
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('stream_list_format', ('json', 'ndjson'))
+def test_streaming_list_schema_data_only(
+    api_client, settings, polls_list_url, polls_stream_url, stream_list_format
+):
+    factories.QuestionFactory.create_batch(2)
+    settings.DRF_REACT_TEMPLATE_SCHEMA_DATA_ONLY = True
+    expected = api_client.get(polls_list_url).json()
+
+    with mock.patch.object(
+        StreamingPollViewSet, 'stream_list_format', stream_list_format
+    ):
+        response = api_client.get(polls_stream_url)
+
+    lines = b''.join(response.streaming_content).splitlines()
+    if stream_list_format == 'json':
+        assert json.loads(lines[0]) == expected
+    else:
+        assert json.loads(lines[0]) == {'schemaHash': expected['schemaHash']}
+        assert [json.loads(line) for line in lines[1:]] == expected['formData']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('stream_list_format', ('json', 'ndjson'))
+def test_streaming_list_schema_by_reference(
+    api_client, polls_list_url, polls_stream_url, stream_list_format
+):
+    factories.QuestionFactory.create_batch(2)
+    expected = api_client.get(polls_list_url, HTTP_X_SCHEMA_HASH='')
+    schema_hash = expected.json()['schemaHash']
+
+    with mock.patch.object(
+        StreamingPollViewSet, 'stream_list_format', stream_list_format
+    ):
+        response = api_client.get(polls_stream_url, HTTP_X_SCHEMA_HASH='')
+        content = b''.join(response.streaming_content)
+        matched = api_client.get(polls_stream_url, {'schema_hash': schema_hash})
+        matched_lines = b''.join(matched.streaming_content).splitlines()
+
+    assert 'X-Schema-Hash' in response['Vary']
+    assert 'X-Schema-Hash' in matched['Vary']
+    if stream_list_format == 'json':
+        assert content == expected.content
+        assert json.loads(matched_lines[0]) == {
+            'formData': expected.json()['formData'],
+            'schemaHash': schema_hash,
+        }
+    else:
+        lines = content.splitlines()
+        assert json.loads(lines[0]) == {
+            'serializer': expected.json()['serializer'],
+            'schemaHash': schema_hash,
+        }
+        assert json.loads(matched_lines[0]) == {'schemaHash': schema_hash}
+        assert [json.loads(line) for line in matched_lines[1:]] == [
+            json.loads(line) for line in lines[1:]
+        ]
+
+
+@pytest.mark.django_db
+def test_streaming_list_paginated(api_client, polls_stream_url):
+    factories.QuestionFactory.create_batch(3)
+
+    with mock.patch.object(
+        StreamingPollViewSet, 'pagination_class', LimitOffsetPagination
+    ):
+        response = api_client.get(polls_stream_url, {'limit': 2})
+
+    assert not response.streaming
+    assert response.json()['formData']['count'] == 3
+
+
+@pytest.mark.django_db
+def test_create_form_builds_serializer_only_on_cache_miss(api_client, polls_create_url):
+    with mock.patch.object(
+        serializers.QuestionSerializer,
+        '__init__',
+        autospec=True,
+        side_effect=serializers.QuestionSerializer.__init__,
+    ) as serializer_init:
+        api_client.get(polls_create_url)
+        assert serializer_init.call_count == 1
+
+        response = api_client.get(polls_create_url)
+        assert serializer_init.call_count == 1
+
+    assert response.json()['serializer']['schema']['title'] == 'Question'
+
+
+@pytest.mark.django_db
+def test_list_reuses_action_serializer(
+    api_client, polls_list_url, question_and_choice_list_expected_schema
+):
+    factories.QuestionFactory.create_batch(2)
+
+    with mock.patch.object(
+        PollViewSet,
+        'get_serializer',
+        autospec=True,
+        side_effect=PollViewSet.get_serializer,
+    ) as get_serializer:
+        response = api_client.get(polls_list_url)
+
+    assert get_serializer.call_count == 1
+    assert response.json()['serializer'] == question_and_choice_list_expected_schema
+
+
+def test_question_and_choice_viewset_sub_schema(
+    api_client,
+    polls_list_url,
+    question_and_choice_retrieve_expected_schema,
+    question_and_choice_retrieve_expected_ui_schema,
+):
+    response = api_client.get(f'{polls_list_url}sub-schema/', {'prefix': 'choices'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        'serializer': {
+            'schema': question_and_choice_retrieve_expected_schema['properties'][
+                'choices'
+            ],
+            'uiSchema': question_and_choice_retrieve_expected_ui_schema['choices'],
+        },
+        'prefix': 'choices',
+    }
+
+    for prefix in ('question_text', 'missing', 'choices.votes'):
+        response = api_client.get(f'{polls_list_url}sub-schema/', {'prefix': prefix})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_question_and_choice_viewset_sub_schema_self_referential(
+    api_client, polls_list_url
+):
+    from tests.test_schema_form_encoder import CategorySerializer
+
+    url = f'{polls_list_url}sub-schema/'
+    prefixes = ('parent', 'parent.parent', 'children.parent.children', 'children')
+    with mock.patch.object(PollViewSet, 'serializer_class', CategorySerializer):
+        responses = [api_client.get(url, {'prefix': p}).json() for p in prefixes]
+        # One entry per declared field, however deep the requested prefix.
+        assert [key[-1] for key in schema_cache._entries if 'sub_schema' in key] == [
+            'parent',
+            'children',
+        ]
+        with override_settings(DRF_REACT_TEMPLATE_SCHEMA_CACHE=False):
+            expected = [api_client.get(url, {'prefix': p}).json() for p in prefixes]
+
+    assert responses == expected
+    schema = responses[1]['serializer']['schema']
+    assert schema['properties']['children']['subSchema'] == 'parent.parent.children'
+    ui_schema = responses[2]['serializer']['uiSchema']
+    assert ui_schema['items']['parent'] == {
+        'ui:subSchema': 'children.parent.children.parent'
+    }
+
+
+class ProductSerializer(serializers.QuestionSerializer):
+    code = ChoiceField(choices=[(f'P{i:05}', f'Product {i}') for i in range(40000)])
+    tags = ListField(
+        child=ChoiceField(choices=['new', 'sale'], style={REMOTE_ENUM_KEY: True})
+    )
+
+    class Meta:
+        fields = ('question_text', 'pub_date', 'choices', 'code', 'tags')
+
+
+def test_question_and_choice_viewset_enum_choices(
+    api_client, polls_list_url, polls_create_url, settings
+):
+    settings.DRF_REACT_TEMPLATE_REMOTE_ENUM_THRESHOLD = 1000
+    url = f'{polls_list_url}choices/'
+    with mock.patch.object(PollViewSet, 'serializer_class', ProductSerializer):
+        schema = api_client.get(polls_create_url).json()['serializer']['schema']
+        response = api_client.get(url, {'field': 'code', 'page': 2, 'page_size': 2})
+        search_response = api_client.get(url, {'field': 'code', 'search': 'T 3999'})
+        value_response = api_client.get(
+            url, {'field': 'code', 'value': ['P00007', 'P00003']}
+        )
+        tags_response = api_client.get(url, {'field': 'tags'})
+        not_found = [
+            api_client.get(url, {'field': field}).status_code
+            for field in ('question_text', 'missing', 'choices.votes')
+        ]
+        bad_page = api_client.get(url, {'field': 'code', 'page': 'x'})
+
+    assert schema['properties']['code'] == {
+        'title': 'Code',
+        'type': 'string',
+        'enumSource': 'code',
+    }
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        'field': 'code',
+        'count': 40000,
+        'page': 2,
+        'pageSize': 2,
+        'enum': ['P00002', 'P00003'],
+        'enumNames': ['Product 2', 'Product 3'],
+    }
+    assert search_response.json()['enum'] == [
+        'P03999',
+        *(f'P{i}' for i in range(39990, 40000)),
+    ]
+    assert value_response.json()['enum'] == ['P00003', 'P00007']
+    assert schema['properties']['tags']['items']['enumSource'] == 'tags'
+    assert tags_response.json()['enumNames'] == ['new', 'sale']
+    assert not_found == [status.HTTP_404_NOT_FOUND] * 3
+    assert bad_page.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class RelatedProductSerializer(serializers.QuestionSerializer):
+    related = PrimaryKeyRelatedField(
+        queryset=models.Question.objects.all(),
+        required=False,
+        style={REMOTE_ENUM_KEY: True},
+    )
+    related_texts = SlugRelatedField(
+        many=True,
+        slug_field='question_text',
+        queryset=models.Question.objects.all(),
+        required=False,
+        style={REMOTE_ENUM_KEY: True, REMOTE_ENUM_SEARCH_KEY: ('question_text',)},
+    )
+
+    class Meta:
+        fields = ('question_text', 'pub_date', 'choices', 'related', 'related_texts')
+
+
+@pytest.mark.django_db
+def test_question_and_choice_viewset_enum_choices_related(
+    api_client, polls_list_url, django_assert_num_queries
+):
+    questions = [
+        factories.QuestionFactory(question_text=f'Question {i}') for i in range(5)
+    ]
+    url = f'{polls_list_url}choices/'
+    with mock.patch.object(PollViewSet, 'serializer_class', RelatedProductSerializer):
+        with django_assert_num_queries(2):  # count + page
+            response = api_client.get(
+                url, {'field': 'related', 'page': 2, 'page_size': 2}
+            )
+        value_response = api_client.get(
+            url, {'field': 'related', 'value': [questions[3].pk, 'x']}
+        )
+        search_response = api_client.get(
+            url, {'field': 'related_texts', 'search': 'TION 4'}
+        )
+        slug_value_response = api_client.get(
+            url, {'field': 'related_texts', 'value': 'Question 1'}
+        )
+
+    assert response.json() == {
+        'field': 'related',
+        'count': 5,
+        'page': 2,
+        'pageSize': 2,
+        'enum': [questions[2].pk, questions[3].pk],
+        'enumNames': ['Question object (%d)' % q.pk for q in questions[2:4]],
+    }
+    assert value_response.json()['enum'] == [questions[3].pk]
+    assert search_response.json()['enum'] == ['Question 4']
+    assert search_response.json()['count'] == 1
+    assert slug_value_response.json()['enum'] == ['Question 1']
+
+
+class UpdatablePollViewSet(UpdateModelMixin, PollViewSet):
+    pass
+
+
+@pytest.mark.django_db
+def test_question_and_choice_viewset_partial_update_schema(
+    question, question_and_choice_retrieve_expected_schema
+):
+    def update(serializer, instance, validated_data):
+        return {
+            'question_text': validated_data['question_text'],
+            'pub_date': instance.pub_date,
+            'choices': [],
+        }
+
+    request = APIRequestFactory().patch(
+        f'/polls/{question.pk}/', {'question_text': 'Updated'}, format='json'
+    )
+    view = UpdatablePollViewSet.as_view({'patch': 'partial_update'})
+    with mock.patch.object(serializers.QuestionSerializer, 'update', update):
+        response = view(request, pk=question.pk).render()
+
+    assert response.status_code == status.HTTP_200_OK
+    response_json = json.loads(response.content)
+    assert response_json['formData']['question_text'] == 'Updated'
+    # Defaults are kept, as in the schema of every other action.
+    assert (
+        response_json['serializer']['schema']
+        == question_and_choice_retrieve_expected_schema
+    )
@@ -0,0 +1,110 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import translation
+
+from drf_react_template import warmup
+from drf_react_template.cache import get_cache_key, schema_cache
+from example.polls.serializers import QuestionListSerializer, QuestionSerializer
+from example.polls.viewsets import AsyncPollViewSet, PollViewSet, StreamingPollViewSet
+
+
+def test_iter_form_schema_actions():
+    actions = {
+        (viewset_class, action)
+        for viewset_class, action, _ in warmup.iter_form_schema_actions()
+    }
+    assert actions == {
+        (PollViewSet, 'list'),
+        (PollViewSet, 'retrieve'),
+        (PollViewSet, 'create_form'),
+        (StreamingPollViewSet, 'list'),
+        (StreamingPollViewSet, 'create_form'),
+        (AsyncPollViewSet, 'list'),
+        (AsyncPollViewSet, 'create_form'),
+    }
+
+
+@pytest.mark.parametrize('max_workers', (1, 4))
+def test_warm_up_schemas(max_workers):
+    assert warmup.warm_up_schemas(max_workers=max_workers) == 7
+
+    assert get_cache_key(QuestionListSerializer, 'list') in schema_cache
+    assert get_cache_key(QuestionSerializer, 'retrieve') in schema_cache
+    assert get_cache_key(QuestionSerializer, 'create_form') in schema_cache
+
+
+def test_warm_up_schemas_languages():
+    assert warmup.warm_up_schemas(languages=['en', 'fr']) == 14
+
+    with translation.override('fr'):
+        assert get_cache_key(QuestionSerializer, 'retrieve') in schema_cache
+
+
+@pytest.mark.django_db
+def test_warm_up_schemas_serves_requests(api_client, polls_create_url):
+    warmup.warm_up_schemas()
+    entries = len(schema_cache)
+
+    api_client.get(polls_create_url)
+    assert len(schema_cache) == entries
+
+
+def test_warm_up_schemas_logs_failures(caplog):
+    class BrokenViewSet(PollViewSet):
+        def get_serializer(self, *args, **kwargs):
+            raise RuntimeError()
+
+    assert not warmup._warm_up((BrokenViewSet, 'list', {}), 'en')
+    assert 'Could not precompute the list schema of BrokenViewSet' in caplog.text
+
+
+def test_warm_form_schemas_command():
+    out = StringIO()
+    call_command('warm_form_schemas', '--language', 'en', stdout=out)
+    assert out.getvalue().startswith('Precomputed 7 form schemas')
+
+
+@override_settings(DRF_REACT_TEMPLATE_WARMUP=True)
+def test_app_config_ready_warm_up():
+    from django.apps import apps
+
+    apps.get_app_config('drf_react_template').ready()
+    assert get_cache_key(QuestionSerializer, 'retrieve') in schema_cache
+
+
+@pytest.mark.django_db
+def test_export_form_schemas(tmp_path, api_client, polls_list_url, polls_create_url):
+    manifest = warmup.export_form_schemas(str(tmp_path))
+
+    assert json.loads((tmp_path / 'manifest.json').read_text()) == manifest
+    assert set(manifest['schemas']) == {'question', 'polls-stream', 'polls-async'}
+    assert set(manifest['schemas']['question']) == {'list', 'retrieve', 'create_form'}
+    for url, action in ((polls_list_url, 'list'), (polls_create_url, 'create_form')):
+        path = manifest['schemas']['question'][action]['en-us']
+        response = api_client.get(url, {'schema_hash': ''})
+        # Byte-identical to the `serializer` member served by the API.
+        assert response.content.startswith(
+            b'{"serializer":' + (tmp_path / path).read_bytes() + b','
+        )
+        assert path == f"schemas/{response.json()['schemaHash']}.json"
+
+
+def test_export_form_schemas_command(tmp_path):
+    out = StringIO()
+    call_command(
+        'export_form_schemas',
+        str(tmp_path),
+        '--language',
+        'en',
+        '--language',
+        'fr',
+        stdout=out,
+    )
+
+    assert out.getvalue().startswith(f'Exported 14 form schemas to {tmp_path}')
+    manifest = json.loads((tmp_path / 'manifest.json').read_text())
+    assert set(manifest['schemas']['question']['retrieve']) == {'en', 'fr'}